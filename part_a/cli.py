@@ -0,0 +1,335 @@
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+
+import numpy as np
+
+import sweep
+from parallel import io_row, summary_row
+from simulator import Simulator
+from trace_reader import WRITE_FLAG
+
+SIMULATE_FIELDS = sweep.FIELDS + sweep.IO_FIELDS
+MRC_FIELDS = ["algorithm", "frame_size", "faults", "miss_ratio"]
+BENCH_FIELDS = [
+    "algorithm",
+    "frame_size",
+    "references",
+    "faults",
+    "seconds",
+    "references_per_second",
+]
+
+# Run in a fresh interpreter: how long importing the CLI takes, and whether
+# plotting got pulled in along the way.
+STARTUP_PROBE = (
+    "import sys, time\n"
+    "start = time.perf_counter()\n"
+    "import cli\n"
+    "print(time.perf_counter() - start, 'matplotlib' in sys.modules)"
+)
+
+
+def load_trace(args, simulator):
+    # Returns (reference string, writes). Binary trace files stream through
+    # a TraceReader, which carries its own write flags; stdin is read whole.
+    if args.trace_format == "pages":
+        if args.trace == "-":
+            text = sys.stdin.read()
+        else:
+            with open(args.trace) as f:
+                text = f.read()
+        if "w" not in text.lower():
+            return np.array(text.split(), dtype=np.int64), None
+        pages, writes = simulator.parse_reference_string(text)
+        return np.array(pages, dtype=np.int64), writes
+
+    width = 4 if args.trace_format == "u32" else 8
+    if args.trace != "-":
+        return simulator.open_trace(args.trace, width, args.flags), None
+
+    fields = [("address", f"<u{width}")]
+    if args.flags:
+        fields.append(("flags", "u1"))
+    records = np.frombuffer(sys.stdin.buffer.read(), dtype=np.dtype(fields))
+    pages = (records["address"] // simulator.page_size).astype(np.int64)
+    writes = (records["flags"] & WRITE_FLAG).astype(bool) if args.flags else None
+    return pages, writes
+
+
+def close_trace(trace):
+    if hasattr(trace, "close"):
+        trace.close()
+
+
+def simulate(args, out):
+    simulator = Simulator()
+    simulator.page_size = args.page_size
+    algorithms = sweep.parse_algorithms(args.algorithms)
+    trace, writes = load_trace(args, simulator)
+
+    rows = []
+    try:
+        for tlb_size in sweep.parse_values(args.tlb, "TLB size"):
+            simulator.tlb_size = tlb_size
+            for frame_size in sweep.parse_values(args.frames, "frame count"):
+                policies = {name: simulator.policies[name]() for name in algorithms}
+                runs = simulator.run_policies(
+                    policies,
+                    trace,
+                    frame_size,
+                    summary=True,
+                    window=args.window,
+                    writes=writes,
+                )
+                for name, (faults, summary) in runs.items():
+                    row = summary_row(
+                        {
+                            "algorithm": name,
+                            "frame_size": frame_size,
+                            "tlb_size": tlb_size,
+                            "page_size": args.page_size,
+                        },
+                        faults,
+                        summary,
+                    )
+                    rows.append(io_row(row, summary))
+    finally:
+        close_trace(trace)
+
+    sweep.write_rows(rows, args.format, out, SIMULATE_FIELDS)
+
+
+def mrc(args, out):
+    simulator = Simulator()
+    simulator.page_size = args.page_size
+    # Exact curves cover LRU and Optimal; a sampled trace has no future to
+    # look ahead into, so sampling defaults to LRU and FIFO.
+    algorithms = args.algorithms or ("LRU,FIFO" if args.sampled else "LRU,Optimal")
+    trace, _ = load_trace(args, simulator)
+    frame_sizes = None
+    if args.frames:
+        frame_sizes = sweep.parse_values(args.frames, "frame count")
+    max_frames = args.max_frames or (max(frame_sizes) if frame_sizes else None)
+
+    try:
+        if args.sampled:
+            result = simulator.sampled_miss_ratio_curves(
+                trace,
+                [name.strip() for name in algorithms.split(",")],
+                max_frames,
+                args.max_pages,
+                args.rate,
+                args.prefix,
+            )
+            curves = result["curves"]
+            # The accuracy estimate goes to stderr so stdout stays one
+            # record shape.
+            estimate = {
+                "sampling_rate": result["rate"],
+                "sampled_pages": result["sampled_pages"],
+                "error": result["error"],
+            }
+            sys.stderr.write(json.dumps(estimate) + "\n")
+        else:
+            available = simulator.miss_ratio_curves(trace, max_frames)
+            names = {name.lower(): name for name in available}
+            curves = {}
+            for part in algorithms.split(","):
+                name = names.get(part.strip().lower())
+                if name is None:
+                    raise ValueError(
+                        f"No exact curve for {part.strip()}; "
+                        "exact curves cover LRU and Optimal, use --sampled for others"
+                    )
+                curves[name] = available[name]
+    finally:
+        close_trace(trace)
+
+    rows = []
+    for name, curve in curves.items():
+        for frame_size in frame_sizes or curve.frame_sizes():
+            faults = curve.faults_at(frame_size)
+            rows.append(
+                {
+                    "algorithm": name,
+                    "frame_size": frame_size,
+                    "faults": faults,
+                    "miss_ratio": curve.miss_ratio(frame_size),
+                }
+            )
+    sweep.write_rows(rows, args.format, out, MRC_FIELDS)
+
+
+def measure_startup(repeat):
+    startup = None
+    imports = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        probe = subprocess.run(
+            [sys.executable, "-c", STARTUP_PROBE],
+            cwd=os.path.dirname(os.path.abspath(__file__)),
+            capture_output=True,
+            text=True,
+            check=True,
+        )
+        elapsed = time.perf_counter() - start
+        import_time, plotting = probe.stdout.split()
+        startup = elapsed if startup is None else min(startup, elapsed)
+        imports = float(import_time) if imports is None else min(imports, float(import_time))
+    return {
+        "startup_seconds": startup,
+        "import_seconds": imports,
+        "matplotlib_loaded": plotting == "True",
+    }
+
+
+def bench(args, out):
+    algorithms = sweep.parse_algorithms(args.algorithms)
+    frame_sizes = sweep.parse_values(args.frames, "frame count")
+
+    # Startup goes to stderr like the mrc accuracy estimate; with
+    # --max-startup a slow or plotting-heavy import fails the run.
+    startup = measure_startup(args.repeat)
+    sys.stderr.write(json.dumps(startup) + "\n")
+    if args.max_startup is not None:
+        if startup["matplotlib_loaded"]:
+            raise ValueError("matplotlib is imported at startup")
+        if startup["startup_seconds"] > args.max_startup:
+            raise ValueError(
+                f"Startup took {startup['startup_seconds']:.3f}s, "
+                f"over the {args.max_startup}s limit"
+            )
+
+    simulator = Simulator()
+    simulator.page_size = args.page_size
+    simulator.tlb_size = args.tlb
+    trace, writes = load_trace(args, simulator)
+
+    rows = []
+    try:
+        for name in algorithms:
+            for frame_size in frame_sizes:
+                best = None
+                for _ in range(args.repeat):
+                    start = time.perf_counter()
+                    faults, summary = simulator.run_policy(
+                        simulator.policies[name](),
+                        trace,
+                        frame_size,
+                        summary=True,
+                        window=args.window,
+                        writes=writes,
+                    )
+                    elapsed = time.perf_counter() - start
+                    best = elapsed if best is None else min(best, elapsed)
+                references = summary["references"]
+                rows.append(
+                    {
+                        "algorithm": name,
+                        "frame_size": frame_size,
+                        "references": references,
+                        "faults": faults,
+                        "seconds": best,
+                        "references_per_second": references / best if best else 0,
+                    }
+                )
+    finally:
+        close_trace(trace)
+
+    sweep.write_rows(rows, args.format, out, BENCH_FIELDS)
+
+
+def build_parser():
+    trace = argparse.ArgumentParser(add_help=False)
+    trace.add_argument("trace", help="trace file, or - for stdin")
+    trace.add_argument(
+        "--trace-format",
+        choices=["pages", "u32", "u64"],
+        default="pages",
+        help="whitespace-separated page numbers (3w marks a write) or binary "
+        "little-endian addresses",
+    )
+    trace.add_argument(
+        "--flags", action="store_true", help="binary records carry a flag byte"
+    )
+    trace.add_argument("--page-size", type=int, default=4096)
+    trace.add_argument("--format", choices=["csv", "json"], default="json")
+    trace.add_argument("--output", help="output file (default: stdout)")
+
+    parser = argparse.ArgumentParser(
+        description="Headless page replacement simulation with JSON-lines or CSV output"
+    )
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    command = commands.add_parser(
+        "simulate", parents=[trace], help="all chosen algorithms in one pass"
+    )
+    command.add_argument("--algorithms", default=",".join(sweep.ALGORITHMS))
+    command.add_argument("--frames", default="4", help="e.g. 4,8,16 or 1:64:1")
+    command.add_argument("--tlb", default="4")
+    command.add_argument("--window", type=int, default=1000)
+    command.set_defaults(func=simulate)
+
+    command = commands.add_parser("sweep", help="parallel parameter grid (sweep.py)")
+    sweep.add_arguments(command)
+    command.set_defaults(func=sweep.run_sweep)
+
+    command = commands.add_parser("mrc", parents=[trace], help="miss-ratio curves")
+    command.add_argument(
+        "--algorithms", help="default: LRU,Optimal, or LRU,FIFO with --sampled"
+    )
+    command.add_argument("--frames", help="only these frame sizes")
+    command.add_argument("--max-frames", type=sweep.positive_int)
+    command.add_argument(
+        "--sampled",
+        action="store_true",
+        help="SHARDS sampling for long traces (LRU, FIFO and other policies "
+        "without look-ahead)",
+    )
+    command.add_argument("--max-pages", type=int, default=8192)
+    command.add_argument("--rate", type=float, default=1.0)
+    command.add_argument("--prefix", type=int, default=100_000)
+    command.set_defaults(func=mrc)
+
+    command = commands.add_parser(
+        "bench", parents=[trace], help="references per second by algorithm"
+    )
+    command.add_argument("--algorithms", default=",".join(sweep.ALGORITHMS))
+    command.add_argument("--frames", default="64")
+    command.add_argument("--tlb", type=sweep.positive_int, default=4)
+    command.add_argument("--window", type=int, default=1000)
+    command.add_argument("--repeat", type=int, default=3)
+    command.add_argument(
+        "--max-startup",
+        type=float,
+        help="fail if startup takes longer (seconds) or imports matplotlib",
+    )
+    command.set_defaults(func=bench)
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    try:
+        if args.output:
+            with open(args.output, "w", newline="") as out:
+                args.func(args, out)
+        else:
+            args.func(args, sys.stdout)
+    except BrokenPipeError:
+        # The reader went away (piped into head); stop without a traceback
+        # when the interpreter flushes stdout on exit.
+        os.dup2(os.open(os.devnull, os.O_WRONLY), sys.stdout.fileno())
+        return 1
+    except (OSError, ValueError) as error:
+        sys.stderr.write(f"error: {error}\n")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,83 @@
+class CostModel:
+    # Latencies in nanoseconds. Every reference pays a TLB lookup and the
+    # memory access itself; a TLB miss adds one memory read per page-table
+    # level; a fault adds its service time on top. Minor faults are first
+    # touches of a page (zero-filled, no I/O); major faults bring an evicted
+    # page back from backing store. Evicting a dirty page adds a write-back.
+
+    def __init__(
+        self,
+        tlb_hit_time=1,
+        memory_access_time=100,
+        walk_levels=4,
+        walk_time_per_level=None,
+        minor_fault_time=1_000,
+        major_fault_time=100_000,
+        writeback_time=100_000,
+    ):
+        self.tlb_hit_time = tlb_hit_time
+        self.memory_access_time = memory_access_time
+        self.walk_levels = walk_levels
+        self.walk_time_per_level = (
+            memory_access_time if walk_time_per_level is None else walk_time_per_level
+        )
+        self.minor_fault_time = minor_fault_time
+        self.major_fault_time = major_fault_time
+        self.writeback_time = writeback_time
+
+    @property
+    def walk_time(self):
+        return self.walk_levels * self.walk_time_per_level
+
+    def reference_time(
+        self,
+        tlb_miss,
+        fault=False,
+        first_touch=False,
+        writeback=False,
+        walk_references=None,
+    ):
+        # walk_references comes from a modeled page table; without one a
+        # miss walks every level.
+        time = self.tlb_hit_time + self.memory_access_time
+        if walk_references is not None:
+            time += walk_references * self.walk_time_per_level
+        elif tlb_miss:
+            time += self.walk_time
+        if fault:
+            time += self.minor_fault_time if first_touch else self.major_fault_time
+        if writeback:
+            time += self.writeback_time
+        return time
+
+    def costs(
+        self,
+        references,
+        tlb_misses,
+        faults,
+        first_touches,
+        writebacks=0,
+        walk_references=None,
+    ):
+        major_faults = faults - first_touches
+        if walk_references is None:
+            walk_time = tlb_misses * self.walk_time
+        else:
+            walk_time = walk_references * self.walk_time_per_level
+        breakdown = {
+            "tlb_time": references * self.tlb_hit_time,
+            "walk_time": walk_time,
+            "memory_time": references * self.memory_access_time,
+            "fault_time": first_touches * self.minor_fault_time
+            + major_faults * self.major_fault_time,
+            "writeback_time": writebacks * self.writeback_time,
+        }
+        total_time = sum(breakdown.values())
+        return {
+            "minor_faults": first_touches,
+            "major_faults": major_faults,
+            "writebacks": writebacks,
+            **breakdown,
+            "total_time": total_time,
+            "eat": total_time / references if references else 0,
+        }
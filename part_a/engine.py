@@ -0,0 +1,318 @@
+import heapq
+from itertools import repeat
+
+from stats import RunSummary
+from steplog import EMPTY, StepLog
+from tlb import TLB
+
+
+class PolicyRun:
+    def __init__(
+        self,
+        name,
+        policy,
+        frame_size,
+        tlb,
+        summary=False,
+        window=1000,
+        walker=None,
+    ):
+        self.name = name
+        self.policy = policy
+        self.frame_size = frame_size
+        self.slots = [None] * frame_size
+        # Free frames as a min-heap, so memory fills from frame 0 and a
+        # frame given back by a variable-allocation policy is reused first.
+        self.free = list(range(frame_size))
+        self.page_table = {}
+        self.tlb = tlb
+        self.faults = 0
+        self.steps = None if summary else StepLog(tlb, frame_size, policy.layout)
+        self.stats = RunSummary(window) if summary else None
+        # One dirty byte per frame, shared with the policy so policies such
+        # as Enhanced Second-Chance can prefer clean victims.
+        self.dirty = bytearray(frame_size)
+        policy.dirty = self.dirty
+        self.clean_evictions = 0
+        self.writebacks = 0
+        self.background_writebacks = 0
+        self.flush_hand = 0
+        # Optional radix page table mirroring page_table, walked on TLB
+        # misses to count the memory references a translation costs.
+        self.walker = walker
+        self.walk_references = 0
+        policy.reset(frame_size, self.slots)
+
+    def evict(self, frame):
+        # Returns whether the page leaving `frame` had to be written back.
+        if self.dirty[frame]:
+            self.dirty[frame] = 0
+            self.writebacks += 1
+            return True
+        self.clean_evictions += 1
+        return False
+
+    def io(self, page_size):
+        return {
+            "clean_evictions": self.clean_evictions,
+            "dirty_evictions": self.writebacks,
+            "background_writebacks": self.background_writebacks,
+            "writeback_bytes": (self.writebacks + self.background_writebacks)
+            * page_size,
+        }
+
+    def result(self):
+        if self.stats is not None:
+            summary = self.stats.result(self.tlb)
+            summary["policy"] = self.policy.stats()
+            if self.walker is not None:
+                summary["page_table"] = self.walker.stats()
+            return self.faults, summary
+        return self.faults, self.steps
+
+
+class BackgroundFlusher:
+    # Clean-ahead: every `interval` references, write back up to `batch`
+    # dirty frames, sweeping round-robin through memory. Pages it cleans
+    # can later be evicted without a write-back on the fault path.
+
+    def __init__(self, interval=100, batch=4):
+        self.interval = interval
+        self.batch = batch
+
+    def flush(self, run):
+        dirty = run.dirty
+        hand = run.flush_hand
+        cleaned = 0
+        while cleaned < self.batch:
+            frame = dirty.find(1, hand)
+            if frame < 0:
+                frame = dirty.find(1, 0, hand)
+                if frame < 0:
+                    break
+            dirty[frame] = 0
+            run.policy.on_clean(frame)
+            cleaned += 1
+            hand = frame + 1
+        run.flush_hand = hand % run.frame_size
+        run.background_writebacks += cleaned
+
+
+class LockstepEngine:
+    def __init__(
+        self,
+        policies,
+        frame_size,
+        page_size=4096,
+        tlb_factory=TLB,
+        summary=False,
+        window=1000,
+        cost_model=None,
+        page_table_factory=None,
+        flusher=None,
+    ):
+        self.page_size = page_size
+        self.flusher = flusher
+        self.track_writes = False
+        self.cost_model = cost_model
+        # Every policy faults on a page's first touch, so the engine tracks
+        # first touches once for all runs (minor vs major faults).
+        self.seen = set() if cost_model is not None else None
+        self.runs = [
+            PolicyRun(
+                name,
+                policy,
+                frame_size,
+                tlb_factory(),
+                summary,
+                window,
+                page_table_factory() if page_table_factory else None,
+            )
+            for name, policy in policies.items()
+        ]
+        self.t = 0
+
+    @property
+    def needs_future(self):
+        return any(run.policy.needs_future for run in self.runs)
+
+    def prepare(self, reference_string):
+        for run in self.runs:
+            if run.policy.needs_future:
+                run.policy.prepare(reference_string)
+
+    def feed(self, pages, virtual_addresses=None, writes=None):
+        reference = self.reference
+        if writes is not None:
+            self.track_writes = True
+            if hasattr(writes, "tolist"):
+                writes = writes.tolist()
+
+        if virtual_addresses is None:
+            if writes is None:
+                for page in pages:
+                    reference(page)
+            else:
+                for page, write in zip(pages, writes):
+                    reference(page, write=write)
+            return
+
+        # Offsets for the whole batch come from one vectorized modulo when
+        # the addresses are a numpy array.
+        if hasattr(virtual_addresses, "tolist"):
+            offsets = (virtual_addresses % self.page_size).tolist()
+            virtual_addresses = virtual_addresses.tolist()
+        else:
+            offsets = [virtual_addr % self.page_size for virtual_addr in virtual_addresses]
+
+        if writes is None:
+            writes = repeat(False)
+        for page, virtual_addr, offset, write in zip(
+            pages, virtual_addresses, offsets, writes
+        ):
+            reference(page, virtual_addr, offset, write)
+
+    def feed_addresses(self, virtual_addresses, writes=None):
+        # Addresses alone, with the page numbers taken from them.
+        if hasattr(virtual_addresses, "tolist"):
+            pages = (virtual_addresses // self.page_size).tolist()
+        else:
+            pages = [virtual_addr // self.page_size for virtual_addr in virtual_addresses]
+        self.feed(pages, virtual_addresses, writes)
+
+    def reference(self, page, virtual_addr=None, offset=0, write=False):
+        t = self.t
+        cost_model = self.cost_model
+        first_touch = False
+        if cost_model is not None and page not in self.seen:
+            self.seen.add(page)
+            first_touch = True
+
+        for run in self.runs:
+            policy = run.policy
+            page_table = run.page_table
+            tlb = run.tlb
+            walker = run.walker
+            frame = page_table.get(page)
+            evicted = False
+            writeback = False
+
+            if frame is not None:
+                fault = False
+                if write:
+                    run.dirty[frame] = 1
+                policy.on_hit(page, frame, t)
+                if run.steps is not None and policy.reorders_on_hit:
+                    run.steps.change(frame, page, page)
+            else:
+                fault = True
+                run.faults += 1
+                policy.on_miss(page, t)
+
+                if run.free:
+                    frame = heapq.heappop(run.free)
+                    victim = EMPTY
+                else:
+                    victim = policy.choose_victim(t)
+                    frame = page_table.pop(victim)
+                    tlb.invalidate(victim)
+                    if walker is not None:
+                        walker.unmap(victim)
+                    evicted = True
+                    writeback = run.evict(frame)
+
+                run.slots[frame] = page
+                if write:
+                    run.dirty[frame] = 1
+                page_table[page] = frame
+                if walker is not None:
+                    walker.map(page, frame)
+                policy.on_fault(page, frame, t)
+                if run.steps is not None:
+                    run.steps.change(frame, victim, page)
+
+            tlb_miss = tlb.lookup(page) is None
+            walk_references = None
+            if tlb_miss:
+                tlb.update(page, frame)
+                if walker is not None:
+                    walk_references = walker.walk(page)[1]
+                    run.walk_references += walk_references
+            elif walker is not None:
+                walk_references = 0
+
+            if policy.variable:
+                for released in policy.release(t):
+                    self.release(run, released)
+
+            if run.stats is not None:
+                run.stats.record(
+                    fault,
+                    evicted,
+                    run.frame_size - len(run.free) if policy.variable else None,
+                )
+            else:
+                extra = policy.step_extra()
+                if cost_model is not None or self.track_writes:
+                    extra = dict(extra or ())
+                if self.track_writes:
+                    extra["write"] = int(write)
+                    extra["writeback"] = int(writeback)
+                if cost_model is not None:
+                    extra["time"] = round(
+                        cost_model.reference_time(
+                            tlb_miss, fault, first_touch, writeback, walk_references
+                        )
+                    )
+                run.steps.append(
+                    page,
+                    fault,
+                    tlb_miss,
+                    virtual_addr,
+                    frame * self.page_size + offset,
+                    extra,
+                )
+
+        self.t = t + 1
+        if self.flusher is not None and self.t % self.flusher.interval == 0:
+            for run in self.runs:
+                self.flusher.flush(run)
+
+    def release(self, run, page):
+        frame = run.page_table.pop(page)
+        run.evict(frame)
+        run.slots[frame] = None
+        heapq.heappush(run.free, frame)
+        run.tlb.invalidate(page)
+        if run.walker is not None:
+            run.walker.unmap(page)
+        if run.stats is not None:
+            run.stats.evictions += 1
+        else:
+            run.steps.change(frame, page, EMPTY)
+
+    def results(self):
+        results = {run.name: run.result() for run in self.runs}
+        for run in self.runs:
+            io = run.io(self.page_size)
+            if run.stats is not None:
+                results[run.name][1]["io"] = io
+            else:
+                run.steps.io = io
+            if run.walker is not None and run.steps is not None:
+                run.steps.page_table = run.walker.stats()
+        if self.cost_model is not None:
+            for run in self.runs:
+                costs = self.cost_model.costs(
+                    self.t,
+                    run.tlb.misses,
+                    run.faults,
+                    len(self.seen),
+                    run.writebacks,
+                    run.walk_references if run.walker is not None else None,
+                )
+                if run.stats is not None:
+                    results[run.name][1]["costs"] = costs
+                else:
+                    run.steps.costs = costs
+        return results
@@ -0,0 +1,205 @@
+from bisect import bisect_right
+
+import numpy as np
+
+from tlb import TLB
+
+KIB = 1 << 10
+MIB = 1 << 20
+GIB = 1 << 30
+PAGE_SIZES = (4 * KIB, 2 * MIB, 1 * GIB)
+# Unified TLB keys carry the page size index above the page number, so the
+# set index (the key's low bits) still comes from the page number alone.
+SIZE_TAG_SHIFT = 60
+
+
+class RegionMap:
+    # Decides the page size backing each virtual address. Regions are
+    # half-open [start, end) ranges aligned to their page size; everything
+    # outside them uses the base page size.
+
+    def __init__(self, base_page_size=4 * KIB):
+        self.base_page_size = base_page_size
+        self.starts = []
+        self.ends = []
+        self.sizes = []
+
+    def add(self, start, length, page_size):
+        if page_size % self.base_page_size or page_size & (page_size - 1):
+            raise ValueError(
+                f"Page size {page_size} is not a power-of-two multiple of "
+                f"{self.base_page_size}"
+            )
+        if start % page_size or length % page_size or length <= 0:
+            raise ValueError(f"Region must be aligned to its {page_size}-byte pages")
+
+        end = start + length
+        index = bisect_right(self.starts, start)
+        if (index and self.ends[index - 1] > start) or (
+            index < len(self.starts) and self.starts[index] < end
+        ):
+            raise ValueError("Regions must not overlap")
+
+        self.starts.insert(index, start)
+        self.ends.insert(index, end)
+        self.sizes.insert(index, page_size)
+
+    def promote(self, start, length, page_size=2 * MIB):
+        # What transparent huge pages would do: back every fully covered,
+        # aligned page_size chunk of the range with a huge page.
+        first = -(-start // page_size) * page_size
+        last = (start + length) // page_size * page_size
+        if last > first:
+            self.add(first, last - first, page_size)
+
+    def page_size(self, address):
+        index = bisect_right(self.starts, address) - 1
+        if index >= 0 and address < self.ends[index]:
+            return self.sizes[index]
+        return self.base_page_size
+
+    def page_sizes(self, addresses):
+        addresses = np.asarray(addresses, dtype=np.int64)
+        sizes = np.full(len(addresses), self.base_page_size, dtype=np.int64)
+        if self.starts:
+            starts = np.array(self.starts, dtype=np.int64)
+            index = np.searchsorted(starts, addresses, side="right") - 1
+            inside = index >= 0
+            clipped = np.maximum(index, 0)
+            inside &= addresses < np.array(self.ends, dtype=np.int64)[clipped]
+            sizes[inside] = np.array(self.sizes, dtype=np.int64)[clipped[inside]]
+        return sizes
+
+
+def round_to_ways(size, ways):
+    if not ways:
+        return size
+    return -(-size // ways) * ways
+
+
+def check_ways(size, ways, pool):
+    if ways and size % ways:
+        raise ValueError(
+            f"{size} TLB entries for {pool} are not a multiple of "
+            f"tlb_ways={ways}"
+        )
+
+
+class MultiSizeTLB:
+    # A TLB for mixed page sizes, either with a separate pool of entries per
+    # page size (as in most x86 L1 TLBs) or one unified pool whose entries
+    # are tagged with their page size.
+    DEFAULT_ENTRIES = {4 * KIB: 64, 2 * MIB: 32, 1 * GIB: 4}
+
+    def __init__(self, entries=None, unified=False, ways=None, policy="lru", seed=None):
+        self.unified = unified
+        if unified:
+            if entries:
+                check_ways(entries, ways, "the unified TLB")
+            else:
+                entries = round_to_ways(sum(self.DEFAULT_ENTRIES.values()), ways)
+            self.pool = TLB(entries, ways, policy, seed)
+            self.pools = {}
+        else:
+            if entries:
+                for page_size, size in entries.items():
+                    check_ways(size, ways, f"{page_size}-byte pages")
+            else:
+                # The default pools grow to whole sets, as a 4-entry 1G pool
+                # would under an 8-way geometry.
+                entries = {
+                    page_size: round_to_ways(size, ways)
+                    for page_size, size in self.DEFAULT_ENTRIES.items()
+                }
+            self.pool = None
+            self.pools = {
+                page_size: TLB(size, ways, policy, seed)
+                for page_size, size in entries.items()
+            }
+        self.size_index = {page_size: index for index, page_size in enumerate(PAGE_SIZES)}
+        self.hits = {}
+        self.misses = {}
+
+    def tag(self, page_number, page_size):
+        index = self.size_index.get(page_size)
+        if index is None:
+            if len(self.size_index) == 8:
+                raise ValueError("A unified TLB tags at most 8 page sizes")
+            index = self.size_index[page_size] = len(self.size_index)
+        if page_number >> SIZE_TAG_SHIFT:
+            raise ValueError(f"Page number {page_number} does not fit below the size tag")
+        return index << SIZE_TAG_SHIFT | page_number
+
+    def lookup(self, virtual_address, page_size):
+        # Looks the translation up and fills the entry on a miss; memory is
+        # assumed mapped, so every miss ends in a successful walk.
+        page_number = virtual_address // page_size
+        if self.unified:
+            tlb = self.pool
+            key = self.tag(page_number, page_size)
+        else:
+            tlb = self.pools.get(page_size)
+            if tlb is None:
+                raise ValueError(f"No TLB entries for {page_size}-byte pages")
+            key = page_number
+
+        hit = tlb.lookup(key) is not None
+        if hit:
+            self.hits[page_size] = self.hits.get(page_size, 0) + 1
+        else:
+            self.misses[page_size] = self.misses.get(page_size, 0) + 1
+            tlb.update(key, page_number)
+        return hit
+
+    def entries_by_size(self):
+        if not self.unified:
+            return {page_size: len(tlb) for page_size, tlb in self.pools.items()}
+        by_index = {index: page_size for page_size, index in self.size_index.items()}
+        counts = {}
+        for tlb_set in self.pool.sets:
+            for key in tlb_set:
+                page_size = by_index[key >> SIZE_TAG_SHIFT]
+                counts[page_size] = counts.get(page_size, 0) + 1
+        return counts
+
+    def stats(self):
+        entries = self.entries_by_size()
+        sizes = sorted(set(self.hits) | set(self.misses) | set(self.pools))
+        by_size = {}
+        for page_size in sizes:
+            hits = self.hits.get(page_size, 0)
+            misses = self.misses.get(page_size, 0)
+            total = hits + misses
+            row = {
+                "references": total,
+                "hits": hits,
+                "misses": misses,
+                "hit_ratio": hits / total * 100 if total else 0,
+                "entries": entries.get(page_size, 0),
+                "reach": entries.get(page_size, 0) * page_size,
+            }
+            if not self.unified:
+                row["max_reach"] = self.pools[page_size].size * page_size
+            by_size[page_size] = row
+
+        hits = sum(self.hits.values())
+        total = hits + sum(self.misses.values())
+        return {
+            "unified": self.unified,
+            "references": total,
+            "hit_ratio": hits / total * 100 if total else 0,
+            "reach": sum(row["reach"] for row in by_size.values()),
+            "by_page_size": by_size,
+        }
+
+
+def simulate_translation(virtual_addresses, region_map=None, tlb=None):
+    region_map = region_map or RegionMap()
+    tlb = tlb or MultiSizeTLB()
+    addresses = np.asarray(virtual_addresses, dtype=np.int64)
+    sizes = region_map.page_sizes(addresses)
+
+    lookup = tlb.lookup
+    for address, page_size in zip(addresses.tolist(), sizes.tolist()):
+        lookup(address, page_size)
+    return tlb.stats()
@@ -1,6 +1,16 @@
 from simulator import Simulator
 
 
+def choose_algorithms(simulator):
+    # The default comparison plus any of the other policies, by name.
+    extra = [name for name in simulator.policies if name not in simulator.default_algorithms]
+    print(f"Also compare (comma-separated, Enter for none): {', '.join(extra)}")
+    names = [name.strip() for name in input("Algorithms: ").split(",") if name.strip()]
+    if not names:
+        return None
+    return simulator.default_algorithms + simulator.policy_names(names)
+
+
 def main():
     simulator = Simulator()
     simulator.clear_screen()
@@ -16,18 +26,22 @@ def main():
             print("2. Test cases")
             print("3. Visual demonstration (single algorithm)")
             print("4. Animated comparison (all algorithms)")
-            print("5. Exit")
+            print("5. Binary trace file (summary only)")
+            print("6. Exit")
             
-            choice = input("Choose option (1-5): ")
+            choice = input("Choose option (1-6): ")
             
             if choice == '1':
                 try:
                     simulator.clear_screen()
-                    ref_input = input("Enter reference string (space-separated): ")
-                    reference_string = list(map(int, ref_input.split()))
+                    ref_input = input("Enter reference string (space-separated, 'w' marks a write e.g. 3w): ")
+                    reference_string, writes = simulator.parse_reference_string(ref_input)
                     frame_size = int(input("Enter frame size: "))
+                    algorithms = choose_algorithms(simulator)
                     
-                    results = simulator.simulate_all(reference_string, frame_size)
+                    results = simulator.simulate_all(
+                        reference_string, frame_size, writes=writes, algorithms=algorithms
+                    )
                     simulator.print_results(results, reference_string)
                     
                     show_graph = input("\nShow graphs? (y/n): ")
@@ -90,8 +104,11 @@ def main():
                         print(f"\nRunning: {selected_test['name']}")
                         print(f"Expected: {selected_test['description']}")
                         print("="*60)
+                        algorithms = choose_algorithms(simulator)
                         
-                        results = simulator.animated_demonstration(reference_string, frame_size)
+                        results = simulator.animated_demonstration(
+                            reference_string, frame_size, algorithms
+                        )
                         
                         input("\nPress Enter to show graphs...")
                         simulator.clear_screen()
@@ -121,9 +138,20 @@ def main():
                     print("3. Optimal")
                     print("4. Custom")
                     print("5. Clock")
+                    print("6. Two-handed Clock")
+                    print("7. Clock-Pro")
+                    print("8. ARC")
+                    print("9. 2Q")
+                    print("10. LIRS")
+                    print("11. W-TinyLFU")
+                    print("12. Working Set")
+                    print("13. Page-Fault Frequency")
+                    print("14. Enhanced Second-Chance")
                     
-                    alg_choice = input("Choose algorithm (1-5): ")
-                    algorithms = {'1': 'fifo', '2': 'lru', '3': 'optimal', '4': 'custom', '5': 'clock'}
+                    alg_choice = input("Choose algorithm (1-14): ")
+                    algorithms = {'1': 'fifo', '2': 'lru', '3': 'optimal', '4': 'custom', '5': 'clock',
+                                  '6': 'clock2', '7': 'clockpro', '8': 'arc', '9': '2q', '10': 'lirs',
+                                  '11': 'w-tinylfu', '12': 'workingset', '13': 'pff', '14': 'esc'}
                     
                     if alg_choice in algorithms:
                         simulator.clear_screen()
@@ -145,8 +173,9 @@ def main():
                     ref_input = input("Enter reference string (space-separated): ")
                     reference_string = list(map(int, ref_input.split()))
                     frame_size = int(input("Enter frame size: "))
+                    algorithms = choose_algorithms(simulator)
                     
-                    simulator.animated_demonstration(reference_string, frame_size)
+                    simulator.animated_demonstration(reference_string, frame_size, algorithms)
                     
                     input("\nPress Enter to continue...")
                     simulator.clear_screen()
@@ -157,6 +186,26 @@ def main():
                     simulator.clear_screen()
             
             elif choice == '5':
+                try:
+                    simulator.clear_screen()
+                    path = input("Enter trace file path: ")
+                    address_width = int(input("Address width in bytes (4/8): "))
+                    has_flags = input("Records have a read/write flag byte? (y/n): ").lower() == 'y'
+                    frame_size = int(input("Enter frame size: "))
+                    
+                    with simulator.open_trace(path, address_width, has_flags) as trace:
+                        results = simulator.simulate_all(trace, frame_size, summary=True)
+                        simulator.print_results(results, path)
+                    
+                    input("\nPress Enter to continue...")
+                    simulator.clear_screen()
+                    
+                except (OSError, ValueError) as e:
+                    print(f"Could not read trace: {e}")
+                    input("Press Enter to continue...")
+                    simulator.clear_screen()
+            
+            elif choice == '6':
                 simulator.clear_screen()
                 print("Thank you!")
                 break
@@ -0,0 +1,173 @@
+from array import array
+
+
+class MissRatioCurve:
+    def __init__(self, name, faults, references, complete=True):
+        self.name = name
+        self.faults = faults
+        self.references = references
+        # A curve cut off below the number of distinct pages says nothing
+        # about larger memories; a complete one is flat past its end.
+        self.complete = complete
+
+    def __len__(self):
+        return len(self.faults)
+
+    def frame_sizes(self):
+        return range(1, len(self.faults) + 1)
+
+    def faults_at(self, frame_size):
+        if frame_size < 1:
+            return self.references
+        if frame_size > len(self.faults):
+            if not self.complete:
+                raise ValueError(
+                    f"{self.name} curve only covers up to {len(self.faults)} frames"
+                )
+            return self.faults[-1] if self.faults else 0
+        return self.faults[frame_size - 1]
+
+    def miss_ratio(self, frame_size):
+        if self.references == 0:
+            return 0
+        return self.faults_at(frame_size) / self.references
+
+    def miss_ratios(self):
+        if self.references == 0:
+            return array("d", bytes(8 * len(self.faults)))
+        return array("d", (faults / self.references for faults in self.faults))
+
+
+class FenwickTree:
+    def __init__(self, size):
+        self.size = size
+        self.tree = array("q", bytes(8 * (size + 1)))
+
+    def add(self, index, delta):
+        tree = self.tree
+        index += 1
+        while index <= self.size:
+            tree[index] += delta
+            index += index & -index
+
+    def prefix_sum(self, index):
+        tree = self.tree
+        total = 0
+        index += 1
+        while index > 0:
+            total += tree[index]
+            index -= index & -index
+        return total
+
+
+def as_sequence(reference_string):
+    if hasattr(reference_string, "__getitem__") and hasattr(reference_string, "__len__"):
+        return reference_string
+    return array("q", reference_string)
+
+
+def curve_from_histogram(name, histogram, misses, references, distinct_pages):
+    # histogram[d] counts references at stack distance d; with c frames every
+    # reference deeper than c faults, as do the cold or untracked `misses`.
+    max_frames = len(histogram) - 1
+    faults = array("q", bytes(8 * max_frames))
+    deeper = misses
+    for frame_size in range(max_frames, 0, -1):
+        faults[frame_size - 1] = deeper
+        deeper += histogram[frame_size]
+    return MissRatioCurve(name, faults, references, max_frames >= distinct_pages)
+
+
+def lru_curve(reference_string, max_frames=None):
+    reference_string = as_sequence(reference_string)
+    n = len(reference_string)
+    if max_frames is None:
+        max_frames = len(set(reference_string))
+
+    # One mark per page at the time of its latest reference; the number of
+    # marks after a page's previous reference is its LRU stack distance.
+    marks = FenwickTree(n)
+    last_seen = {}
+    histogram = array("q", bytes(8 * (max_frames + 1)))
+    misses = 0
+
+    for t, page in enumerate(reference_string):
+        previous = last_seen.get(page)
+        if previous is None:
+            misses += 1
+        else:
+            distance = marks.prefix_sum(t - 1) - marks.prefix_sum(previous) + 1
+            if distance <= max_frames:
+                histogram[distance] += 1
+            else:
+                misses += 1
+            marks.add(previous, -1)
+        marks.add(t, 1)
+        last_seen[page] = t
+
+    return curve_from_histogram("LRU", histogram, misses, n, len(last_seen))
+
+
+def optimal_curve(reference_string, max_frames=None, next_use=None):
+    reference_string = as_sequence(reference_string)
+    n = len(reference_string)
+    if max_frames is None:
+        max_frames = len(set(reference_string))
+    if next_use is None:
+        next_use = next_use_index(reference_string)
+
+    # Mattson's OPT stack: the referenced page moves to the top and each
+    # level keeps whichever of its page and the page carried down from above
+    # is needed sooner. Pages pushed past max_frames can only come back by
+    # being referenced, so the stack is truncated there.
+    stack = []
+    upcoming = {}
+    histogram = array("q", bytes(8 * (max_frames + 1)))
+    misses = 0
+
+    for t, page in enumerate(reference_string):
+        upcoming[page] = next_use[t]
+        try:
+            depth = stack.index(page)
+        except ValueError:
+            depth = None
+
+        if depth is None:
+            misses += 1
+            end = len(stack)
+        else:
+            histogram[depth + 1] += 1
+            end = depth
+            if depth == 0:
+                continue
+
+        if not stack:
+            stack.append(page)
+            continue
+
+        carry = stack[0]
+        stack[0] = page
+        for level in range(1, end):
+            resident = stack[level]
+            if upcoming[resident] > upcoming[carry]:
+                stack[level] = carry
+                carry = resident
+
+        if depth is None:
+            if len(stack) < max_frames:
+                stack.append(carry)
+        else:
+            stack[depth] = carry
+
+    return curve_from_histogram("Optimal", histogram, misses, n, len(upcoming))
+
+
+def next_use_index(reference_string):
+    n = len(reference_string)
+    next_use = array("q", bytes(8 * n))
+    last_seen = {}
+    for i in range(n - 1, -1, -1):
+        page = reference_string[i]
+        next_use[i] = last_seen.get(page, n)
+        last_seen[page] = i
+    return next_use
@@ -0,0 +1,141 @@
+import os
+
+import numpy as np
+
+from costs import CostModel
+from parallel import ALGORITHMS, Job, ParallelRunner, run_tasks
+
+PAGE_SIZES = tuple(1 << shift for shift in range(12, 22))
+
+
+def collapse_repeats(pages):
+    if len(pages) == 0:
+        return pages
+    keep = np.empty(len(pages), dtype=bool)
+    keep[0] = True
+    np.not_equal(pages[1:], pages[:-1], out=keep[1:])
+    return pages[keep]
+
+
+def page_streams(addresses, page_sizes=PAGE_SIZES):
+    # Page streams for every page size with runs of one page collapsed.
+    # Pages that repeat at one size still repeat at every larger size, so
+    # each stream is derived from the previous, shorter one.
+    page_sizes = sorted(page_sizes)
+    for page_size in page_sizes:
+        if page_size & (page_size - 1):
+            raise ValueError(f"Page size {page_size} is not a power of two")
+
+    streams = {}
+    pages = np.asarray(addresses, dtype=np.uint64)
+    shift = 0
+    for page_size in page_sizes:
+        next_shift = page_size.bit_length() - 1
+        pages = collapse_repeats(pages >> np.uint64(next_shift - shift))
+        shift = next_shift
+        streams[page_size] = pages.astype(np.int64)
+    return streams
+
+
+def expand_row(row, references, cost_model):
+    # A collapsed run only dropped hits: repeats always hit in memory and in
+    # the TLB, so faults, evictions and TLB misses carry over unchanged.
+    row["references"] = references
+    row["hits"] = references - row["faults"]
+    row["fault_rate"] = row["faults"] / references if references else 0
+    row["tlb_hits"] = references - row["tlb_misses"]
+    row["tlb_hit_ratio"] = row["tlb_hits"] / references * 100 if references else 0
+    costs = cost_model.costs(
+        references, row["tlb_misses"], row["faults"], row["minor_faults"]
+    )
+    row["eat"] = costs["eat"]
+    row["total_time"] = costs["total_time"]
+    return row
+
+
+def page_size_sweep(
+    addresses,
+    algorithms=None,
+    frame_size=None,
+    memory=None,
+    page_sizes=PAGE_SIZES,
+    tlb_size=4,
+    workers=None,
+    window=1000,
+):
+    # With `memory` in bytes the frame count shrinks as pages grow;
+    # otherwise every page size gets `frame_size` frames.
+    if (frame_size is None) == (memory is None):
+        raise ValueError("Give either a frame count or a memory size")
+
+    addresses = np.asarray(addresses, dtype=np.uint64)
+    algorithms = list(algorithms or ALGORITHMS)
+    page_sizes = sorted(page_sizes)
+    workers = workers or os.cpu_count() or 1
+    streams = page_streams(addresses, page_sizes)
+
+    runners = {}
+    try:
+        tasks = []
+        for page_size in page_sizes:
+            frames = frame_size or max(1, memory // page_size)
+            for algorithm in algorithms:
+                job = Job(algorithm, frames, tlb_size, page_size)
+                if ALGORITHMS[algorithm].repeat_invariant:
+                    key = page_size
+                    if key not in runners:
+                        runners[key] = ParallelRunner(
+                            streams[page_size], workers=workers, window=window
+                        )
+                else:
+                    key = "addresses"
+                    if key not in runners:
+                        runners[key] = ParallelRunner(
+                            addresses, addresses=True, workers=workers, window=window
+                        )
+                tasks.append((runners[key], job))
+
+        rows = run_tasks(tasks, workers)
+    finally:
+        for runner in runners.values():
+            runner.close()
+
+    cost_model = CostModel()
+    for row in rows:
+        if ALGORITHMS[row["algorithm"]].repeat_invariant:
+            expand_row(row, len(addresses), cost_model)
+
+    return {
+        "rows": rows,
+        "faults": page_size_table(rows, "faults"),
+        "tlb_misses": page_size_table(rows, "tlb_misses"),
+    }
+
+
+def page_size_table(rows, field):
+    table = {}
+    for row in rows:
+        table.setdefault(row["algorithm"], {})[row["page_size"]] = row[field]
+    return table
+
+
+def format_page_size(page_size):
+    for unit, size in (("M", 1 << 20), ("K", 1 << 10)):
+        if page_size >= size and page_size % size == 0:
+            return f"{page_size // size}{unit}"
+    return str(page_size)
+
+
+def format_table(table, title):
+    page_sizes = sorted({size for row in table.values() for size in row})
+    width = max([len(title), 9] + [len(name) for name in table])
+    lines = [
+        f"{title:<{width}}"
+        + "".join(f"{format_page_size(size):>10}" for size in page_sizes)
+    ]
+    for algorithm, row in table.items():
+        lines.append(
+            f"{algorithm:<{width}}"
+            + "".join(f"{row.get(size, ''):>10}" for size in page_sizes)
+        )
+    return "\n".join(lines)
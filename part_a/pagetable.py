@@ -0,0 +1,159 @@
+from array import array
+from collections import OrderedDict
+
+
+class PageTable:
+    # A radix page table in the x86-64 style: the page number is split into
+    # one index per level, most significant first. Each node is a flat
+    # array of child node numbers (or frame numbers at the leaf level), and
+    # nodes are only allocated for the parts of the address space in use.
+    #
+    # A page-walk cache remembers the node reached through each upper
+    # level, keyed by the page-number prefix, so a walk can skip the levels
+    # it already knows. Every node read that is not skipped counts as one
+    # memory reference.
+
+    def __init__(self, levels=4, bits_per_level=9, walk_cache_size=32):
+        if isinstance(bits_per_level, int):
+            bits_per_level = [bits_per_level] * levels
+        if not 2 <= levels <= 5:
+            raise ValueError("Page tables need between 2 and 5 levels")
+        if len(bits_per_level) != levels:
+            raise ValueError("Need one index width per page table level")
+
+        self.levels = levels
+        self.bits = list(bits_per_level)
+        self.shifts = [sum(self.bits[level + 1 :]) for level in range(levels)]
+        self.masks = [(1 << bits) - 1 for bits in self.bits]
+        self.vpn_bits = sum(self.bits)
+
+        self.nodes = [self.new_node(0)]
+        self.walk_cache_size = walk_cache_size
+        # One LRU cache per upper level: prefix -> node at the next level.
+        self.walk_cache = [OrderedDict() for _ in range(levels - 1)]
+
+        self.mapped = 0
+        self.walks = 0
+        self.memory_references = 0
+        self.walk_cache_hits = 0
+        self.walk_cache_misses = 0
+
+    def new_node(self, level):
+        return array("i", [-1]) * (1 << self.bits[level])
+
+    def check(self, page_number):
+        if not 0 <= page_number < 1 << self.vpn_bits:
+            raise ValueError(
+                f"Page {page_number} is outside a {self.vpn_bits}-bit page number space"
+            )
+
+    def index(self, page_number, level):
+        return (page_number >> self.shifts[level]) & self.masks[level]
+
+    def map(self, page_number, frame_number):
+        self.check(page_number)
+        node = 0
+        for level in range(self.levels - 1):
+            entries = self.nodes[node]
+            index = self.index(page_number, level)
+            child = entries[index]
+            if child < 0:
+                child = len(self.nodes)
+                self.nodes.append(self.new_node(level + 1))
+                entries[index] = child
+            node = child
+
+        leaf = self.nodes[node]
+        index = self.index(page_number, self.levels - 1)
+        if leaf[index] < 0:
+            self.mapped += 1
+        leaf[index] = frame_number
+
+    def leaf(self, page_number):
+        node = 0
+        for level in range(self.levels - 1):
+            node = self.nodes[node][self.index(page_number, level)]
+            if node < 0:
+                return None
+        return self.nodes[node]
+
+    def unmap(self, page_number):
+        # Emptied nodes are kept, as an OS would until it reclaims them, so
+        # walk-cache entries pointing at them stay valid.
+        leaf = self.leaf(page_number)
+        if leaf is not None:
+            index = self.index(page_number, self.levels - 1)
+            if leaf[index] >= 0:
+                leaf[index] = -1
+                self.mapped -= 1
+
+    def walk(self, page_number):
+        # Returns (frame or None, memory references made).
+        self.check(page_number)
+        self.walks += 1
+        node = 0
+        start = 0
+
+        for level in range(self.levels - 2, -1, -1):
+            cache = self.walk_cache[level]
+            prefix = page_number >> self.shifts[level]
+            cached = cache.get(prefix)
+            if cached is not None:
+                cache.move_to_end(prefix)
+                self.walk_cache_hits += 1
+                node = cached
+                start = level + 1
+                break
+        else:
+            self.walk_cache_misses += 1
+
+        references = 0
+        for level in range(start, self.levels):
+            entry = self.nodes[node][self.index(page_number, level)]
+            references += 1
+            if entry < 0:
+                self.memory_references += references
+                return None, references
+            if level < self.levels - 1:
+                self.cache_node(level, page_number >> self.shifts[level], entry)
+            node = entry
+
+        self.memory_references += references
+        return node, references
+
+    def cache_node(self, level, prefix, node):
+        if not self.walk_cache_size:
+            return
+        cache = self.walk_cache[level]
+        cache[prefix] = node
+        cache.move_to_end(prefix)
+        if len(cache) > self.walk_cache_size:
+            cache.popitem(last=False)
+
+    def get(self, page_number, default=None):
+        frame_number, _ = self.walk(page_number)
+        return default if frame_number is None else frame_number
+
+    def __contains__(self, page_number):
+        leaf = self.leaf(page_number)
+        return leaf is not None and leaf[self.index(page_number, self.levels - 1)] >= 0
+
+    def __len__(self):
+        return self.mapped
+
+    def table_bytes(self):
+        return sum(len(node) * node.itemsize for node in self.nodes)
+
+    def stats(self):
+        return {
+            "levels": self.levels,
+            "walks": self.walks,
+            "walk_memory_references": self.memory_references,
+            "references_per_walk": (
+                self.memory_references / self.walks if self.walks else 0
+            ),
+            "walk_cache_hits": self.walk_cache_hits,
+            "walk_cache_misses": self.walk_cache_misses,
+            "table_nodes": len(self.nodes),
+            "table_bytes": self.table_bytes(),
+        }
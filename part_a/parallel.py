@@ -0,0 +1,209 @@
+import itertools
+import os
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+
+import numpy as np
+from policies import DEFAULT_POLICIES, POLICIES
+
+ALGORITHMS = POLICIES
+
+_attached = {}
+
+
+class Job:
+    def __init__(self, algorithm, frame_size, tlb_size=4, page_size=4096):
+        if algorithm not in ALGORITHMS:
+            raise ValueError(f"Unknown algorithm: {algorithm}")
+        self.algorithm = algorithm
+        self.frame_size = frame_size
+        self.tlb_size = tlb_size
+        self.page_size = page_size
+
+    def config(self):
+        return {
+            "algorithm": self.algorithm,
+            "frame_size": self.frame_size,
+            "tlb_size": self.tlb_size,
+            "page_size": self.page_size,
+        }
+
+
+class ParallelRunner:
+    def __init__(self, trace, addresses=False, workers=None, window=1000, writes=None):
+        trace = np.asarray(trace)
+        dtype = np.dtype(np.uint64 if addresses else np.int64)
+        self.length = len(trace)
+        self.dtype = dtype.str
+        self.addresses = addresses
+        self.workers = workers or os.cpu_count() or 1
+        self.window = window
+
+        # Workers attach to this block by name, so the trace is never pickled.
+        self.shared = shared_memory.SharedMemory(
+            create=True, size=max(self.length * dtype.itemsize, 1)
+        )
+        np.ndarray((self.length,), dtype=dtype, buffer=self.shared.buf)[:] = trace
+
+        # Write flags, when the trace has them, get a block of their own.
+        self.shared_writes = None
+        if writes is not None:
+            self.shared_writes = shared_memory.SharedMemory(
+                create=True, size=max(self.length, 1)
+            )
+            self.writes()[:] = writes
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, traceback):
+        self.close()
+
+    def close(self):
+        if self.shared is not None:
+            self.shared.close()
+            self.shared.unlink()
+            self.shared = None
+        if self.shared_writes is not None:
+            self.shared_writes.close()
+            self.shared_writes.unlink()
+            self.shared_writes = None
+
+    def values(self):
+        return np.ndarray((self.length,), dtype=self.dtype, buffer=self.shared.buf)
+
+    def writes(self):
+        if self.shared_writes is None:
+            return None
+        return np.ndarray((self.length,), dtype=bool, buffer=self.shared_writes.buf)
+
+    def trace(self):
+        writes = self.shared_writes.name if self.shared_writes is not None else None
+        return (
+            self.shared.name,
+            self.length,
+            self.dtype,
+            self.addresses,
+            self.window,
+            writes,
+        )
+
+    def run(self, jobs):
+        return run_tasks([(self, job) for job in jobs], self.workers)
+
+    def sweep(self, algorithms, frame_sizes, tlb_sizes=(4,), page_sizes=(4096,)):
+        jobs = [
+            Job(algorithm, frame_size, tlb_size, page_size)
+            for algorithm, frame_size, tlb_size, page_size in itertools.product(
+                algorithms, frame_sizes, tlb_sizes, page_sizes
+            )
+        ]
+        return self.run(jobs)
+
+    def simulate_all(self, frame_size, tlb_size=4, page_size=4096, algorithms=None):
+        rows = self.run(
+            [
+                Job(algorithm, frame_size, tlb_size, page_size)
+                for algorithm in algorithms or DEFAULT_POLICIES
+            ]
+        )
+        return {row["algorithm"]: row for row in rows}
+
+
+def run_tasks(tasks, workers):
+    # Runs (runner, job) pairs, possibly against different shared traces,
+    # in one pool; results come back in task order.
+    if workers == 1 or len(tasks) <= 1:
+        return [
+            simulate_job(
+                runner.values(), runner.addresses, runner.window, job, runner.writes()
+            )
+            for runner, job in tasks
+        ]
+
+    with ProcessPoolExecutor(max_workers=min(workers, len(tasks))) as pool:
+        return list(
+            pool.map(
+                run_job,
+                [runner.trace() for runner, _ in tasks],
+                [job for _, job in tasks],
+            )
+        )
+
+
+def attach(name, length, dtype):
+    if name not in _attached:
+        shared = shared_memory.SharedMemory(name=name)
+        _attached[name] = (
+            shared,
+            np.ndarray((length,), dtype=np.dtype(dtype), buffer=shared.buf),
+        )
+    return _attached[name][1]
+
+
+def trace_pages(trace, page_size, addresses, chunk_size=1 << 16):
+    shift = page_size.bit_length() - 1
+    for start in range(0, len(trace), chunk_size):
+        chunk = trace[start : start + chunk_size]
+        if addresses:
+            if page_size & (page_size - 1) == 0:
+                chunk = chunk >> shift
+            else:
+                chunk = chunk // page_size
+        yield from chunk.tolist()
+
+
+def run_job(trace, job):
+    name, length, dtype, addresses, window, writes = trace
+    if writes is not None:
+        writes = attach(writes, length, "|b1")
+    return simulate_job(attach(name, length, dtype), addresses, window, job, writes)
+
+
+def simulate_job(values, addresses, window, job, writes=None):
+    from simulator import Simulator
+
+    simulator = Simulator()
+    simulator.tlb_size = job.tlb_size
+    simulator.page_size = job.page_size
+    faults, summary = simulator.run_policy(
+        ALGORITHMS[job.algorithm](),
+        trace_pages(values, job.page_size, addresses),
+        job.frame_size,
+        summary=True,
+        window=window,
+        writes=writes,
+    )
+
+    row = summary_row(job.config(), faults, summary)
+    if writes is not None:
+        io_row(row, summary)
+    return row
+
+
+def summary_row(row, faults, summary):
+    row.update(
+        {
+            "references": summary["references"],
+            "faults": faults,
+            "hits": summary["hits"],
+            "evictions": summary["evictions"],
+            "fault_rate": faults / summary["references"] if summary["references"] else 0,
+            "tlb_hits": summary["tlb_hits"],
+            "tlb_misses": summary["tlb_misses"],
+            "tlb_hit_ratio": summary["tlb"].get_hit_ratio(),
+            "minor_faults": summary["costs"]["minor_faults"],
+            "major_faults": summary["costs"]["major_faults"],
+            "eat": summary["costs"]["eat"],
+            "total_time": summary["costs"]["total_time"],
+        }
+    )
+    return row
+
+
+def io_row(row, summary):
+    io = summary["io"]
+    row["clean_evictions"] = io["clean_evictions"]
+    row["dirty_evictions"] = io["dirty_evictions"]
+    row["writeback_bytes"] = io["writeback_bytes"]
+    return row
@@ -0,0 +1,160 @@
+import os
+import sys
+import tempfile
+
+# Only imported when a graph is drawn: matplotlib takes longer to import
+# than most simulations take to run.
+
+
+def headless():
+    if sys.platform.startswith("linux"):
+        return not (os.environ.get("DISPLAY") or os.environ.get("WAYLAND_DISPLAY"))
+    return False
+
+
+def pyplot():
+    import matplotlib
+
+    # Without a display an interactive backend cannot start; Agg can still
+    # render to files. An explicit MPLBACKEND always wins.
+    if "MPLBACKEND" not in os.environ and headless():
+        matplotlib.use("Agg")
+    import matplotlib.pyplot as plt
+
+    return plt
+
+
+def interactive(plt):
+    from matplotlib.backends import BackendFilter, backend_registry
+
+    return plt.get_backend().lower() not in backend_registry.list_builtin(
+        BackendFilter.NON_INTERACTIVE
+    )
+
+
+def comparison_figure(results, curves=None, resident=None, plt=None):
+    # With plt the figure belongs to pyplot and can be shown; without it
+    # the figure is standalone and can only be saved, which needs no
+    # backend at all.
+    from matplotlib import colormaps
+
+    curves = list(curves.values()) if isinstance(curves, dict) else curves
+    resident = resident or {}
+    costs = {
+        alg: data["costs"] for alg, data in (results or {}).items() if data.get("costs")
+    }
+
+    panels = (
+        (2 if results else 0)
+        + (1 if costs else 0)
+        + (1 if curves else 0)
+        + (1 if resident else 0)
+    )
+    if not panels:
+        raise ValueError("Nothing to plot: no results, curves or resident sizes")
+    if plt is not None:
+        fig, axes = plt.subplots(1, panels, figsize=(6 * panels, 5), squeeze=False)
+    else:
+        from matplotlib.figure import Figure
+
+        fig = Figure(figsize=(6 * panels, 5))
+        axes = fig.subplots(1, panels, squeeze=False)
+    axes = iter(axes[0])
+
+    # One color per algorithm name, shared by the bars and the curves.
+    names = list(results or ())
+    names += [curve.name for curve in curves or () if curve.name not in names]
+    names += [name for name in resident if name not in names]
+    palette = colormaps["tab20" if len(names) > 10 else "tab10"].colors
+    colors = {name: palette[i % len(palette)] for i, name in enumerate(names)}
+
+    if results:
+        algorithms = list(results.keys())
+        bar_colors = [colors[alg] for alg in algorithms]
+        page_faults = [results[alg]["faults"] for alg in algorithms]
+        tlb_hit_ratios = [
+            results[alg]["tlb"].get_hit_ratio() if results[alg]["tlb"] is not None else 0
+            for alg in algorithms
+        ]
+        ax1, ax2 = next(axes), next(axes)
+
+        ax1.bar(algorithms, page_faults, color=bar_colors)
+        ax1.set_title("Page Faults Comparison")
+        ax1.set_ylabel("Number of Page Faults")
+        ax1.tick_params(axis="x", labelrotation=45)
+
+        ax2.bar(algorithms, tlb_hit_ratios, color=bar_colors)
+        ax2.set_title("TLB Hit Ratio Comparison")
+        ax2.set_ylabel("TLB Hit Ratio (%)")
+        ax2.set_ylim(0, 100)
+        ax2.tick_params(axis="x", labelrotation=45)
+
+    if costs:
+        ax5 = next(axes)
+        ax5.bar(
+            list(costs),
+            [cost["eat"] for cost in costs.values()],
+            color=[colors[alg] for alg in costs],
+        )
+        ax5.set_title("Effective Access Time")
+        ax5.set_ylabel("EAT (ns)")
+        ax5.tick_params(axis="x", labelrotation=45)
+
+    if curves:
+        ax3 = next(axes)
+        for curve in curves:
+            ax3.plot(
+                curve.frame_sizes(),
+                curve.faults,
+                label=curve.name,
+                color=colors[curve.name],
+            )
+        ax3.set_title("Page Faults by Frame Size")
+        ax3.set_xlabel("Frame Size")
+        ax3.set_ylabel("Number of Page Faults")
+        ax3.legend()
+
+    if resident:
+        ax4 = next(axes)
+        # A window mean is drawn at the reference that closes its window.
+        for alg_name, (sizes, every) in resident.items():
+            ax4.step(
+                range(every, every * len(sizes) + 1, every),
+                sizes,
+                label=alg_name,
+                color=colors[alg_name],
+            )
+        ax4.set_title("Resident Set Size")
+        ax4.set_xlabel("Reference")
+        ax4.set_ylabel("Frames in Use")
+        ax4.legend()
+
+    fig.tight_layout()
+    return fig
+
+
+def save_comparison(path, results, curves=None, resident=None):
+    comparison_figure(results, curves, resident).savefig(path)
+
+
+def show_comparison(results, curves=None, resident=None, path=None):
+    # Without a display the graph goes to `path`, or to a new temporary
+    # file rather than a fixed name that could overwrite someone's file.
+    plt = pyplot()
+    if not interactive(plt):
+        if path is None:
+            descriptor, path = tempfile.mkstemp(prefix="comparison-", suffix=".png")
+            os.close(descriptor)
+        save_comparison(path, results, curves, resident)
+        print(f"No display available; graph saved to {os.path.abspath(path)}")
+        return path
+
+    fig = comparison_figure(results, curves, resident, plt)
+    print("Graph displayed. Press Enter in terminal to close...")
+    plt.show(block=False)
+
+    input()
+    plt.close(fig)
+    plt.close("all")
+    plt.clf()
+    plt.cla()
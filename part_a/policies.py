@@ -0,0 +1,1034 @@
+import heapq
+from array import array
+from collections import OrderedDict, defaultdict
+
+from mrc import next_use_index
+from sketch import CountMinSketch
+
+NEVER = float("inf")
+
+
+class ReplacementPolicy:
+    # Policies only track their own bookkeeping. The engine owns the frames,
+    # the page table and the TLB, and calls on_hit / on_fault for every
+    # reference and choose_victim when a fault finds memory full. on_miss
+    # runs first on every fault, for policies whose victim depends on the
+    # page coming in.
+    name = None
+    needs_future = False
+    # How the step log shows the frames: "slots" in frame order, or "queue"
+    # oldest first. Queue policies that reorder on a hit (LRU) get a change
+    # recorded for the hit page as well.
+    layout = "slots"
+    reorders_on_hit = False
+    # Repeat-invariant policies end up in the same state whether a page is
+    # referenced once or several times in a row, so runs of one page can be
+    # collapsed before simulating them.
+    repeat_invariant = False
+    # Variable-allocation policies treat frame_size as the memory available
+    # and give frames back through release(), called after every reference.
+    variable = False
+    # The engine's per-frame dirty bytes, set before reset(); None when the
+    # policy runs outside the engine.
+    dirty = None
+
+    def reset(self, frame_size, slots):
+        self.frame_size = frame_size
+        self.slots = slots
+
+    def prepare(self, reference_string):
+        pass
+
+    def on_hit(self, page, frame, t):
+        pass
+
+    def on_miss(self, page, t):
+        pass
+
+    def on_fault(self, page, frame, t):
+        pass
+
+    def choose_victim(self, t):
+        raise NotImplementedError
+
+    def on_clean(self, frame):
+        # The engine wrote `frame` back outside of a fault and cleared its
+        # dirty byte.
+        pass
+
+    def release(self, t):
+        return ()
+
+    def step_extra(self):
+        return None
+
+    def stats(self):
+        return {}
+
+
+class FIFOPolicy(ReplacementPolicy):
+    name = "FIFO"
+    repeat_invariant = True
+    layout = "queue"
+
+    def reset(self, frame_size, slots):
+        super().reset(frame_size, slots)
+        # Frames fill in order and are reused round-robin, so the oldest
+        # page always sits at `head`.
+        self.head = 0
+
+    def choose_victim(self, t):
+        victim = self.slots[self.head]
+        self.head = (self.head + 1) % self.frame_size
+        return victim
+
+
+class LRUPolicy(ReplacementPolicy):
+    name = "LRU"
+    repeat_invariant = True
+    layout = "queue"
+    reorders_on_hit = True
+
+    def reset(self, frame_size, slots):
+        super().reset(frame_size, slots)
+        self.order = OrderedDict()
+
+    def on_hit(self, page, frame, t):
+        self.order.move_to_end(page)
+
+    def on_fault(self, page, frame, t):
+        self.order[page] = frame
+
+    def choose_victim(self, t):
+        return self.order.popitem(last=False)[0]
+
+
+class OptimalPolicy(ReplacementPolicy):
+    name = "Optimal"
+    repeat_invariant = True
+    needs_future = True
+
+    def reset(self, frame_size, slots):
+        super().reset(frame_size, slots)
+        self.next_use = None
+        self.upcoming = {}
+        self.heap = []
+
+    def prepare(self, reference_string):
+        self.next_use = next_use_index(reference_string)
+
+    def on_hit(self, page, frame, t):
+        self.push(page, frame, t)
+
+    def on_fault(self, page, frame, t):
+        self.push(page, frame, t)
+
+    def push(self, page, frame, t):
+        # Max-heap on next use, ties broken by the lowest frame. Entries go
+        # stale when a page is hit again or evicted and are skipped lazily.
+        self.upcoming[page] = self.next_use[t]
+        if len(self.heap) > 2 * self.frame_size + 64:
+            self.heap = [
+                (-self.upcoming[resident], slot, resident)
+                for slot, resident in enumerate(self.slots)
+                if resident is not None
+            ]
+            heapq.heapify(self.heap)
+        else:
+            heapq.heappush(self.heap, (-self.next_use[t], frame, page))
+
+    def choose_victim(self, t):
+        while True:
+            farthest, frame, page = heapq.heappop(self.heap)
+            if self.slots[frame] == page and self.upcoming[page] == -farthest:
+                del self.upcoming[page]
+                return page
+
+
+class CustomPolicy(ReplacementPolicy):
+    name = "Custom"
+
+    def reset(self, frame_size, slots):
+        super().reset(frame_size, slots)
+        self.frequency = defaultdict(int)
+        self.access_time = [0] * frame_size
+        # Scores (t - access time) / frequency all grow with time, each at
+        # its own rate, so no fixed heap order lasts. Instead a tournament
+        # tree over the frames keeps the highest-scoring frame of every
+        # subtree together with the first time that may change: the time
+        # the loser's score overtakes the winner's, or an earlier expiry
+        # below. Nodes are replayed when that time comes.
+        #
+        # A hit only lowers a page's score, so hits leave the tree alone:
+        # its leaves keep the (access time, frequency) they were last
+        # entered with, and a stale frame is re-entered only when it comes
+        # out on top.
+        size = 2
+        while size < frame_size:
+            size *= 2
+        self.size = size
+        self.winners = [-1] * (2 * size)
+        self.expires = [NEVER] * (2 * size)
+        self.entered_times = [0] * frame_size
+        self.entered_frequencies = [0] * frame_size
+
+    def on_hit(self, page, frame, t):
+        self.frequency[page] += 1
+        self.access_time[frame] = t
+
+    def on_fault(self, page, frame, t):
+        self.on_hit(page, frame, t)
+        self.enter(frame, t)
+
+    def enter(self, frame, t):
+        self.entered_times[frame] = self.access_time[frame]
+        self.entered_frequencies[frame] = self.frequency[self.slots[frame]]
+        node = self.size + frame
+        self.winners[node] = frame
+        # Replay the path up until a node comes out as it was, with a winner
+        # other than this frame; nothing above it has changed.
+        node >>= 1
+        while node and (self.replay(node, t) or self.winners[node] == frame):
+            node >>= 1
+
+    def settle(self, node, t):
+        expires = self.expires
+        left = 2 * node
+        if left < self.size:
+            if expires[left] <= t:
+                self.settle(left, t)
+            if expires[left + 1] <= t:
+                self.settle(left + 1, t)
+        self.replay(node, t)
+
+    def replay(self, node, t):
+        winners = self.winners
+        expires = self.expires
+        left = 2 * node
+        first = winners[left]
+        second = winners[left + 1]
+        if second < 0:
+            winner, change = first, NEVER
+        elif first < 0:
+            winner, change = second, NEVER
+        else:
+            # The left frame is the lower one and wins ties. It wins while
+            # slope * t + offset >= 0, a line that crosses zero at most once.
+            first_frequency = self.entered_frequencies[first]
+            second_frequency = self.entered_frequencies[second]
+            slope = second_frequency - first_frequency
+            offset = (
+                self.entered_times[second] * first_frequency
+                - self.entered_times[first] * second_frequency
+            )
+            if slope * t + offset >= 0:
+                winner = first
+                change = offset // -slope + 1 if slope < 0 else NEVER
+            else:
+                winner = second
+                change = -(offset // slope) if slope > 0 else NEVER
+        if expires[left] < change:
+            change = expires[left]
+        if expires[left + 1] < change:
+            change = expires[left + 1]
+        if winners[node] == winner and expires[node] == change:
+            return False
+        winners[node] = winner
+        expires[node] = change
+        return True
+
+    def choose_victim(self, t):
+        # Stale leaves only overstate a score, so a winner that is up to
+        # date beats every other frame. The engine reuses the victim's frame
+        # right away, and on_fault then re-enters it.
+        while True:
+            if self.expires[1] <= t:
+                self.settle(1, t)
+            frame = self.winners[1]
+            if self.entered_times[frame] == self.access_time[frame]:
+                return self.slots[frame]
+            self.enter(frame, t)
+
+
+class ClockPolicy(ReplacementPolicy):
+    name = "Clock"
+    repeat_invariant = True
+
+    def reset(self, frame_size, slots):
+        super().reset(frame_size, slots)
+        # One byte per frame so runs of set bits can be found and cleared
+        # with bytearray.find and slice assignment instead of a Python loop.
+        self.reference_bits = bytearray(frame_size)
+        self.clock_hand = 0
+        self.hand_sweep = 0
+        self.total_sweep = 0
+        self.max_sweep = 0
+        self.sweeps = 0
+
+    def on_hit(self, page, frame, t):
+        self.reference_bits[frame] = 1
+        self.hand_sweep = 0
+
+    def on_fault(self, page, frame, t):
+        self.reference_bits[frame] = 1
+
+    def choose_victim(self, t):
+        bits = self.reference_bits
+        hand = self.clock_hand
+        victim = bits.find(0, hand)
+
+        if victim >= 0:
+            bits[hand:victim] = bytes(victim - hand)
+            sweep = victim - hand
+        else:
+            bits[hand:] = bytes(self.frame_size - hand)
+            victim = bits.find(0, 0, hand)
+            if victim >= 0:
+                bits[:victim] = bytes(victim)
+            else:
+                # Every bit was set: a full turn clears them all and the
+                # hand comes back to where it started.
+                bits[:hand] = bytes(hand)
+                victim = hand
+            sweep = self.frame_size - hand + victim
+
+        self.record_sweep(sweep)
+        self.clock_hand = (victim + 1) % self.frame_size
+        return self.slots[victim]
+
+    def record_sweep(self, sweep):
+        self.hand_sweep = sweep
+        self.total_sweep += sweep
+        self.max_sweep = max(self.max_sweep, sweep)
+        self.sweeps += 1
+
+    def step_extra(self):
+        return {"clock_hand": self.clock_hand, "hand_sweep": self.hand_sweep}
+
+    def stats(self):
+        return {
+            "hand_sweeps": self.total_sweep,
+            "max_hand_sweep": self.max_sweep,
+            "mean_hand_sweep": self.total_sweep / self.sweeps if self.sweeps else 0,
+        }
+
+
+class TwoHandedClockPolicy(ClockPolicy):
+    name = "Clock2"
+
+    def __init__(self, hand_spread=None):
+        self.hand_spread = hand_spread
+
+    def reset(self, frame_size, slots):
+        super().reset(frame_size, slots)
+        spread = self.hand_spread or frame_size // 4
+        self.spread = min(max(spread, 1), max(frame_size - 1, 1))
+
+    def wrapped(self, start, length):
+        end = start + length
+        if end <= self.frame_size:
+            return [(start, end)]
+        return [(start, self.frame_size), (0, end - self.frame_size)]
+
+    def choose_victim(self, t):
+        # The front hand runs `spread` frames ahead clearing reference bits;
+        # the back hand takes the first frame whose bit is still clear. The
+        # back hand never gets further than `spread` frames, because
+        # everything past that was just cleared by the front hand.
+        bits = self.reference_bits
+        back = self.clock_hand
+        front = (back + self.spread) % self.frame_size
+
+        sweep = self.spread
+        offset = 0
+        for start, end in self.wrapped(back, self.spread):
+            victim = bits.find(0, start, end)
+            if victim >= 0:
+                sweep = offset + victim - start
+                break
+            offset += end - start
+
+        for start, end in self.wrapped(front, sweep + 1):
+            bits[start:end] = bytes(end - start)
+
+        victim = (back + sweep) % self.frame_size
+        self.record_sweep(sweep)
+        self.clock_hand = (victim + 1) % self.frame_size
+        return self.slots[victim]
+
+
+class EnhancedSecondChancePolicy(ClockPolicy):
+    # Clock over (referenced, dirty) classes: the hand prefers a page that
+    # is neither referenced nor dirty, so clean pages go before pages that
+    # would need a write-back. Each frame's class, referenced << 1 | dirty,
+    # is one byte kept up to date as pages are referenced and cleaned, so
+    # the hand finds a class with bytearray.find.
+    name = "ESC"
+    # bytes.translate table taking every class to its unreferenced one.
+    UNREFERENCED = bytes([0, 1, 0, 1]) + bytes(range(4, 256))
+
+    def reset(self, frame_size, slots):
+        super().reset(frame_size, slots)
+        self.classes = bytearray(frame_size)
+
+    def on_hit(self, page, frame, t):
+        super().on_hit(page, frame, t)
+        if self.dirty is not None:
+            self.classes[frame] = 2 | self.dirty[frame]
+
+    def on_fault(self, page, frame, t):
+        super().on_fault(page, frame, t)
+        if self.dirty is not None:
+            self.classes[frame] = 2 | self.dirty[frame]
+
+    def on_clean(self, frame):
+        self.classes[frame] &= 2
+
+    def find(self, value, start):
+        frame = self.classes.find(value, start)
+        if frame < 0:
+            frame = self.classes.find(value, 0, start)
+        return frame
+
+    def clear(self, start, end):
+        classes = self.classes
+        if end >= start:
+            classes[start:end] = classes[start:end].translate(self.UNREFERENCED)
+        else:
+            classes[start:] = classes[start:].translate(self.UNREFERENCED)
+            classes[:end] = classes[:end].translate(self.UNREFERENCED)
+
+    def choose_victim(self, t):
+        if self.dirty is None:
+            return super().choose_victim(t)
+
+        # Pass 1 looks for (0, 0) without touching any bits. Pass 2 takes
+        # the first unreferenced page, which must be dirty, clearing the
+        # reference bits it passes. If every page was referenced, pass 2
+        # clears them all and pass 1 runs again.
+        frame_size = self.frame_size
+        hand = self.clock_hand
+
+        victim = self.find(0, hand)
+        if victim >= 0:
+            sweep = (victim - hand) % frame_size
+        else:
+            victim = self.find(1, hand)
+            if victim >= 0:
+                self.clear(hand, victim)
+                sweep = frame_size + (victim - hand) % frame_size
+            else:
+                self.classes[:] = self.classes.translate(self.UNREFERENCED)
+                victim = self.find(0, hand)
+                if victim < 0:
+                    victim = hand
+                sweep = 2 * frame_size + (victim - hand) % frame_size
+
+        self.record_sweep(sweep)
+        self.clock_hand = (victim + 1) % frame_size
+        return self.slots[victim]
+
+
+class ClockProPolicy(ReplacementPolicy):
+    name = "ClockPro"
+
+    REFERENCED = 1
+    HOT = 2
+    TEST = 4
+    RESIDENT = 8
+
+    def reset(self, frame_size, slots):
+        super().reset(frame_size, slots)
+        # Resident pages and non-resident pages still in their test period
+        # share one circular list. Nodes live in flat arrays: flag bits in a
+        # bytearray and the links in two integer arrays, with at most
+        # frame_size nodes of each kind.
+        capacity = 2 * frame_size + 1
+        self.flags = bytearray(capacity)
+        self.next_node = array("l", [-1]) * capacity
+        self.prev_node = array("l", [-1]) * capacity
+        self.node_page = [None] * capacity
+        self.free_nodes = list(range(capacity - 1, -1, -1))
+        self.node_of = {}
+
+        self.hand_hot = -1
+        self.hand_cold = -1
+        self.hand_test = -1
+
+        self.cold_target = min(max(frame_size // 2, 1), frame_size)
+        self.hot_count = 0
+        self.cold_count = 0
+        self.test_count = 0
+        self.loaded = 0
+
+    def link(self, node):
+        # New and promoted pages go to the list head, just behind HAND_hot.
+        if self.hand_hot < 0:
+            self.next_node[node] = node
+            self.prev_node[node] = node
+            self.hand_hot = self.hand_cold = self.hand_test = node
+            return
+        head = self.hand_hot
+        tail = self.prev_node[head]
+        self.next_node[tail] = node
+        self.prev_node[node] = tail
+        self.next_node[node] = head
+        self.prev_node[head] = node
+
+    def unlink(self, node):
+        following = self.next_node[node]
+        if following == node:
+            following = -1
+        else:
+            preceding = self.prev_node[node]
+            self.next_node[preceding] = following
+            self.prev_node[following] = preceding
+
+        if self.hand_hot == node:
+            self.hand_hot = following
+        if self.hand_cold == node:
+            self.hand_cold = following
+        if self.hand_test == node:
+            self.hand_test = following
+
+    def move_to_head(self, node):
+        self.unlink(node)
+        self.link(node)
+
+    def new_node(self, page, flags):
+        node = self.free_nodes.pop()
+        self.flags[node] = flags
+        self.node_page[node] = page
+        self.node_of[page] = node
+        self.link(node)
+        return node
+
+    def drop_node(self, node):
+        self.unlink(node)
+        del self.node_of[self.node_page[node]]
+        self.node_page[node] = None
+        self.flags[node] = 0
+        self.free_nodes.append(node)
+
+    def end_test(self, node):
+        # A test period that runs out without a re-reference means cold
+        # pages are not earning their space.
+        self.flags[node] &= ~self.TEST
+        self.cold_target = max(self.cold_target - 1, 1)
+        if not self.flags[node] & self.RESIDENT:
+            self.test_count -= 1
+            self.drop_node(node)
+
+    def on_hit(self, page, frame, t):
+        self.flags[self.node_of[page]] |= self.REFERENCED
+
+    def on_fault(self, page, frame, t):
+        self.loaded = min(self.loaded + 1, self.frame_size)
+        node = self.node_of.get(page)
+
+        if node is not None:
+            # Re-referenced during its test period: the page's reuse
+            # distance beats the hot pages, so give cold pages more room
+            # and bring it back as hot.
+            self.test_count -= 1
+            self.cold_target = min(self.cold_target + 1, self.frame_size)
+            self.flags[node] = self.HOT | self.RESIDENT
+            self.hot_count += 1
+            self.move_to_head(node)
+            self.balance_hot()
+        elif self.loaded < self.frame_size and self.hot_count < self.hot_target():
+            self.new_node(page, self.HOT | self.RESIDENT)
+            self.hot_count += 1
+        else:
+            self.new_node(page, self.TEST | self.RESIDENT)
+            self.cold_count += 1
+
+        while self.test_count > self.frame_size:
+            self.run_hand_test()
+
+    def hot_target(self):
+        return self.frame_size - self.cold_target
+
+    def balance_hot(self):
+        while self.hot_count > max(self.hot_target(), 0) and self.hot_count > 0:
+            self.run_hand_hot()
+
+    def choose_victim(self, t):
+        if self.cold_count == 0:
+            self.run_hand_hot()
+
+        while True:
+            node = self.hand_cold
+            following = self.next_node[node]
+            flags = self.flags[node]
+
+            if flags & self.HOT or not flags & self.RESIDENT:
+                self.hand_cold = following
+                continue
+
+            if flags & self.REFERENCED:
+                if flags & self.TEST:
+                    self.flags[node] = self.HOT | self.RESIDENT
+                    self.cold_count -= 1
+                    self.hot_count += 1
+                    self.move_to_head(node)
+                    self.balance_hot()
+                else:
+                    self.flags[node] = self.TEST | self.RESIDENT
+                    self.move_to_head(node)
+                if self.cold_count == 0:
+                    self.run_hand_hot()
+                continue
+
+            page = self.node_page[node]
+            self.hand_cold = following
+            self.cold_count -= 1
+            if flags & self.TEST:
+                # Keep the evicted page's metadata until its test ends.
+                self.flags[node] = self.TEST
+                self.test_count += 1
+            else:
+                self.drop_node(node)
+            return page
+
+    def run_hand_hot(self):
+        while True:
+            node = self.hand_hot
+            following = self.next_node[node]
+            flags = self.flags[node]
+
+            if flags & self.HOT:
+                self.hand_hot = following
+                if flags & self.REFERENCED:
+                    self.flags[node] = flags & ~self.REFERENCED
+                    continue
+                self.flags[node] = self.RESIDENT
+                self.hot_count -= 1
+                self.cold_count += 1
+                return
+
+            self.hand_hot = following
+            if flags & self.TEST:
+                self.end_test(node)
+
+    def run_hand_test(self):
+        while True:
+            node = self.hand_test
+            following = self.next_node[node]
+            flags = self.flags[node]
+            self.hand_test = following
+
+            if flags & self.HOT or not flags & self.TEST:
+                continue
+            resident = flags & self.RESIDENT
+            self.end_test(node)
+            if not resident:
+                return
+
+    def stats(self):
+        return {
+            "hot_pages": self.hot_count,
+            "cold_pages": self.cold_count,
+            "test_pages": self.test_count,
+            "cold_target": self.cold_target,
+        }
+
+
+class ARCPolicy(ReplacementPolicy):
+    name = "ARC"
+
+    def reset(self, frame_size, slots):
+        super().reset(frame_size, slots)
+        # T1 / T2 hold resident pages seen once / more than once, B1 / B2
+        # the pages recently evicted from each. `target` is the adaptive
+        # share of memory given to T1.
+        self.t1 = OrderedDict()
+        self.t2 = OrderedDict()
+        self.b1 = OrderedDict()
+        self.b2 = OrderedDict()
+        self.target = 0
+        self.ghost_hit = None
+        self.drop_recent = False
+
+    def on_hit(self, page, frame, t):
+        if page in self.t1:
+            del self.t1[page]
+            self.t2[page] = frame
+        else:
+            self.t2.move_to_end(page)
+
+    def on_miss(self, page, t):
+        c = self.frame_size
+        self.drop_recent = False
+
+        if page in self.b1:
+            self.target = min(c, self.target + max(len(self.b2) / len(self.b1), 1))
+            del self.b1[page]
+            self.ghost_hit = self.b1
+        elif page in self.b2:
+            self.target = max(0, self.target - max(len(self.b1) / len(self.b2), 1))
+            del self.b2[page]
+            self.ghost_hit = self.b2
+        else:
+            self.ghost_hit = None
+            recent = len(self.t1) + len(self.b1)
+            if recent == c:
+                if len(self.t1) < c:
+                    self.b1.popitem(last=False)
+                else:
+                    self.drop_recent = True
+            elif recent < c:
+                total = recent + len(self.t2) + len(self.b2)
+                if total >= 2 * c:
+                    self.b2.popitem(last=False)
+
+    def on_fault(self, page, frame, t):
+        if self.ghost_hit is None:
+            self.t1[page] = frame
+        else:
+            self.t2[page] = frame
+
+    def choose_victim(self, t):
+        if self.drop_recent:
+            return self.t1.popitem(last=False)[0]
+
+        if self.t1 and (
+            len(self.t1) > self.target
+            or (self.ghost_hit is self.b2 and len(self.t1) == self.target)
+        ):
+            victim = self.t1.popitem(last=False)[0]
+            self.b1[victim] = None
+        else:
+            victim = self.t2.popitem(last=False)[0]
+            self.b2[victim] = None
+        return victim
+
+    def step_extra(self):
+        return {"target": int(self.target)}
+
+
+class TwoQueuePolicy(ReplacementPolicy):
+    name = "2Q"
+    repeat_invariant = True
+
+    def __init__(self, in_fraction=0.25, out_fraction=0.5):
+        self.in_fraction = in_fraction
+        self.out_fraction = out_fraction
+
+    def reset(self, frame_size, slots):
+        super().reset(frame_size, slots)
+        # First-time pages wait in the FIFO `a1_in`; only pages referenced
+        # again after leaving it (still remembered in `a1_out`) reach the
+        # LRU queue `am`, so one pass over many pages cannot flush `am`.
+        self.a1_in = OrderedDict()
+        self.a1_out = OrderedDict()
+        self.am = OrderedDict()
+        self.in_size = max(1, int(frame_size * self.in_fraction))
+        self.out_size = max(1, int(frame_size * self.out_fraction))
+        self.promote = False
+
+    def on_hit(self, page, frame, t):
+        if page in self.am:
+            self.am.move_to_end(page)
+
+    def on_miss(self, page, t):
+        self.promote = page in self.a1_out
+        if self.promote:
+            del self.a1_out[page]
+
+    def on_fault(self, page, frame, t):
+        if self.promote:
+            self.am[page] = frame
+        else:
+            self.a1_in[page] = frame
+
+    def choose_victim(self, t):
+        if len(self.a1_in) > self.in_size or not self.am:
+            victim = self.a1_in.popitem(last=False)[0]
+            self.a1_out[victim] = None
+            if len(self.a1_out) > self.out_size:
+                self.a1_out.popitem(last=False)
+            return victim
+        return self.am.popitem(last=False)[0]
+
+
+class LIRSPolicy(ReplacementPolicy):
+    name = "LIRS"
+
+    LIR = 0
+    HIR = 1
+    GHOST = 2
+
+    def __init__(self, hir_fraction=0.01):
+        self.hir_fraction = hir_fraction
+
+    def reset(self, frame_size, slots):
+        super().reset(frame_size, slots)
+        # `stack` orders pages by recency, with an LIR page always at the
+        # bottom; `queue` holds the resident HIR pages, next victim first.
+        # Non-resident HIR pages stay in the stack to measure their reuse
+        # distance, capped at frame_size of them.
+        self.hir_size = max(1, int(frame_size * self.hir_fraction))
+        self.lir_size = frame_size - self.hir_size
+        self.status = {}
+        self.stack = OrderedDict()
+        self.queue = OrderedDict()
+        self.ghosts = OrderedDict()
+        self.lir_count = 0
+
+    def prune(self):
+        stack = self.stack
+        status = self.status
+        while stack:
+            page = next(iter(stack))
+            if status[page] == self.LIR:
+                break
+            del stack[page]
+            if status[page] == self.GHOST:
+                del status[page]
+                del self.ghosts[page]
+
+    def make_lir(self, page):
+        self.status[page] = self.LIR
+        self.lir_count += 1
+        if self.lir_count > self.lir_size:
+            self.prune()
+            bottom = next(iter(self.stack))
+            self.status[bottom] = self.HIR
+            self.lir_count -= 1
+            del self.stack[bottom]
+            self.queue[bottom] = None
+            self.prune()
+
+    def touch(self, page):
+        self.stack.pop(page, None)
+        self.stack[page] = None
+
+    def on_hit(self, page, frame, t):
+        if self.status[page] == self.LIR:
+            bottom = next(iter(self.stack)) == page
+            self.touch(page)
+            if bottom:
+                self.prune()
+        elif page in self.stack:
+            del self.queue[page]
+            self.touch(page)
+            self.make_lir(page)
+        else:
+            self.touch(page)
+            self.queue.move_to_end(page)
+
+    def on_fault(self, page, frame, t):
+        if self.status.get(page) == self.GHOST:
+            del self.ghosts[page]
+            self.touch(page)
+            self.make_lir(page)
+        elif self.lir_count < self.lir_size:
+            self.touch(page)
+            self.make_lir(page)
+        else:
+            self.status[page] = self.HIR
+            self.touch(page)
+            self.queue[page] = None
+
+        while len(self.ghosts) > self.frame_size:
+            ghost = self.ghosts.popitem(last=False)[0]
+            del self.stack[ghost]
+            del self.status[ghost]
+
+    def choose_victim(self, t):
+        victim = self.queue.popitem(last=False)[0]
+        if victim in self.stack:
+            self.status[victim] = self.GHOST
+            self.ghosts[victim] = None
+        else:
+            del self.status[victim]
+        return victim
+
+
+class WTinyLFUPolicy(ReplacementPolicy):
+    name = "W-TinyLFU"
+
+    def __init__(self, window_fraction=0.01, protected_fraction=0.8):
+        self.window_fraction = window_fraction
+        self.protected_fraction = protected_fraction
+
+    def reset(self, frame_size, slots):
+        super().reset(frame_size, slots)
+        # New pages enter a small LRU window. A page pushed out of the window
+        # only displaces the main cache's victim if the frequency sketch
+        # has seen it more often; the main cache is a segmented LRU.
+        self.window_size = max(1, int(frame_size * self.window_fraction))
+        main_size = frame_size - self.window_size
+        self.protected_size = int(main_size * self.protected_fraction)
+        self.window = OrderedDict()
+        self.probation = OrderedDict()
+        self.protected = OrderedDict()
+        self.sketch = CountMinSketch(max(16, frame_size))
+        self.admitted = 0
+        self.rejected = 0
+
+    def on_hit(self, page, frame, t):
+        self.sketch.increment(page)
+        if page in self.window:
+            self.window.move_to_end(page)
+        elif page in self.protected:
+            self.protected.move_to_end(page)
+        else:
+            del self.probation[page]
+            self.protected[page] = frame
+            if len(self.protected) > self.protected_size:
+                demoted, demoted_frame = self.protected.popitem(last=False)
+                self.probation[demoted] = demoted_frame
+
+    def on_fault(self, page, frame, t):
+        self.sketch.increment(page)
+        self.window[page] = frame
+        # Only while memory is still filling: the window overflows into the
+        # main cache without an eviction.
+        if len(self.window) > self.window_size:
+            moved, moved_frame = self.window.popitem(last=False)
+            self.probation[moved] = moved_frame
+
+    def choose_victim(self, t):
+        main = self.probation or self.protected
+        if len(self.window) < self.window_size and main:
+            return main.popitem(last=False)[0]
+
+        candidate = self.window.popitem(last=False)
+        if not main:
+            return candidate[0]
+
+        victim = next(iter(main))
+        if self.sketch.estimate(candidate[0]) > self.sketch.estimate(victim):
+            del main[victim]
+            self.probation[candidate[0]] = candidate[1]
+            self.admitted += 1
+            return victim
+
+        self.rejected += 1
+        return candidate[0]
+
+    def stats(self):
+        return {"admitted": self.admitted, "rejected": self.rejected}
+
+
+class VariableAllocationPolicy(ReplacementPolicy):
+    variable = True
+
+    def reset(self, frame_size, slots):
+        super().reset(frame_size, slots)
+        # Resident pages, least recently used first, with their last use.
+        self.last_use = OrderedDict()
+        self.resident_total = 0
+        self.resident_peak = 0
+        self.references = 0
+
+    def on_hit(self, page, frame, t):
+        self.last_use.move_to_end(page)
+        self.last_use[page] = t
+
+    def on_fault(self, page, frame, t):
+        self.last_use[page] = t
+
+    def choose_victim(self, t):
+        # Only reached when the resident set has grown to all of memory.
+        return self.last_use.popitem(last=False)[0]
+
+    def release_unused_since(self, time):
+        released = []
+        last_use = self.last_use
+        while last_use:
+            page = next(iter(last_use))
+            if last_use[page] >= time:
+                break
+            del last_use[page]
+            released.append(page)
+        return released
+
+    def count_resident(self):
+        resident = len(self.last_use)
+        self.references += 1
+        self.resident_total += resident
+        self.resident_peak = max(self.resident_peak, resident)
+
+    def step_extra(self):
+        return {"resident": len(self.last_use)}
+
+    def stats(self):
+        return {
+            "mean_resident": self.resident_total / self.references if self.references else 0,
+            "peak_resident": self.resident_peak,
+        }
+
+
+class WorkingSetPolicy(VariableAllocationPolicy):
+    name = "WorkingSet"
+
+    def __init__(self, window=None):
+        self.window = window
+
+    def reset(self, frame_size, slots):
+        super().reset(frame_size, slots)
+        self.tau = self.window or 2 * frame_size
+
+    def release(self, t):
+        # The working set is every page used in the last tau references.
+        # Pages leave it in least-recently-used order, so only the front of
+        # last_use needs checking, at most one page per reference.
+        released = self.release_unused_since(t - self.tau + 1)
+        self.count_resident()
+        return released
+
+
+class PFFPolicy(VariableAllocationPolicy):
+    name = "PFF"
+
+    def __init__(self, threshold=None):
+        self.threshold = threshold
+
+    def reset(self, frame_size, slots):
+        super().reset(frame_size, slots)
+        self.interval = self.threshold or frame_size
+        self.last_fault = 0
+        self.shrink_before = None
+
+    def on_fault(self, page, frame, t):
+        # A long gap since the previous fault means the fault rate is low:
+        # drop every page not used since that fault. A short gap just grows
+        # the resident set by the new page.
+        if t - self.last_fault > self.interval:
+            self.shrink_before = self.last_fault
+        self.last_fault = t
+        super().on_fault(page, frame, t)
+
+    def release(self, t):
+        released = ()
+        if self.shrink_before is not None:
+            released = self.release_unused_since(self.shrink_before)
+            self.shrink_before = None
+        self.count_resident()
+        return released
+
+
+# Every policy by name. A comparison runs the original algorithms (FIFO,
+# LRU, Optimal, Custom and Clock) unless others are asked for by name.
+POLICIES = {
+    "FIFO": FIFOPolicy,
+    "LRU": LRUPolicy,
+    "Optimal": OptimalPolicy,
+    "Custom": CustomPolicy,
+    "Clock": ClockPolicy,
+    "Clock2": TwoHandedClockPolicy,
+    "ESC": EnhancedSecondChancePolicy,
+    "ClockPro": ClockProPolicy,
+    "ARC": ARCPolicy,
+    "2Q": TwoQueuePolicy,
+    "LIRS": LIRSPolicy,
+    "W-TinyLFU": WTinyLFUPolicy,
+    "WorkingSet": WorkingSetPolicy,
+    "PFF": PFFPolicy,
+}
+DEFAULT_POLICIES = {
+    name: POLICIES[name] for name in ("FIFO", "LRU", "Optimal", "Custom", "Clock")
+}
@@ -0,0 +1,247 @@
+import heapq
+from array import array
+from collections import deque
+from itertools import islice
+
+from tlb import TLB
+
+# Pages of different processes share one key space: the process id sits
+# above the page number, so a key is also the ASID-tagged TLB tag.
+PID_SHIFT = 40
+
+
+def key_base(pid, pages):
+    # Page numbers must fit below the process id, or two processes' pages
+    # would share a key.
+    if len(pages) and not 0 <= min(pages) <= max(pages) < 1 << PID_SHIFT:
+        raise ValueError(f"Page numbers of process {pid} must be in [0, 2**{PID_SHIFT})")
+    return pid << PID_SHIFT
+
+
+def schedule(traces, quantum=100, weights=None):
+    # Round-robin over the processes, each running for `quantum` references
+    # (times its weight) before the next one gets the CPU. Yields
+    # (pid, pages) for every time slice; finished processes drop out.
+    quanta = [
+        max(1, int(quantum * (weights[pid] if weights else 1)))
+        for pid in range(len(traces))
+    ]
+    positions = [0] * len(traces)
+    iterators = [
+        None if hasattr(trace, "__getitem__") else iter(trace) for trace in traces
+    ]
+    ready = deque(range(len(traces)))
+
+    while ready:
+        pid = ready.popleft()
+        size = quanta[pid]
+        if iterators[pid] is None:
+            start = positions[pid]
+            pages = traces[pid][start : start + size]
+            positions[pid] = start + len(pages)
+            if hasattr(pages, "tolist"):
+                pages = pages.tolist()
+        else:
+            pages = list(islice(iterators[pid], size))
+
+        if len(pages):
+            yield pid, pages
+        if len(pages) == size:
+            ready.append(pid)
+
+
+class Partition:
+    def __init__(self, policy, frame_size):
+        self.policy = policy
+        self.frame_size = frame_size
+        self.slots = [None] * frame_size
+        self.free = list(range(frame_size))
+        self.page_table = {}
+        self.t = 0
+        policy.reset(frame_size, self.slots)
+
+
+class MultiProcessSimulation:
+    # Many processes competing for one pool of physical frames. With
+    # "global" replacement one policy instance manages every frame and a
+    # fault may evict any process's page; with "local" replacement each
+    # process gets its own share of the frames and its own policy instance.
+    #
+    # The hardware TLB is shared, as one core's TLB is, rather than one per
+    # process: "flush" empties it on every context switch, which behaves
+    # like each process having its own cold TLB; "asid" keeps the entries
+    # of all processes apart by tag.
+
+    def __init__(
+        self,
+        policy_class,
+        frame_size,
+        processes,
+        replacement="global",
+        tlb_mode="asid",
+        tlb_factory=TLB,
+        quantum=100,
+        weights=None,
+    ):
+        if replacement not in ("global", "local"):
+            raise ValueError(f"Unknown replacement scope: {replacement}")
+        if tlb_mode not in ("flush", "asid"):
+            raise ValueError(f"Unknown TLB mode: {tlb_mode}")
+        if weights is not None and len(weights) != processes:
+            raise ValueError("Need one scheduling weight per process")
+
+        self.policy_class = policy_class
+        self.frame_size = frame_size
+        self.processes = processes
+        self.replacement = replacement
+        self.tlb_mode = tlb_mode
+        self.quantum = quantum
+        self.weights = weights
+        self.tlb = tlb_factory()
+
+        if replacement == "global":
+            self.partitions = [Partition(policy_class(), frame_size)]
+        else:
+            self.partitions = [
+                Partition(policy_class(), size) for size in self.allocation()
+            ]
+
+        self.references = array("q", bytes(8 * processes))
+        self.faults = array("q", bytes(8 * processes))
+        self.tlb_hits = array("q", bytes(8 * processes))
+        self.tlb_misses = array("q", bytes(8 * processes))
+        self.context_switches = 0
+        self.current = None
+
+    def allocation(self):
+        # Frames split in proportion to the scheduling weights, largest
+        # remainders first, and at least one frame per process.
+        if self.frame_size < self.processes:
+            raise ValueError("Local replacement needs at least one frame per process")
+        weights = self.weights or [1] * self.processes
+        spare = self.frame_size - self.processes
+        total = sum(weights)
+        shares = [spare * weight / total for weight in weights]
+        sizes = [1 + int(share) for share in shares]
+        leftover = self.frame_size - sum(sizes)
+        by_remainder = sorted(
+            range(self.processes), key=lambda pid: int(shares[pid]) - shares[pid]
+        )
+        for pid in by_remainder[:leftover]:
+            sizes[pid] += 1
+        return sizes
+
+    def partition(self, pid):
+        if self.replacement == "global":
+            return self.partitions[0]
+        return self.partitions[pid]
+
+    def prepare(self, slices):
+        streams = [[] for _ in self.partitions]
+        for pid, pages in slices:
+            base = key_base(pid, pages)
+            streams[0 if self.replacement == "global" else pid].extend(
+                base | page for page in pages
+            )
+        for partition, stream in zip(self.partitions, streams):
+            partition.policy.prepare(stream)
+
+    def run(self, traces):
+        if len(traces) != self.processes:
+            raise ValueError("Need one trace per process")
+
+        slices = schedule(traces, self.quantum, self.weights)
+        if self.policy_class.needs_future:
+            slices = list(slices)
+            self.prepare(slices)
+
+        for pid, pages in slices:
+            self.run_slice(pid, pages)
+        return self.results()
+
+    def run_slice(self, pid, pages):
+        if pid != self.current:
+            if self.current is not None:
+                self.context_switches += 1
+                if self.tlb_mode == "flush":
+                    self.tlb.flush()
+            self.current = pid
+
+        partition = self.partition(pid)
+        policy = partition.policy
+        page_table = partition.page_table
+        slots = partition.slots
+        free = partition.free
+        tlb = self.tlb
+        base = key_base(pid, pages)
+        faults = 0
+        tlb_misses = 0
+        t = partition.t
+
+        for page in pages:
+            key = base | page
+            frame = page_table.get(key)
+
+            if frame is not None:
+                policy.on_hit(key, frame, t)
+            else:
+                faults += 1
+                policy.on_miss(key, t)
+                if free:
+                    frame = heapq.heappop(free)
+                else:
+                    victim = policy.choose_victim(t)
+                    frame = page_table.pop(victim)
+                    tlb.invalidate(victim)
+                slots[frame] = key
+                page_table[key] = frame
+                policy.on_fault(key, frame, t)
+
+            if tlb.lookup(key) is None:
+                tlb_misses += 1
+                tlb.update(key, frame)
+
+            if policy.variable:
+                for released in policy.release(t):
+                    released_frame = page_table.pop(released)
+                    slots[released_frame] = None
+                    heapq.heappush(free, released_frame)
+                    tlb.invalidate(released)
+            t += 1
+
+        partition.t = t
+        self.references[pid] += len(pages)
+        self.faults[pid] += faults
+        self.tlb_misses[pid] += tlb_misses
+        self.tlb_hits[pid] += len(pages) - tlb_misses
+
+    def process_stats(self, pid):
+        references = self.references[pid]
+        return {
+            "pid": pid,
+            "references": references,
+            "faults": self.faults[pid],
+            "fault_rate": self.faults[pid] / references if references else 0,
+            "tlb_hits": self.tlb_hits[pid],
+            "tlb_misses": self.tlb_misses[pid],
+            "tlb_hit_ratio": (
+                self.tlb_hits[pid] / references * 100 if references else 0
+            ),
+        }
+
+    def results(self):
+        references = sum(self.references)
+        faults = sum(self.faults)
+        return {
+            "algorithm": self.policy_class.name,
+            "replacement": self.replacement,
+            "tlb_mode": self.tlb_mode,
+            "references": references,
+            "faults": faults,
+            "fault_rate": faults / references if references else 0,
+            "tlb_hits": self.tlb.hits,
+            "tlb_misses": self.tlb.misses,
+            "tlb_hit_ratio": self.tlb.get_hit_ratio(),
+            "context_switches": self.context_switches,
+            "processes": [self.process_stats(pid) for pid in range(self.processes)],
+        }
@@ -0,0 +1,260 @@
+import hashlib
+import json
+import os
+import struct
+import zlib
+from array import array
+from collections import OrderedDict
+
+import numpy as np
+
+from steplog import StepLog
+from tlb import TLB
+
+STEP_COLUMNS = (
+    "page",
+    "fault",
+    "tlb_miss",
+    "virtual_addr",
+    "physical_addr",
+    "change_step",
+    "change_slot",
+    "change_old",
+    "change_new",
+)
+SUMMARY_ARRAYS = ("window_fault_rates", "window_resident_sizes")
+
+
+def trace_digest(reference_string, writes=None):
+    # Hashes what a trace contains, not where it came from: a trace file
+    # hashes its bytes, anything else its pages as little-endian int64.
+    digest = hashlib.blake2b(digest_size=20)
+    path = getattr(reference_string, "path", None)
+    if path is not None:
+        digest.update(
+            f"{reference_string.page_size}:{reference_string.address_width}:"
+            f"{reference_string.has_flags}:".encode()
+        )
+        with open(path, "rb") as trace:
+            for block in iter(lambda: trace.read(1 << 20), b""):
+                digest.update(block)
+    else:
+        digest.update(np.asarray(reference_string, dtype="<i8").tobytes())
+    if writes is not None:
+        digest.update(b"writes:")
+        digest.update(np.asarray(writes, dtype=bool).tobytes())
+    return digest.hexdigest()
+
+
+def result_key(digest, parameters):
+    payload = json.dumps(parameters, sort_keys=True, default=repr)
+    return hashlib.blake2b(f"{digest}:{payload}".encode(), digest_size=20).hexdigest()
+
+
+def encode_tlb(tlb):
+    return {
+        "size": tlb.size,
+        "ways": tlb.ways,
+        "policy": tlb.policy,
+        "hits": tlb.hits,
+        "misses": tlb.misses,
+        "set_hits": tlb.set_hits,
+        "set_misses": tlb.set_misses,
+    }
+
+
+def decode_tlb(header):
+    # Counters only; the entries themselves are not kept.
+    tlb = TLB(header["size"], header["ways"], header["policy"])
+    tlb.hits = header["hits"]
+    tlb.misses = header["misses"]
+    tlb.set_hits = header["set_hits"]
+    tlb.set_misses = header["set_misses"]
+    return tlb
+
+
+def encode_runs(runs):
+    # Engine results ({name: (faults, StepLog or summary)}) as one JSON
+    # header followed by the raw bytes of every typed column it names.
+    header = {}
+    blobs = []
+
+    def add(column):
+        blobs.append(column.tobytes())
+        return [column.typecode, len(column)]
+
+    for name, (faults, run) in runs.items():
+        if isinstance(run, StepLog):
+            entry = {
+                "faults": faults,
+                "tlb": encode_tlb(run.tlb),
+                "layout": run.layout,
+                "keyframe_interval": run.keyframe_interval,
+                "columns": {column: add(getattr(run, column)) for column in STEP_COLUMNS},
+                "extras": {key: add(column) for key, column in run.extras.items()},
+                "costs": run.costs,
+                "page_table": run.page_table,
+                "io": run.io,
+            }
+        else:
+            fields = {
+                key: value
+                for key, value in run.items()
+                if key != "tlb" and key not in SUMMARY_ARRAYS
+            }
+            entry = {
+                "faults": faults,
+                "tlb": encode_tlb(run["tlb"]),
+                "summary": fields,
+                "arrays": {key: add(run[key]) for key in SUMMARY_ARRAYS if key in run},
+            }
+        header[name] = entry
+
+    encoded = json.dumps(header).encode()
+    return struct.pack("<I", len(encoded)) + encoded + b"".join(blobs)
+
+
+def decode_runs(data):
+    (length,) = struct.unpack_from("<I", data)
+    header = json.loads(data[4 : 4 + length])
+    offset = 4 + length
+
+    def take(spec):
+        nonlocal offset
+        typecode, count = spec
+        column = array(typecode)
+        size = count * column.itemsize
+        column.frombytes(data[offset : offset + size])
+        offset += size
+        return column
+
+    runs = {}
+    for name, entry in header.items():
+        tlb = decode_tlb(entry["tlb"])
+        if "summary" in entry:
+            run = dict(entry["summary"])
+            for key, spec in entry["arrays"].items():
+                run[key] = take(spec)
+            run["tlb"] = tlb
+        else:
+            run = StepLog(tlb, 1, entry["layout"], entry["keyframe_interval"])
+            for column, spec in entry["columns"].items():
+                setattr(run, column, take(spec))
+            run.extras = {key: take(spec) for key, spec in entry["extras"].items()}
+            run.costs = entry["costs"]
+            run.page_table = entry["page_table"]
+            run.io = entry["io"]
+            rebuild_keyframes(run)
+        runs[name] = (entry["faults"], run)
+    return runs
+
+
+def rebuild_keyframes(steps):
+    # Keyframe k is the frame state before step k * keyframe_interval,
+    # replayed from the change columns rather than stored.
+    interval = steps.keyframe_interval
+    state = steps.new_state()
+    steps.keyframes = []
+    done = 0
+    for start in range(0, len(steps), interval):
+        steps.replay(state, done, start)
+        done = start
+        steps.keyframes.append(list(state))
+    steps.replay(state, done, len(steps))
+    steps.current = state
+
+
+class ResultCache:
+    # Two tiers keyed by content hash: an in-memory LRU of encoded results
+    # in front of a directory of compressed files, trimmed oldest-used
+    # first once it grows past max_bytes.
+
+    def __init__(self, directory=None, memory_entries=32, max_bytes=256 << 20):
+        self.directory = directory
+        self.memory_entries = memory_entries
+        self.max_bytes = max_bytes
+        self.memory = OrderedDict()
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.stores = 0
+        self.evictions = 0
+        if directory is not None:
+            os.makedirs(directory, exist_ok=True)
+
+    def path(self, key):
+        return os.path.join(self.directory, f"{key}.bin")
+
+    def remember(self, key, data):
+        self.memory[key] = data
+        self.memory.move_to_end(key)
+        if len(self.memory) > self.memory_entries:
+            self.memory.popitem(last=False)
+
+    def get(self, key):
+        data = self.memory.get(key)
+        if data is not None:
+            self.memory.move_to_end(key)
+            self.memory_hits += 1
+            return decode_runs(data)
+
+        if self.directory is not None:
+            try:
+                with open(self.path(key), "rb") as cached:
+                    data = zlib.decompress(cached.read())
+            except (OSError, zlib.error):
+                data = None
+            if data is not None:
+                # Touch the file so trimming sees it as recently used.
+                os.utime(self.path(key))
+                self.disk_hits += 1
+                self.remember(key, data)
+                return decode_runs(data)
+
+        self.misses += 1
+        return None
+
+    def put(self, key, runs):
+        data = encode_runs(runs)
+        self.stores += 1
+        self.remember(key, data)
+        if self.directory is not None:
+            temporary = f"{self.path(key)}.tmp"
+            with open(temporary, "wb") as cached:
+                cached.write(zlib.compress(data))
+            os.replace(temporary, self.path(key))
+            self.trim()
+
+    def trim(self):
+        entries = []
+        for name in os.listdir(self.directory):
+            if name.endswith(".bin"):
+                stat = os.stat(os.path.join(self.directory, name))
+                entries.append((stat.st_mtime, stat.st_size, name))
+        total = sum(size for _, size, _ in entries)
+        for _, size, name in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            os.remove(os.path.join(self.directory, name))
+            total -= size
+            self.evictions += 1
+
+    def clear(self):
+        self.memory.clear()
+        if self.directory is not None:
+            for name in os.listdir(self.directory):
+                if name.endswith(".bin"):
+                    os.remove(os.path.join(self.directory, name))
+
+    def stats(self):
+        hits = self.memory_hits + self.disk_hits
+        lookups = hits + self.misses
+        return {
+            "memory_hits": self.memory_hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "hit_ratio": hits / lookups * 100 if lookups else 0,
+            "stores": self.stores,
+            "evictions": self.evictions,
+            "memory_entries": len(self.memory),
+        }
@@ -0,0 +1,113 @@
+import io
+import os
+import pickle
+import zlib
+
+SNAPSHOT_MAGIC = b"PGSNAP"
+# Bump whenever the attributes of the engine, a policy, the TLB or the
+# logs change, so an old snapshot is refused instead of half-restored.
+SNAPSHOT_VERSION = 2
+
+# What a snapshot may name: the simulator's own classes and the few
+# containers they hold. Anything else is refused rather than imported.
+SNAPSHOT_MODULES = {
+    "costs",
+    "engine",
+    "pagetable",
+    "policies",
+    "sketch",
+    "stats",
+    "steplog",
+    "tlb",
+}
+SNAPSHOT_GLOBALS = {
+    ("array", "_array_reconstructor"),
+    ("array", "array"),
+    ("builtins", "int"),
+    ("collections", "OrderedDict"),
+    ("collections", "defaultdict"),
+    ("random", "Random"),
+}
+
+
+class SnapshotUnpickler(pickle.Unpickler):
+    def find_class(self, module, name):
+        if module in SNAPSHOT_MODULES or (module, name) in SNAPSHOT_GLOBALS:
+            return super().find_class(module, name)
+        raise pickle.UnpicklingError(f"snapshot refers to {module}.{name}")
+
+
+class SimulationSession:
+    # A long-lived lockstep engine for following a trace as it grows: every
+    # feed() continues from the policy, page table and TLB state left by
+    # the previous one, so nothing already seen is simulated twice. The
+    # whole engine pickles, which is what a snapshot is. Loading only
+    # resolves the simulator's own classes, but a snapshot can still call
+    # their constructors with any arguments: load files you or your own
+    # jobs wrote, not ones from elsewhere.
+
+    def __init__(self, engine):
+        if engine.needs_future:
+            raise ValueError(
+                "Policies that look ahead (Optimal) need the whole trace up front"
+            )
+        self.engine = engine
+
+    @property
+    def references(self):
+        return self.engine.t
+
+    def feed(self, pages, virtual_addresses=None, writes=None):
+        if hasattr(pages, "tolist"):
+            pages = pages.tolist()
+        self.engine.feed(pages, virtual_addresses, writes)
+
+    def counters(self):
+        references = self.engine.t
+        counters = {}
+        for run in self.engine.runs:
+            counters[run.name] = {
+                "references": references,
+                "faults": run.faults,
+                "fault_rate": run.faults / references if references else 0,
+                "tlb_hits": run.tlb.hits,
+                "tlb_misses": run.tlb.misses,
+                "tlb_hit_ratio": run.tlb.get_hit_ratio(),
+                "resident": run.frame_size - len(run.free),
+                "dirty_evictions": run.writebacks,
+            }
+        return counters
+
+    def results(self):
+        return self.engine.results()
+
+    def save(self, path, level=6):
+        # Written next to the target and renamed over it, so a crash while
+        # saving leaves the previous snapshot intact.
+        data = zlib.compress(pickle.dumps(self.engine, pickle.HIGHEST_PROTOCOL), level)
+        header = SNAPSHOT_MAGIC + f"{SNAPSHOT_VERSION}\n".encode()
+        temporary = f"{path}.tmp"
+        with open(temporary, "wb") as snapshot:
+            snapshot.write(header)
+            snapshot.write(data)
+        os.replace(temporary, path)
+        return len(header) + len(data)
+
+    @classmethod
+    def load(cls, path):
+        with open(path, "rb") as snapshot:
+            header = snapshot.readline(64)
+            data = snapshot.read()
+        version = header[len(SNAPSHOT_MAGIC) : -1]
+        if not header.startswith(SNAPSHOT_MAGIC) or not version.isdigit():
+            raise ValueError(f"{path} is not a simulation snapshot")
+        if int(version) != SNAPSHOT_VERSION:
+            raise ValueError(
+                f"{path} is a version {int(version)} snapshot; "
+                f"this simulator reads version {SNAPSHOT_VERSION}"
+            )
+        try:
+            engine = SnapshotUnpickler(io.BytesIO(zlib.decompress(data))).load()
+        except (pickle.UnpicklingError, zlib.error) as error:
+            raise ValueError(f"{path} is not a usable snapshot: {error}") from None
+        return cls(engine)
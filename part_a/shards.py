@@ -0,0 +1,270 @@
+from array import array
+from copy import copy
+
+import numpy as np
+
+from engine import LockstepEngine
+from mrc import FenwickTree, MissRatioCurve
+
+HASH_SPACE = 1 << 64
+
+
+def page_chunks(reference_string, chunk_size=1 << 16):
+    if hasattr(reference_string, "page_chunks"):
+        yield from reference_string.page_chunks()
+        return
+    pages = np.asarray(reference_string)
+    for start in range(0, len(pages), chunk_size):
+        yield pages[start : start + chunk_size]
+
+
+def head(reference_string, length):
+    # The first `length` references as one array.
+    parts = []
+    for pages in page_chunks(reference_string):
+        parts.append(pages[:length])
+        length -= len(parts[-1])
+        if length <= 0:
+            break
+    if not parts:
+        return np.empty(0, dtype=np.int64)
+    return np.concatenate(parts).astype(np.int64)
+
+
+class ShardsSampler:
+    # Spatially hashed sampling (SHARDS): a page is sampled when its hash
+    # falls below a threshold, so either every reference to a page is kept
+    # or none is. With a page budget the threshold is lowered until at most
+    # `max_pages` distinct pages are sampled, which bounds the memory of
+    # everything run on the sample.
+
+    def __init__(self, max_pages=8192, rate=1.0, seed=0):
+        if max_pages is not None and max_pages < 1:
+            raise ValueError("The sample needs room for at least one page")
+        if not 0 < rate <= 1:
+            raise ValueError("Sampling rate must be in (0, 1]")
+        self.max_pages = max_pages
+        self.seed = seed
+        self.threshold = None if rate >= 1 else int(rate * HASH_SPACE)
+        self.references = None
+        self.pages = None
+
+    @property
+    def rate(self):
+        return 1.0 if self.threshold is None else self.threshold / HASH_SPACE
+
+    def hashes(self, pages):
+        # splitmix64 finalizer; uint64 arithmetic wraps as intended.
+        x = np.asarray(pages).astype(np.uint64) ^ np.uint64(self.seed)
+        x = (x ^ (x >> np.uint64(30))) * np.uint64(0xBF58476D1CE4E5B9)
+        x = (x ^ (x >> np.uint64(27))) * np.uint64(0x94D049BB133111EB)
+        return x ^ (x >> np.uint64(31))
+
+    def fit(self, reference_string):
+        # One pass keeping the smallest distinct hashes under the threshold;
+        # once more than max_pages are kept, the largest of them becomes the
+        # threshold and the rest are dropped.
+        threshold = self.threshold
+        smallest = np.empty(0, dtype=np.uint64)
+        references = 0
+        for pages in page_chunks(reference_string):
+            references += len(pages)
+            hashes = self.hashes(pages)
+            if threshold is not None:
+                hashes = hashes[hashes < np.uint64(threshold)]
+            smallest = np.union1d(smallest, hashes)
+            if self.max_pages is not None and len(smallest) > self.max_pages:
+                threshold = int(smallest[self.max_pages])
+                smallest = smallest[: self.max_pages]
+        self.threshold = threshold
+        self.references = references
+        self.pages = len(smallest)
+        return self
+
+    def miss_ratios(self, faults):
+        # SHARDS_adj: the sample is expected to hold rate * references
+        # references. A shortfall is usually a hot page that missed the
+        # sample, so the difference is counted as hits.
+        expected = self.rate * self.references
+        if expected == 0:
+            return np.zeros(len(faults))
+        return np.minimum(faults / expected, 1)
+
+    def sample(self, pages):
+        if self.threshold is None:
+            return pages
+        return pages[self.hashes(pages) < np.uint64(self.threshold)]
+
+    def samples(self, reference_string):
+        for pages in page_chunks(reference_string):
+            pages = self.sample(pages)
+            if len(pages):
+                yield pages.tolist()
+
+
+class StackDistances:
+    # LRU stack distances with memory bound by the number of pages: marks
+    # live in a Fenwick tree indexed by access time, renumbered from zero
+    # whenever the clock reaches the end of the tree.
+
+    def __init__(self, max_pages):
+        self.capacity = 2 * max_pages + 2
+        self.histogram = array("q", bytes(8 * (max_pages + 1)))
+        self.misses = 0
+        self.references = 0
+        self.reset_marks({})
+
+    def reset_marks(self, last_seen):
+        self.marks = FenwickTree(self.capacity)
+        self.last_seen = {}
+        for t, page in enumerate(sorted(last_seen, key=last_seen.get)):
+            self.marks.add(t, 1)
+            self.last_seen[page] = t
+        self.t = len(self.last_seen)
+
+    def feed(self, pages):
+        histogram = self.histogram
+        for page in pages:
+            if self.t == self.capacity:
+                self.reset_marks(self.last_seen)
+            marks = self.marks
+            t = self.t
+            previous = self.last_seen.get(page)
+            if previous is None:
+                self.misses += 1
+            else:
+                distance = marks.prefix_sum(t - 1) - marks.prefix_sum(previous) + 1
+                histogram[distance] += 1
+                marks.add(previous, -1)
+            marks.add(t, 1)
+            self.last_seen[page] = t
+            self.t = t + 1
+        self.references += len(pages)
+
+    def faults(self):
+        # faults[c] with c = 0 .. max_pages frames: the cold misses plus
+        # every reuse deeper than c.
+        histogram = np.array(self.histogram, dtype=np.int64)
+        deeper = np.cumsum(histogram[::-1])[::-1]
+        return self.misses + np.append(deeper[1:], 0)
+
+
+def frame_grid(max_frames, points):
+    grid = np.unique(np.geomspace(1, max_frames, points).round().astype(np.int64))
+    return grid.tolist()
+
+
+def scale_curve(name, frame_sizes, miss_ratios, references, max_frames):
+    # Miss ratios measured at some frame sizes, interpolated to every size
+    # from 1 to max_frames and scaled back to the full reference count.
+    ratios = np.interp(np.arange(1, max_frames + 1), frame_sizes, miss_ratios)
+    faults = np.rint(ratios * references).astype(np.int64)
+    return MissRatioCurve(name, array("q", faults.tobytes()), references)
+
+
+def sampled_curve(sampler, policy_class, reference_string, max_frames, points=32):
+    # LRU reads every frame size off one stack-distance pass; other
+    # policies get a miniature simulation per grid point, with the frame
+    # count scaled down by the sampling rate.
+    rate = sampler.rate
+    if policy_class.name == "LRU":
+        distances = StackDistances(max(sampler.pages, 1))
+        for pages in sampler.samples(reference_string):
+            distances.feed(pages)
+        faults = distances.faults()
+        frame_sizes = np.arange(1, max_frames + 1)
+        scaled = np.minimum((frame_sizes * rate).astype(np.int64), len(faults) - 1)
+        return scale_curve(
+            f"{policy_class.name} (sampled)",
+            frame_sizes,
+            sampler.miss_ratios(faults[scaled]),
+            sampler.references,
+            max_frames,
+        )
+
+    if policy_class.needs_future:
+        raise ValueError(f"{policy_class.name} cannot run on a sampled trace")
+    frame_sizes = frame_grid(max_frames, points)
+    engines = {}
+    for frame_size in frame_sizes:
+        scaled = max(1, round(frame_size * rate))
+        if scaled not in engines:
+            engines[scaled] = LockstepEngine(
+                {policy_class.name: policy_class()}, scaled, summary=True
+            )
+    for pages in sampler.samples(reference_string):
+        for engine in engines.values():
+            engine.feed(pages)
+
+    faults = [
+        engines[max(1, round(frame_size * rate))].runs[0].faults
+        for frame_size in frame_sizes
+    ]
+    return scale_curve(
+        f"{policy_class.name} (sampled)",
+        frame_sizes,
+        sampler.miss_ratios(np.array(faults)),
+        sampler.references,
+        max_frames,
+    )
+
+
+def curve_error(estimate, exact, frame_sizes):
+    errors = [
+        abs(estimate.miss_ratio(frame_size) - exact.miss_ratio(frame_size))
+        for frame_size in frame_sizes
+    ]
+    return {
+        "mean_absolute_error": sum(errors) / len(errors) if errors else 0,
+        "max_absolute_error": max(errors, default=0),
+    }
+
+
+def shards_curves(
+    reference_string,
+    policies,
+    max_frames=None,
+    max_pages=8192,
+    rate=1.0,
+    seed=0,
+    points=32,
+    prefix=100_000,
+):
+    # Approximate miss-ratio curves for each policy class in `policies`,
+    # plus a confidence estimate: the same sampling threshold applied to
+    # the first `prefix` references, compared with an exact run on them.
+    if not hasattr(reference_string, "__len__") and not hasattr(
+        reference_string, "page_chunks"
+    ):
+        reference_string = np.fromiter(reference_string, dtype=np.int64)
+
+    sampler = ShardsSampler(max_pages, rate, seed).fit(reference_string)
+    if max_frames is None:
+        max_frames = max(1, round(sampler.pages / sampler.rate))
+
+    head_pages = head(reference_string, prefix)
+    head_sampler = copy(sampler).fit(head_pages)
+    exact_sampler = ShardsSampler(None).fit(head_pages)
+    head_frames = min(max_frames, max(1, exact_sampler.pages))
+
+    curves = {}
+    errors = {}
+    for name, policy_class in policies.items():
+        curves[name] = sampled_curve(
+            sampler, policy_class, reference_string, max_frames, points
+        )
+        estimate = sampled_curve(
+            head_sampler, policy_class, head_pages, head_frames, points
+        )
+        exact = sampled_curve(exact_sampler, policy_class, head_pages, head_frames, points)
+        errors[name] = curve_error(estimate, exact, frame_grid(head_frames, points))
+        errors[name]["references"] = len(head_pages)
+
+    return {
+        "rate": sampler.rate,
+        "references": sampler.references,
+        "sampled_pages": sampler.pages,
+        "max_frames": max_frames,
+        "curves": curves,
+        "error": errors,
+    }
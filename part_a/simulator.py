@@ -1,9 +1,19 @@
 import os
-import random
 import time
-from collections import defaultdict
 
-import matplotlib.pyplot as plt
+import numpy as np
+from costs import CostModel
+from engine import LockstepEngine
+from mrc import as_sequence, lru_curve, next_use_index, optimal_curve
+from policies import (
+    DEFAULT_POLICIES,
+    POLICIES,
+    ClockPolicy,
+    CustomPolicy,
+    FIFOPolicy,
+    LRUPolicy,
+    OptimalPolicy,
+)
 from tlb import TLB
 
 
@@ -11,10 +21,52 @@ class Simulator:
     def __init__(self):
         self.page_size = 4096
         self.tlb_size = 4
+        self.tlb_ways = None
+        self.tlb_policy = "lru"
+        self.seed = None
+        # Every policy that can be selected by name, and the ones
+        # simulate_all compares when no algorithms are given.
+        self.policies = dict(POLICIES)
+        self.default_algorithms = list(DEFAULT_POLICIES)
+        self.cost_model = CostModel()
+        # None keeps page tables flat; 2-5 models a radix table walked on
+        # every TLB miss.
+        self.page_table_levels = None
+        self.page_table_bits = 9
+        self.walk_cache_size = 32
+        # An engine.BackgroundFlusher cleans dirty pages ahead of eviction.
+        self.flusher = None
+        # A resultcache.ResultCache makes simulate_all reuse earlier results
+        # for the same trace contents and settings.
+        self.result_cache = None
 
     def clear_screen(self):
         os.system("clear")
 
+    def register_policy(self, name, policy_class):
+        self.policies[name] = policy_class
+        if name not in self.default_algorithms:
+            self.default_algorithms.append(name)
+
+    def policy_names(self, algorithms):
+        policy_names = {name.lower(): name for name in self.policies}
+        names = []
+        for algorithm in algorithms:
+            if algorithm.lower() not in policy_names:
+                raise ValueError(f"Unknown algorithm: {algorithm}")
+            names.append(policy_names[algorithm.lower()])
+        return names
+
+    def new_tlb(self):
+        return TLB(self.tlb_size, self.tlb_ways, self.tlb_policy, self.seed)
+
+    def new_page_table(self):
+        from pagetable import PageTable
+
+        return PageTable(
+            self.page_table_levels, self.page_table_bits, self.walk_cache_size
+        )
+
     def virtual_to_physical(self, virtual_address, page_table, tlb):
         page_number = virtual_address // self.page_size
         offset = virtual_address % self.page_size
@@ -23,24 +75,153 @@ class Simulator:
         tlb_miss = frame_number is None
 
         if frame_number is None:
-            if page_number in page_table:
-                frame_number = page_table[page_number]
-                tlb.update(page_number, frame_number)
-            else:
+            # A PageTable walks its levels here; a dict is a flat lookup.
+            frame_number = page_table.get(page_number)
+            if frame_number is None:
                 return None, None, True
+            tlb.update(page_number, frame_number)
 
         physical_address = frame_number * self.page_size + offset
         return physical_address, frame_number, tlb_miss
 
-    def generate_virtual_addresses(self, reference_string):
-        addresses = []
-        for page in reference_string:
-            offset = random.randint(0, self.page_size - 1)
-            virtual_addr = page * self.page_size + offset
-            addresses.append(virtual_addr)
-        return addresses
+    def open_trace(self, path, address_width=8, has_flags=False):
+        from trace_reader import TraceReader
+
+        return TraceReader(path, self.page_size, address_width, has_flags)
+
+    def generate_virtual_addresses(self, reference_string, seed=None):
+        rng = np.random.default_rng(self.seed if seed is None else seed)
+        pages = np.asarray(reference_string, dtype=np.int64)
+        offsets = rng.integers(0, self.page_size, size=len(pages), dtype=np.int64)
+        return pages * self.page_size + offsets
+
+    def translate_batch(self, virtual_addresses, page_table, tlb):
+        # Translates an address array against a fixed page table ({page:
+        # frame}, as the engine keeps it). Returns the physical addresses
+        # (-1 where a page is unmapped) and a TLB hit flag per address.
+        virtual_addresses = np.asarray(virtual_addresses, dtype=np.int64)
+        pages, offsets = np.divmod(virtual_addresses, self.page_size)
+
+        # Sorted copy of the page table so every page is looked up with one
+        # searchsorted call; unmapped pages get frame -1.
+        frames = np.full(len(pages), -1, dtype=np.int64)
+        if page_table:
+            table_pages = np.fromiter(page_table.keys(), np.int64, len(page_table))
+            table_frames = np.fromiter(page_table.values(), np.int64, len(page_table))
+            order = np.argsort(table_pages)
+            table_pages = table_pages[order]
+            table_frames = table_frames[order]
+
+            index = np.searchsorted(table_pages, pages)
+            index[index == len(table_pages)] = 0
+            mapped = table_pages[index] == pages
+            frames[mapped] = table_frames[index[mapped]]
+
+        tlb_hits = np.frombuffer(
+            tlb.lookup_batch(pages.tolist(), frames.tolist()), dtype=np.bool_
+        )
+        physical_addresses = np.where(frames >= 0, frames * self.page_size + offsets, -1)
+        return physical_addresses, tlb_hits
+
+    def translation_by_page_size(
+        self, virtual_addresses, region_map=None, unified=False, entries=None
+    ):
+        # TLB behaviour alone under mixed page sizes: every address is
+        # assumed mapped, and the region map decides 4 KiB / 2 MiB / 1 GiB.
+        from hugepages import MultiSizeTLB, RegionMap, simulate_translation
+
+        tlb = MultiSizeTLB(entries, unified, self.tlb_ways, self.tlb_policy, self.seed)
+        return simulate_translation(
+            virtual_addresses, region_map or RegionMap(self.page_size), tlb
+        )
+
+    def page_size_sweep(
+        self,
+        virtual_addresses,
+        frame_size=None,
+        memory=None,
+        page_sizes=None,
+        algorithms=None,
+        workers=None,
+        window=1000,
+    ):
+        from pagesweep import PAGE_SIZES, page_size_sweep
+
+        return page_size_sweep(
+            virtual_addresses,
+            algorithms,
+            frame_size,
+            memory,
+            page_sizes or PAGE_SIZES,
+            self.tlb_size,
+            workers,
+            window,
+        )
+
+    def next_use_index(self, reference_string):
+        return next_use_index(reference_string)
+
+    def miss_ratio_curves(self, reference_string, max_frames=None):
+        reference_string = as_sequence(reference_string)
+        return {
+            "LRU": lru_curve(reference_string, max_frames),
+            "Optimal": optimal_curve(reference_string, max_frames),
+        }
+
+    def new_session(self, frame_size, algorithms=None, summary=True, window=1000):
+        # Without a list of algorithms every registered policy that can run
+        # on a trace it has not seen yet joins the session.
+        from session import SimulationSession
+
+        if algorithms is None:
+            names = [
+                name
+                for name, policy_class in self.policies.items()
+                if not policy_class.needs_future
+            ]
+        else:
+            names = self.policy_names(algorithms)
+
+        engine = LockstepEngine(
+            {name: self.policies[name]() for name in names},
+            frame_size,
+            self.page_size,
+            self.new_tlb,
+            summary,
+            window,
+            self.cost_model,
+            self.new_page_table if self.page_table_levels else None,
+            self.flusher,
+        )
+        return SimulationSession(engine)
+
+    def sampled_miss_ratio_curves(
+        self,
+        reference_string,
+        algorithms=("LRU", "FIFO"),
+        max_frames=None,
+        max_pages=8192,
+        rate=1.0,
+        prefix=100_000,
+    ):
+        # Approximate curves for traces too long to simulate exactly; the
+        # "curves" entry goes straight to plot_comparison.
+        from shards import shards_curves
+
+        policies = {name: self.policies[name] for name in self.policy_names(algorithms)}
+        return shards_curves(
+            reference_string,
+            policies,
+            max_frames,
+            max_pages,
+            rate,
+            self.seed or 0,
+            prefix=prefix,
+        )
 
     def visual_demonstration(self, reference_string, frame_size, algorithm_name):
+        (name,) = self.policy_names([algorithm_name])
+        policy_class = self.policies[name]
         print(f"\n{'=' * 80}")
         print(f"VISUAL DEMONSTRATION: {algorithm_name.upper()} ALGORITHM WITH TLB")
         print(f"{'=' * 80}")
@@ -50,28 +231,7 @@ class Simulator:
         print(f"Page Size: {self.page_size} bytes")
         print(f"{'=' * 80}")
 
-        virtual_addresses = self.generate_virtual_addresses(reference_string)
-
-        if algorithm_name.lower() == "fifo":
-            faults, steps = self.fifo_algorithm(
-                reference_string, frame_size, virtual_addresses
-            )
-        elif algorithm_name.lower() == "lru":
-            faults, steps = self.lru_algorithm(
-                reference_string, frame_size, virtual_addresses
-            )
-        elif algorithm_name.lower() == "optimal":
-            faults, steps = self.optimal_algorithm(
-                reference_string, frame_size, virtual_addresses
-            )
-        elif algorithm_name.lower() == "clock":
-            faults, steps = self.clock_algorithm(
-                reference_string, frame_size, virtual_addresses
-            )
-        else:
-            faults, steps = self.custom_algorithm(
-                reference_string, frame_size, virtual_addresses
-            )
+        faults, steps = self.run_policy(policy_class(), reference_string, frame_size)
 
         print("\nStep-by-step execution:")
         print(
@@ -82,7 +242,7 @@ class Simulator:
         for i, step in enumerate(steps):
             frame_visual = "["
             for j in range(frame_size):
-                if j < len(step["frames"]):
+                if j < len(step["frames"]) and step["frames"][j] is not None:
                     frame_visual += f" {step['frames'][j]} "
                 else:
                     frame_visual += " - "
@@ -107,7 +267,7 @@ class Simulator:
             time.sleep(0.5)
 
         tlb = steps[-1]["tlb"] if steps else None
-        if tlb:
+        if tlb is not None:
             print("\nTLB STATISTICS:")
             print(f"TLB Hits: {tlb.hits}")
             print(f"TLB Misses: {tlb.misses}")
@@ -118,7 +278,7 @@ class Simulator:
         print(f"Total Page Hits: {len(steps) - faults}")
         print(f"Page Hit Ratio: {(len(steps) - faults) / len(steps) * 100:.1f}%")
 
-    def animated_demonstration(self, reference_string, frame_size):
+    def animated_demonstration(self, reference_string, frame_size, algorithms=None):
         self.clear_screen()
         print(f"\n{'=' * 100}")
         print("ANIMATED COMPARISON: ALL ALGORITHMS WITH TLB")
@@ -128,12 +288,11 @@ class Simulator:
         print(f"TLB Size: {self.tlb_size}")
         print(f"{'=' * 100}")
 
-        results = self.simulate_all(reference_string, frame_size)
+        results = self.simulate_all(reference_string, frame_size, algorithms=algorithms)
 
-        print(
-            f"\n{'Step':<4} {'Page':<4} {'FIFO':<18} {'LRU':<18} {'Optimal':<18} {'Custom':<18} {'Clock':<18}"
-        )
-        print("-" * 100)
+        header = "".join(f" {alg_name:<18}" for alg_name in results)
+        print(f"\n{'Step':<4} {'Page':<4}{header}")
+        print("-" * max(100, 5 + 19 * len(results)))
 
         max_steps = len(reference_string)
 
@@ -145,7 +304,7 @@ class Simulator:
                 step = data["steps"][i]
                 frame_visual = "["
                 for j in range(frame_size):
-                    if j < len(step["frames"]):
+                    if j < len(step["frames"]) and step["frames"][j] is not None:
                         frame_visual += f"{step['frames'][j]}"
                     else:
                         frame_visual += "-"
@@ -165,434 +324,309 @@ class Simulator:
 
                 representations[alg_name] = frame_visual
 
-            print(
-                f"{i + 1:<4} {page:<4} {representations['FIFO']:<18} {representations['LRU']:<18} {representations['Optimal']:<18} {representations['Custom']:<18} {representations['Clock']:<18}"
+            row = "".join(
+                f" {representation:<18}" for representation in representations.values()
             )
+            print(f"{i + 1:<4} {page:<4}{row}")
             time.sleep(0.8)
 
         print("\nLegend: *F = Page Fault, H = Page Hit, T = TLB Miss, - = Empty Slot")
         print("\nFINAL RESULTS:")
         for alg_name, data in results.items():
-            tlb_ratio = data["tlb"].get_hit_ratio() if data["tlb"] else 0
+            tlb_ratio = data["tlb"].get_hit_ratio() if data["tlb"] is not None else 0
             print(
                 f"{alg_name}: {data['faults']} page faults, TLB hit ratio: {tlb_ratio:.1f}%"
             )
 
         return results
 
-    def fifo_algorithm(self, reference_string, frame_size, virtual_addresses=None):
-        if virtual_addresses is None:
-            virtual_addresses = self.generate_virtual_addresses(reference_string)
-
-        frames = []
-        page_table = {}
-        tlb = TLB(self.tlb_size)
-        page_faults = 0
-        steps = []
-
-        for i, page in enumerate(reference_string):
-            virtual_addr = virtual_addresses[i]
-
-            if page in page_table:
-                physical_addr, frame_number, tlb_miss = self.virtual_to_physical(
-                    virtual_addr, page_table, tlb
-                )
-                steps.append(
-                    {
-                        "page": page,
-                        "frames": frames.copy(),
-                        "fault": False,
-                        "tlb_miss": tlb_miss,
-                        "virtual_addr": virtual_addr,
-                        "physical_addr": physical_addr,
-                        "tlb": tlb,
-                    }
-                )
-            else:
-                page_faults += 1
-
-                if len(frames) < frame_size:
-                    frames.append(page)
-                    frame_number = len(frames) - 1
-                    page_table[page] = frame_number
-                else:
-                    old_page = frames.pop(0)
-                    frames.append(page)
-
-                    old_frame = page_table[old_page]
-                    del page_table[old_page]
-                    tlb.invalidate(old_page)
-                    page_table[page] = old_frame
-
-                physical_addr, frame_number, tlb_miss = self.virtual_to_physical(
-                    virtual_addr, page_table, tlb
-                )
-                steps.append(
-                    {
-                        "page": page,
-                        "frames": frames.copy(),
-                        "fault": True,
-                        "tlb_miss": True,
-                        "virtual_addr": virtual_addr,
-                        "physical_addr": physical_addr,
-                        "tlb": tlb,
-                    }
-                )
-
-        return page_faults, steps
-
-    def lru_algorithm(self, reference_string, frame_size, virtual_addresses=None):
+    def parse_reference_string(self, text):
+        # "3 4w 5": a trailing "w" marks a write. Returns (pages, writes),
+        # with writes None when the string has no writes at all.
+        pages = []
+        writes = []
+        for token in text.split():
+            write = token[-1:].lower() == "w"
+            pages.append(int(token[:-1] if write else token))
+            writes.append(write)
+        return pages, writes if any(writes) else None
+
+    def with_addresses(self, reference_string, virtual_addresses=None):
+        if not hasattr(reference_string, "__len__"):
+            reference_string = list(reference_string)
         if virtual_addresses is None:
             virtual_addresses = self.generate_virtual_addresses(reference_string)
+        return reference_string, virtual_addresses
+
+    def run_policies(
+        self,
+        policies,
+        reference_string,
+        frame_size,
+        virtual_addresses=None,
+        summary=False,
+        window=1000,
+        writes=None,
+    ):
+        engine = LockstepEngine(
+            policies,
+            frame_size,
+            self.page_size,
+            self.new_tlb,
+            summary,
+            window,
+            self.cost_model,
+            self.new_page_table if self.page_table_levels else None,
+            self.flusher,
+        )
 
-        frames = []
-        page_table = {}
-        tlb = TLB(self.tlb_size)
-        page_faults = 0
-        steps = []
-
-        for i, page in enumerate(reference_string):
-            virtual_addr = virtual_addresses[i]
-
-            if page in page_table:
-                frames.remove(page)
-                frames.append(page)
-
-                physical_addr, frame_number, tlb_miss = self.virtual_to_physical(
-                    virtual_addr, page_table, tlb
-                )
-                steps.append(
-                    {
-                        "page": page,
-                        "frames": frames.copy(),
-                        "fault": False,
-                        "tlb_miss": tlb_miss,
-                        "virtual_addr": virtual_addr,
-                        "physical_addr": physical_addr,
-                        "tlb": tlb,
-                    }
-                )
-            else:
-                page_faults += 1
-
-                if len(frames) < frame_size:
-                    frames.append(page)
-                    frame_number = len(frames) - 1
-                    page_table[page] = frame_number
-                else:
-                    lru_page = frames.pop(0)
-                    frames.append(page)
-
-                    old_frame = page_table[lru_page]
-                    del page_table[lru_page]
-                    tlb.invalidate(lru_page)
-                    page_table[page] = old_frame
-
-                physical_addr, frame_number, tlb_miss = self.virtual_to_physical(
-                    virtual_addr, page_table, tlb
-                )
-                steps.append(
-                    {
-                        "page": page,
-                        "frames": frames.copy(),
-                        "fault": True,
-                        "tlb_miss": True,
-                        "virtual_addr": virtual_addr,
-                        "physical_addr": physical_addr,
-                        "tlb": tlb,
-                    }
-                )
-
-        return page_faults, steps
-
-    def optimal_algorithm(self, reference_string, frame_size, virtual_addresses=None):
-        if virtual_addresses is None:
-            virtual_addresses = self.generate_virtual_addresses(reference_string)
-
-        frames = []
-        page_table = {}
-        tlb = TLB(self.tlb_size)
-        page_faults = 0
-        steps = []
-
-        for i, page in enumerate(reference_string):
-            virtual_addr = virtual_addresses[i]
-
-            if page in page_table:
-                physical_addr, frame_number, tlb_miss = self.virtual_to_physical(
-                    virtual_addr, page_table, tlb
-                )
-                steps.append(
-                    {
-                        "page": page,
-                        "frames": frames.copy(),
-                        "fault": False,
-                        "tlb_miss": tlb_miss,
-                        "virtual_addr": virtual_addr,
-                        "physical_addr": physical_addr,
-                        "tlb": tlb,
-                    }
-                )
-            else:
-                page_faults += 1
-
-                if len(frames) < frame_size:
-                    frames.append(page)
-                    frame_number = len(frames) - 1
-                    page_table[page] = frame_number
-                else:
-                    farthest = -1
-                    page_to_remove = frames[0]
-
-                    for frame_page in frames:
-                        try:
-                            next_use = reference_string[i + 1 :].index(frame_page)
-                        except ValueError:
-                            next_use = float("inf")
-
-                        if next_use > farthest:
-                            farthest = next_use
-                            page_to_remove = frame_page
-
-                    frame_index = frames.index(page_to_remove)
-                    frames[frame_index] = page
-
-                    old_frame = page_table[page_to_remove]
-                    del page_table[page_to_remove]
-                    tlb.invalidate(page_to_remove)
-                    page_table[page] = old_frame
-
-                physical_addr, frame_number, tlb_miss = self.virtual_to_physical(
-                    virtual_addr, page_table, tlb
-                )
-                steps.append(
-                    {
-                        "page": page,
-                        "frames": frames.copy(),
-                        "fault": True,
-                        "tlb_miss": True,
-                        "virtual_addr": virtual_addr,
-                        "physical_addr": physical_addr,
-                        "tlb": tlb,
-                    }
-                )
-
-        return page_faults, steps
-
-    def custom_algorithm(self, reference_string, frame_size, virtual_addresses=None):
-        if virtual_addresses is None:
-            virtual_addresses = self.generate_virtual_addresses(reference_string)
-
-        frames = []
-        page_table = {}
-        tlb = TLB(self.tlb_size)
-        page_faults = 0
-        steps = []
-        frequency = defaultdict(int)
-        access_time = {}
-
-        for i, page in enumerate(reference_string):
-            virtual_addr = virtual_addresses[i]
-            frequency[page] += 1
-
-            if page in page_table:
-                access_time[page] = i
-
-                physical_addr, frame_number, tlb_miss = self.virtual_to_physical(
-                    virtual_addr, page_table, tlb
-                )
-                steps.append(
-                    {
-                        "page": page,
-                        "frames": frames.copy(),
-                        "fault": False,
-                        "tlb_miss": tlb_miss,
-                        "virtual_addr": virtual_addr,
-                        "physical_addr": physical_addr,
-                        "tlb": tlb,
-                    }
-                )
-            else:
-                page_faults += 1
-                access_time[page] = i
-
-                if len(frames) < frame_size:
-                    frames.append(page)
-                    frame_number = len(frames) - 1
-                    page_table[page] = frame_number
-                else:
-                    highest_score = -1
-                    page_to_remove = frames[0]
-
-                    for frame_page in frames:
-                        last_access = access_time.get(frame_page, 0)
-                        freq = frequency[frame_page]
-                        age = i - last_access
-                        score = age / freq if freq > 0 else float("inf")
-
-                        if score > highest_score:
-                            highest_score = score
-                            page_to_remove = frame_page
-
-                    frame_index = frames.index(page_to_remove)
-                    frames[frame_index] = page
-
-                    old_frame = page_table[page_to_remove]
-                    del page_table[page_to_remove]
-                    tlb.invalidate(page_to_remove)
-                    page_table[page] = old_frame
-
-                physical_addr, frame_number, tlb_miss = self.virtual_to_physical(
-                    virtual_addr, page_table, tlb
-                )
-                steps.append(
-                    {
-                        "page": page,
-                        "frames": frames.copy(),
-                        "fault": True,
-                        "tlb_miss": True,
-                        "virtual_addr": virtual_addr,
-                        "physical_addr": physical_addr,
-                        "tlb": tlb,
-                    }
-                )
-
-        return page_faults, steps
-
-    def clock_algorithm(self, reference_string, frame_size, virtual_addresses=None):
-        if virtual_addresses is None:
-            virtual_addresses = self.generate_virtual_addresses(reference_string)
-
-        frames = []
-        reference_bits = []
-        page_table = {}
-        tlb = TLB(self.tlb_size)
-        page_faults = 0
-        steps = []
-        clock_hand = 0
-
-        for i, page in enumerate(reference_string):
-            virtual_addr = virtual_addresses[i]
-
-            if page in page_table:
-                frame_index = page_table[page]
-                reference_bits[frame_index] = 1
-
-                physical_addr, _, tlb_miss = self.virtual_to_physical(
-                    virtual_addr, page_table, tlb
-                )
-                steps.append(
-                    {
-                        "page": page,
-                        "frames": frames.copy(),
-                        "fault": False,
-                        "tlb_miss": tlb_miss,
-                        "virtual_addr": virtual_addr,
-                        "physical_addr": physical_addr,
-                        "tlb": tlb,
-                        "clock_hand": clock_hand,
-                        "reference_bits": reference_bits.copy(),
-                    }
-                )
+        if summary:
+            # A trace file with a flag byte carries its own write bits.
+            chunks = None
+            if writes is None and getattr(reference_string, "has_flags", False):
+                chunks = reference_string.access_chunks()
+            # Policies that look ahead (Optimal) need the whole trace up
+            # front; everything else streams the references once.
+            if engine.needs_future:
+                reference_string = as_sequence(reference_string)
+                engine.prepare(reference_string)
+            if chunks is not None:
+                for pages, chunk_writes in chunks:
+                    engine.feed(pages.tolist(), writes=chunk_writes)
             else:
-                page_faults += 1
-
-                if len(frames) < frame_size:
-                    frames.append(page)
-                    reference_bits.append(1)
-                    page_table[page] = len(frames) - 1
-                else:
-                    replaced = False
-
-                    while not replaced:
-                        if reference_bits[clock_hand] == 0:
-                            victim_page = frames[clock_hand]
-
-                            frames[clock_hand] = page
-                            reference_bits[clock_hand] = 1
-
-                            if victim_page in page_table:
-                                del page_table[victim_page]
-                            tlb.invalidate(victim_page)
-                            page_table[page] = clock_hand
-
-                            clock_hand = (clock_hand + 1) % frame_size
-                            replaced = True
-                        else:
-                            reference_bits[clock_hand] = 0
-                            clock_hand = (clock_hand + 1) % frame_size
-
-                physical_addr, _, tlb_miss = self.virtual_to_physical(
-                    virtual_addr, page_table, tlb
-                )
-                steps.append(
-                    {
-                        "page": page,
-                        "frames": frames.copy(),
-                        "fault": True,
-                        "tlb_miss": True,
-                        "virtual_addr": virtual_addr,
-                        "physical_addr": physical_addr,
-                        "tlb": tlb,
-                        "clock_hand": clock_hand,
-                        "reference_bits": reference_bits.copy(),
-                    }
-                )
-
-        return page_faults, steps
-
-    def simulate_all(self, reference_string, frame_size):
-        results = {}
-
-        virtual_addresses = self.generate_virtual_addresses(reference_string)
-
-        fifo_faults, fifo_steps = self.fifo_algorithm(
-            reference_string, frame_size, virtual_addresses
+                engine.feed(reference_string, writes=writes)
+        else:
+            reference_string, virtual_addresses = self.with_addresses(
+                reference_string, virtual_addresses
+            )
+            engine.prepare(reference_string)
+            engine.feed(reference_string, virtual_addresses, writes)
+
+        return engine.results()
+
+    def run_policy(
+        self,
+        policy,
+        reference_string,
+        frame_size,
+        virtual_addresses=None,
+        summary=False,
+        window=1000,
+        writes=None,
+    ):
+        results = self.run_policies(
+            {policy.name: policy},
+            reference_string,
+            frame_size,
+            virtual_addresses,
+            summary,
+            window,
+            writes,
+        )
+        return results[policy.name]
+
+    def fifo_algorithm(
+        self,
+        reference_string,
+        frame_size,
+        virtual_addresses=None,
+        summary=False,
+        window=1000,
+        writes=None,
+    ):
+        return self.run_policy(
+            FIFOPolicy(),
+            reference_string,
+            frame_size,
+            virtual_addresses,
+            summary,
+            window,
+            writes,
         )
-        results["FIFO"] = {
-            "faults": fifo_faults,
-            "steps": fifo_steps,
-            "tlb": fifo_steps[-1]["tlb"] if fifo_steps else None,
-        }
 
-        lru_faults, lru_steps = self.lru_algorithm(
-            reference_string, frame_size, virtual_addresses
+    def lru_algorithm(
+        self,
+        reference_string,
+        frame_size,
+        virtual_addresses=None,
+        summary=False,
+        window=1000,
+        writes=None,
+    ):
+        return self.run_policy(
+            LRUPolicy(),
+            reference_string,
+            frame_size,
+            virtual_addresses,
+            summary,
+            window,
+            writes,
         )
-        results["LRU"] = {
-            "faults": lru_faults,
-            "steps": lru_steps,
-            "tlb": lru_steps[-1]["tlb"] if lru_steps else None,
-        }
 
-        optimal_faults, optimal_steps = self.optimal_algorithm(
-            reference_string, frame_size, virtual_addresses
+    def optimal_algorithm(
+        self,
+        reference_string,
+        frame_size,
+        virtual_addresses=None,
+        summary=False,
+        window=1000,
+        writes=None,
+    ):
+        return self.run_policy(
+            OptimalPolicy(),
+            reference_string,
+            frame_size,
+            virtual_addresses,
+            summary,
+            window,
+            writes,
         )
-        results["Optimal"] = {
-            "faults": optimal_faults,
-            "steps": optimal_steps,
-            "tlb": optimal_steps[-1]["tlb"] if optimal_steps else None,
-        }
 
-        custom_faults, custom_steps = self.custom_algorithm(
-            reference_string, frame_size, virtual_addresses
+    def custom_algorithm(
+        self,
+        reference_string,
+        frame_size,
+        virtual_addresses=None,
+        summary=False,
+        window=1000,
+        writes=None,
+    ):
+        return self.run_policy(
+            CustomPolicy(),
+            reference_string,
+            frame_size,
+            virtual_addresses,
+            summary,
+            window,
+            writes,
         )
-        results["Custom"] = {
-            "faults": custom_faults,
-            "steps": custom_steps,
-            "tlb": custom_steps[-1]["tlb"] if custom_steps else None,
-        }
 
-        clock_faults, clock_steps = self.clock_algorithm(
-            reference_string, frame_size, virtual_addresses
+    def clock_algorithm(
+        self,
+        reference_string,
+        frame_size,
+        virtual_addresses=None,
+        summary=False,
+        window=1000,
+        writes=None,
+    ):
+        return self.run_policy(
+            ClockPolicy(),
+            reference_string,
+            frame_size,
+            virtual_addresses,
+            summary,
+            window,
+            writes,
         )
-        results["Clock"] = {
-            "faults": clock_faults,
-            "steps": clock_steps,
-            "tlb": clock_steps[-1]["tlb"] if clock_steps else None,
+
+    def result_key(
+        self, reference_string, frame_size, summary, window, writes=None, names=None
+    ):
+        from resultcache import result_key, trace_digest
+
+        parameters = {
+            "frame_size": frame_size,
+            "summary": summary,
+            "window": window,
+            "page_size": self.page_size,
+            "tlb": [self.tlb_size, self.tlb_ways, self.tlb_policy],
+            "seed": self.seed,
+            "policies": {
+                name: f"{policy_class.__module__}.{policy_class.__qualname__}"
+                for name, policy_class in self.policies.items()
+                if names is None or name in names
+            },
+            "cost_model": vars(self.cost_model) if self.cost_model else None,
+            "page_table": [
+                self.page_table_levels,
+                self.page_table_bits,
+                self.walk_cache_size,
+            ],
+            "flusher": vars(self.flusher) if self.flusher else None,
         }
+        return result_key(trace_digest(reference_string, writes), parameters)
+
+    def simulate_all(
+        self,
+        reference_string,
+        frame_size,
+        summary=False,
+        window=1000,
+        writes=None,
+        algorithms=None,
+    ):
+        names = self.policy_names(algorithms or self.default_algorithms)
+        runs = None
+        key = None
+        # One-shot iterators cannot be hashed without being used up.
+        if self.result_cache is not None and hasattr(reference_string, "__len__"):
+            key = self.result_key(
+                reference_string, frame_size, summary, window, writes, names
+            )
+            runs = self.result_cache.get(key)
+
+        if runs is None:
+            policies = {name: self.policies[name]() for name in names}
+            runs = self.run_policies(
+                policies,
+                reference_string,
+                frame_size,
+                summary=summary,
+                window=window,
+                writes=writes,
+            )
+            if key is not None:
+                self.result_cache.put(key, runs)
+
+        results = {}
+        for alg_name, (faults, run) in runs.items():
+            if summary:
+                results[alg_name] = {
+                    "faults": faults,
+                    "summary": run,
+                    "tlb": run["tlb"],
+                    "costs": run.get("costs"),
+                    "page_table": run.get("page_table"),
+                    "io": run["io"],
+                }
+            else:
+                results[alg_name] = {
+                    "faults": faults,
+                    "steps": run,
+                    "tlb": run[-1]["tlb"] if run else None,
+                    "costs": run.costs,
+                    "page_table": run.page_table,
+                    "io": run.io,
+                }
 
         return results
 
+    def simulate_processes(
+        self,
+        traces,
+        frame_size,
+        algorithm="LRU",
+        replacement="global",
+        tlb_mode="asid",
+        quantum=100,
+        weights=None,
+    ):
+        from processes import MultiProcessSimulation
+
+        (name,) = self.policy_names([algorithm])
+        simulation = MultiProcessSimulation(
+            self.policies[name],
+            frame_size,
+            len(traces),
+            replacement,
+            tlb_mode,
+            self.new_tlb,
+            quantum,
+            weights,
+        )
+        return simulation.run(traces)
+
     def print_results(self, results, reference_string):
         self.clear_screen()
         print("\n" + "=" * 80)
@@ -609,14 +643,12 @@ class Simulator:
             print("Step | Page | Virtual   | Physical  | Frames | P.Fault | TLB")
             print("-" * 50)
 
-            for i, step in enumerate(data["steps"]):
+            for i, step in enumerate(data.get("steps", [])):
                 fault_str = "YES" if step["fault"] else "NO"
                 tlb_str = "MISS" if step["tlb_miss"] else "HIT"
-                frames_str = (
-                    str(step["frames"])
-                    .replace("[", "")
-                    .replace("]", "")
-                    .replace(",", "")
+                frames_str = " ".join(
+                    "-" if frame_page is None else str(frame_page)
+                    for frame_page in step["frames"]
                 )
                 virtual_str = (
                     f"0x{step['virtual_addr']:08X}" if step["virtual_addr"] else "N/A"
@@ -630,39 +662,83 @@ class Simulator:
                 )
 
             tlb = data["tlb"]
-            if tlb:
+            if tlb is not None:
                 print(f"\nPage Faults: {data['faults']}")
                 print(f"TLB Hits: {tlb.hits}")
                 print(f"TLB Misses: {tlb.misses}")
                 print(f"TLB Hit Ratio: {tlb.get_hit_ratio():.1f}%")
 
-    def plot_comparison(self, results):
-        algorithms = list(results.keys())
-        page_faults = [results[alg]["faults"] for alg in algorithms]
-        tlb_hit_ratios = [
-            results[alg]["tlb"].get_hit_ratio() if results[alg]["tlb"] else 0
-            for alg in algorithms
-        ]
-
-        fig, (ax1, ax2) = plt.subplots(1, 2, figsize=(12, 5))
-
-        colors = ["blue", "red", "green", "orange", "purple"]
-
-        ax1.bar(algorithms, page_faults, color=colors)
-        ax1.set_title("Page Faults Comparison")
-        ax1.set_ylabel("Number of Page Faults")
+            costs = data.get("costs")
+            if costs:
+                print(f"Effective Access Time: {costs['eat']:.1f} ns")
+                print(f"Total Simulated Time: {costs['total_time'] / 1e6:.3f} ms")
+                print(
+                    f"Minor/Major Faults: {costs['minor_faults']}/{costs['major_faults']}"
+                )
 
-        ax2.bar(algorithms, tlb_hit_ratios, color=colors)
-        ax2.set_title("TLB Hit Ratio Comparison")
-        ax2.set_ylabel("TLB Hit Ratio (%)")
-        ax2.set_ylim(0, 100)
+            io = data.get("io")
+            if io and io["writeback_bytes"]:
+                print(
+                    f"Clean/Dirty Evictions: "
+                    f"{io['clean_evictions']}/{io['dirty_evictions']}"
+                )
+                if io["background_writebacks"]:
+                    print(f"Background Write-backs: {io['background_writebacks']}")
+                print(f"Write-back I/O: {io['writeback_bytes'] / 1024:.0f} KiB")
 
-        plt.tight_layout()
-        print("Graph displayed. Press Enter in terminal to close...")
-        plt.show(block=False)
+            page_table = data.get("page_table")
+            if page_table:
+                print(
+                    f"Page Walks: {page_table['walks']} "
+                    f"({page_table['references_per_walk']:.2f} memory references each, "
+                    f"{page_table['walk_cache_hits']} walk cache hits)"
+                )
 
-        input()
-        plt.close(fig)
-        plt.close("all")
-        plt.clf()
-        plt.cla()
+            summary = data.get("summary")
+            if summary:
+                print(f"Evictions: {summary['evictions']}")
+                print(f"Fault rate per {summary['window']} references:")
+                print(
+                    " ".join(
+                        f"{rate:.3f}" for rate in summary["window_fault_rates"]
+                    )
+                )
+                if "window_resident_sizes" in summary:
+                    print(f"Mean resident set per {summary['window']} references:")
+                    print(
+                        " ".join(
+                            f"{size:.1f}" for size in summary["window_resident_sizes"]
+                        )
+                    )
+                for key, value in summary.get("policy", {}).items():
+                    print(f"{key}: {value}")
+
+    def resident_set_sizes(self, results):
+        # Resident-set size over time for the variable-allocation policies,
+        # as (sizes, references per size): per reference from a step log,
+        # per window from a summary.
+        sizes = {}
+        for alg_name, data in results.items():
+            steps = data.get("steps")
+            summary = data.get("summary", {})
+            if steps is not None and "resident" in steps.extras:
+                sizes[alg_name] = (steps.extras["resident"], 1)
+            elif "window_resident_sizes" in summary:
+                sizes[alg_name] = (summary["window_resident_sizes"], summary["window"])
+        return sizes
+
+    def plot_comparison(self, results, curves=None, path=None):
+        # Opens a window when there is a display; otherwise saves to `path`
+        # (a temporary file by default) and returns where it went.
+        from plotting import show_comparison
+
+        resident = self.resident_set_sizes(results) if results else {}
+        return show_comparison(results, curves, resident, path)
+
+    def save_comparison(self, path, results, curves=None):
+        # Renders straight to a file (PNG, SVG, PDF by extension) without
+        # starting a GUI backend or waiting for input.
+        from plotting import save_comparison
+
+        resident = self.resident_set_sizes(results) if results else {}
+        save_comparison(path, results, curves, resident)
@@ -0,0 +1,49 @@
+MASK = (1 << 64) - 1
+SEEDS = (
+    0x9E3779B97F4A7C15,
+    0xC2B2AE3D27D4EB4F,
+    0x165667B19E3779F9,
+    0xD6E8FEB86659FD93,
+)
+# Halves every counter in one bytes.translate call when the sketch ages.
+HALVE = bytes(value >> 1 for value in range(256))
+
+
+class CountMinSketch:
+    # Approximate access counts in a fixed amount of memory: one row of
+    # saturating byte counters per hash function, and a key's estimate is
+    # the smallest of its counters. Counters are halved every `sample_size`
+    # increments so old popularity fades.
+
+    def __init__(self, width, depth=4, sample_size=None, max_count=15):
+        if depth > len(SEEDS):
+            raise ValueError(f"Sketch depth must be at most {len(SEEDS)}")
+        width = 1 << max(width - 1, 1).bit_length()
+        self.width = width
+        self.shift = 64 - (width.bit_length() - 1)
+        self.seeds = SEEDS[:depth]
+        self.rows = [bytearray(width) for _ in self.seeds]
+        self.sample_size = sample_size or 10 * width
+        self.max_count = max_count
+        self.additions = 0
+
+    def indexes(self, key):
+        key = hash(key) & MASK
+        shift = self.shift
+        return [((key * seed) & MASK) >> shift for seed in self.seeds]
+
+    def estimate(self, key):
+        return min(row[index] for row, index in zip(self.rows, self.indexes(key)))
+
+    def increment(self, key):
+        for row, index in zip(self.rows, self.indexes(key)):
+            if row[index] < self.max_count:
+                row[index] += 1
+
+        self.additions += 1
+        if self.additions >= self.sample_size:
+            self.age()
+
+    def age(self):
+        self.rows = [bytearray(row.translate(HALVE)) for row in self.rows]
+        self.additions //= 2
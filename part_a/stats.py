@@ -0,0 +1,60 @@
+from array import array
+
+
+class RunSummary:
+    def __init__(self, window=1000):
+        if window <= 0:
+            raise ValueError("Window size must be positive")
+        self.window = window
+        self.references = 0
+        self.faults = 0
+        self.evictions = 0
+        self.window_faults = 0
+        self.window_fault_rates = array("d")
+        self.window_resident = 0
+        self.window_resident_sizes = None
+
+    def record(self, fault, evicted=False, resident=None):
+        self.references += 1
+        if resident is not None:
+            if self.window_resident_sizes is None:
+                self.window_resident_sizes = array("d")
+            self.window_resident += resident
+        if fault:
+            self.faults += 1
+            self.window_faults += 1
+            if evicted:
+                self.evictions += 1
+
+        if self.references % self.window == 0:
+            self.window_fault_rates.append(self.window_faults / self.window)
+            self.window_faults = 0
+            if self.window_resident_sizes is not None:
+                self.window_resident_sizes.append(self.window_resident / self.window)
+                self.window_resident = 0
+
+    def result(self, tlb):
+        rates = array("d", self.window_fault_rates)
+        partial = self.references % self.window
+        if partial:
+            rates.append(self.window_faults / partial)
+
+        summary = {
+            "references": self.references,
+            "faults": self.faults,
+            "hits": self.references - self.faults,
+            "evictions": self.evictions,
+            "tlb_hits": tlb.hits,
+            "tlb_misses": tlb.misses,
+            "window": self.window,
+            "window_fault_rates": rates,
+            "tlb": tlb,
+        }
+
+        # Mean resident-set size per window, for variable-allocation policies.
+        if self.window_resident_sizes is not None:
+            sizes = array("d", self.window_resident_sizes)
+            if partial:
+                sizes.append(self.window_resident / partial)
+            summary["window_resident_sizes"] = sizes
+        return summary
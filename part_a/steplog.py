@@ -0,0 +1,155 @@
+from array import array
+from bisect import bisect_left, bisect_right
+from collections import OrderedDict
+
+# Marks an empty frame in the change columns.
+EMPTY = -(2**63)
+
+
+class StepLog:
+    # Per-step values live in typed columns and frame contents are stored as
+    # (slot, old page, new page) changes, with a full snapshot every
+    # `keyframe_interval` steps so any step can be rebuilt quickly.
+    #
+    # "slots" layout shows frames by slot and a change overwrites one slot.
+    # "queue" layout shows frames oldest first: a change drops the old page
+    # wherever it is and appends the new one (FIFO arrival order, LRU
+    # recency order).
+
+    def __init__(self, tlb, frame_size, layout="slots", keyframe_interval=None):
+        if layout not in ("slots", "queue"):
+            raise ValueError(f"Unknown frame layout: {layout}")
+        self.tlb = tlb
+        self.layout = layout
+        self.keyframe_interval = keyframe_interval or max(256, 4 * frame_size)
+
+        self.page = array("q")
+        self.fault = array("b")
+        self.tlb_miss = array("b")
+        self.virtual_addr = array("q")
+        self.physical_addr = array("q")
+        self.extras = {}
+
+        self.change_step = array("q")
+        self.change_slot = array("l")
+        self.change_old = array("q")
+        self.change_new = array("q")
+
+        self.keyframes = []
+        self.current = self.new_state()
+        self.cursor = None
+        # Totals from the engine's cost model and page table model, when
+        # those are in use.
+        self.costs = None
+        self.page_table = None
+        # Clean / dirty eviction and write-back totals from the engine.
+        self.io = None
+
+    def __len__(self):
+        return len(self.page)
+
+    def new_state(self, frames=()):
+        if self.layout == "queue":
+            return OrderedDict.fromkeys(frames)
+        return list(frames)
+
+    def apply(self, state, slot, old, new):
+        if self.layout == "queue":
+            if old != EMPTY:
+                del state[old]
+            if new != EMPTY:
+                state[new] = None
+        elif slot == len(state):
+            state.append(new)
+        else:
+            state[slot] = None if new == EMPTY else new
+
+    def checkpoint(self):
+        step = len(self.page)
+        if step == len(self.keyframes) * self.keyframe_interval:
+            self.keyframes.append(list(self.current))
+
+    def change(self, slot, old, new):
+        self.checkpoint()
+        self.change_step.append(len(self.page))
+        self.change_slot.append(slot)
+        self.change_old.append(old)
+        self.change_new.append(new)
+        self.apply(self.current, slot, old, new)
+
+    def append(self, page, fault, tlb_miss, virtual_addr, physical_addr, extra=None):
+        self.checkpoint()
+        step = len(self.page)
+        self.page.append(page)
+        self.fault.append(fault)
+        self.tlb_miss.append(tlb_miss)
+        self.virtual_addr.append(-1 if virtual_addr is None else virtual_addr)
+        self.physical_addr.append(-1 if physical_addr is None else physical_addr)
+
+        if extra:
+            for key, value in extra.items():
+                column = self.extras.get(key)
+                if column is None:
+                    column = self.extras[key] = array("q", bytes(8 * step))
+                column.append(value)
+
+    def record(self, step, frames):
+        virtual_addr = self.virtual_addr[step]
+        physical_addr = self.physical_addr[step]
+        record = {
+            "page": self.page[step],
+            "frames": frames,
+            "fault": bool(self.fault[step]),
+            "tlb_miss": bool(self.tlb_miss[step]),
+            "virtual_addr": None if virtual_addr < 0 else virtual_addr,
+            "physical_addr": None if physical_addr < 0 else physical_addr,
+            "tlb": self.tlb,
+        }
+        for key, column in self.extras.items():
+            record[key] = column[step]
+        return record
+
+    def replay(self, state, start, end):
+        # Apply the changes recorded for steps start..end-1.
+        first = bisect_left(self.change_step, start)
+        last = bisect_left(self.change_step, end)
+        for index in range(first, last):
+            self.apply(
+                state,
+                self.change_slot[index],
+                self.change_old[index],
+                self.change_new[index],
+            )
+
+    def frames_at(self, step):
+        keyframe = step // self.keyframe_interval
+        done = keyframe * self.keyframe_interval
+        if self.cursor is not None and done <= self.cursor[0] <= step + 1:
+            done, state = self.cursor
+        else:
+            state = self.new_state(self.keyframes[keyframe])
+
+        self.replay(state, done, step + 1)
+        self.cursor = (step + 1, state)
+        return list(state)
+
+    def __getitem__(self, step):
+        if step < 0:
+            step += len(self.page)
+        if not 0 <= step < len(self.page):
+            raise IndexError("step index out of range")
+        return self.record(step, self.frames_at(step))
+
+    def __iter__(self):
+        state = self.new_state()
+        for step in range(len(self.page)):
+            self.replay(state, step, step + 1)
+            yield self.record(step, list(state))
+
+    def changes(self, step):
+        first = bisect_left(self.change_step, step)
+        last = bisect_right(self.change_step, step)
+        return [
+            (self.change_slot[index], self.change_old[index], self.change_new[index])
+            for index in range(first, last)
+        ]
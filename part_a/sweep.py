@@ -0,0 +1,233 @@
+import argparse
+import csv
+import json
+import sys
+
+import numpy as np
+
+from pagesweep import PAGE_SIZES, format_table, page_size_sweep
+from parallel import ALGORITHMS, ParallelRunner
+from trace_reader import TraceReader
+
+FIELDS = [
+    "algorithm",
+    "frame_size",
+    "tlb_size",
+    "page_size",
+    "references",
+    "faults",
+    "hits",
+    "evictions",
+    "fault_rate",
+    "tlb_hits",
+    "tlb_misses",
+    "tlb_hit_ratio",
+    "minor_faults",
+    "major_faults",
+    "eat",
+    "total_time",
+]
+IO_FIELDS = ["clean_evictions", "dirty_evictions", "writeback_bytes"]
+
+
+def parse_values(spec, name="value"):
+    # Sizes and counts: a list of integers and inclusive start:stop:step
+    # ranges, every one at least 1.
+    values = []
+    for part in spec.split(","):
+        part = part.strip()
+        if not part:
+            continue
+        if ":" in part:
+            bounds = [int(bound) for bound in part.split(":")]
+            start, stop = bounds[0], bounds[1]
+            step = bounds[2] if len(bounds) > 2 else 1
+            values.extend(range(start, stop + 1, step))
+        else:
+            values.append(int(part))
+    if not values:
+        raise ValueError(f"No {name} in {spec!r}")
+    if min(values) < 1:
+        raise ValueError(f"Every {name} must be at least 1, got {min(values)}")
+    return values
+
+
+def positive_int(text):
+    # argparse type for single sizes, matching parse_values.
+    value = int(text)
+    if value < 1:
+        raise argparse.ArgumentTypeError(f"must be at least 1, got {value}")
+    return value
+
+
+def parse_algorithms(spec):
+    names = {name.lower(): name for name in ALGORITHMS}
+    algorithms = []
+    for part in spec.split(","):
+        name = names.get(part.strip().lower())
+        if name is None:
+            raise ValueError(f"Unknown algorithm: {part.strip()}")
+        algorithms.append(name)
+    return algorithms
+
+
+def load_grid(args):
+    grid = {
+        "algorithm": parse_algorithms(args.algorithms),
+        "frame_size": parse_values(args.frames, "frame count"),
+        "tlb_size": parse_values(args.tlb, "TLB size"),
+        "page_size": (
+            parse_values(args.page_size, "page size") if args.page_size else None
+        ),
+    }
+    if args.grid:
+        with open(args.grid) as f:
+            spec = json.load(f)
+        for key, value in spec.items():
+            if key not in grid:
+                raise ValueError(f"Unknown grid key: {key}")
+            if key == "algorithm":
+                grid[key] = parse_algorithms(",".join(value))
+            else:
+                grid[key] = parse_values(
+                    ",".join(str(item) for item in value), key.replace("_", " ")
+                )
+    return grid
+
+
+def load_pages(path):
+    if path == "-":
+        return np.array(sys.stdin.read().split(), dtype=np.int64)
+    with open(path) as f:
+        return np.array(f.read().split(), dtype=np.int64)
+
+
+def write_rows(rows, output_format, out, fields=FIELDS):
+    if output_format == "csv":
+        writer = csv.DictWriter(out, fieldnames=fields)
+        writer.writeheader()
+        writer.writerows(rows)
+    else:
+        for row in rows:
+            out.write(json.dumps(row) + "\n")
+
+
+def write_tables(result, output_format, out):
+    if output_format == "json":
+        for field in ("faults", "tlb_misses"):
+            out.write(json.dumps({"table": field, "rows": result[field]}) + "\n")
+        return
+    out.write(format_table(result["faults"], "faults") + "\n\n")
+    out.write(format_table(result["tlb_misses"], "tlb_misses") + "\n")
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(
+        description="Run page replacement simulations over a parameter grid"
+    )
+    add_arguments(parser)
+    return parser
+
+
+def add_arguments(parser):
+    parser.add_argument("trace", help="trace file, or - for page numbers on stdin")
+    parser.add_argument(
+        "--trace-format",
+        choices=["pages", "u32", "u64"],
+        default="pages",
+        help="space-separated page numbers or binary little-endian addresses",
+    )
+    parser.add_argument(
+        "--flags", action="store_true", help="binary records carry a flag byte"
+    )
+    parser.add_argument("--algorithms", default=",".join(ALGORITHMS))
+    parser.add_argument("--frames", default="4", help="e.g. 4,8,16 or 1:64:1")
+    parser.add_argument("--tlb", default="4")
+    parser.add_argument(
+        "--page-size", help="default 4096, or 4K..2M with --page-size-tables"
+    )
+    parser.add_argument("--grid", help="JSON file with lists per grid key")
+    parser.add_argument(
+        "--page-size-tables",
+        action="store_true",
+        help="binary traces only: print faults and TLB misses by page size "
+        "(first --frames and --tlb values; --memory sets frames per page size)",
+    )
+    parser.add_argument("--memory", type=positive_int, help="memory size in bytes")
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--window", type=int, default=1000)
+    parser.add_argument("--format", choices=["csv", "json"], default="csv")
+    parser.add_argument("--output", help="output file (default: stdout)")
+
+
+def run_sweep(args, out):
+    grid = load_grid(args)
+
+    if args.trace_format == "pages":
+        if args.flags:
+            raise ValueError("--flags needs a binary trace")
+        reader = None
+        trace = load_pages(args.trace)
+    else:
+        width = 4 if args.trace_format == "u32" else 8
+        reader = TraceReader(args.trace, address_width=width, has_flags=args.flags)
+        trace = reader.addresses()
+    writes = reader.writes() if reader is not None else None
+    fields = FIELDS + IO_FIELDS if writes is not None else FIELDS
+
+    try:
+        if args.page_size_tables:
+            if reader is None:
+                raise ValueError("--page-size-tables needs a binary address trace")
+            if writes is not None:
+                raise ValueError("--page-size-tables does not take --flags")
+            result = page_size_sweep(
+                trace,
+                grid["algorithm"],
+                None if args.memory else grid["frame_size"][0],
+                args.memory,
+                grid["page_size"] or PAGE_SIZES,
+                grid["tlb_size"][0],
+                args.workers,
+                args.window,
+            )
+            del trace
+            write_tables(result, args.format, out)
+            return
+        with ParallelRunner(
+            trace,
+            addresses=reader is not None,
+            workers=args.workers,
+            window=args.window,
+            writes=writes,
+        ) as runner:
+            del trace, writes
+            rows = runner.sweep(
+                grid["algorithm"],
+                grid["frame_size"],
+                grid["tlb_size"],
+                grid["page_size"] or [4096],
+            )
+    finally:
+        if reader is not None:
+            reader.close()
+
+    write_rows(rows, args.format, out, fields)
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    try:
+        if args.output:
+            with open(args.output, "w", newline="") as out:
+                run_sweep(args, out)
+        else:
+            run_sweep(args, sys.stdout)
+    except (OSError, ValueError) as error:
+        sys.stderr.write(f"error: {error}\n")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,73 @@
+import json
+
+import numpy as np
+import pytest
+
+import cli
+from trace_reader import write_trace
+
+
+def run(tmp_path, *argv):
+    trace = tmp_path / "trace.txt"
+    trace.write_text("1 2 3 1 4 1 2 5 1 2 3 4 5 " * 20)
+    output = tmp_path / "out.json"
+    status = cli.main([argv[0], str(trace), *argv[1:], "--output", str(output)])
+    assert status == 0
+    return [json.loads(line) for line in output.read_text().splitlines()]
+
+
+def test_mrc_defaults_to_exact_lru_and_optimal(tmp_path):
+    rows = run(tmp_path, "mrc", "--frames", "3")
+    assert [row["algorithm"] for row in rows] == ["LRU", "Optimal"]
+
+
+def test_sampled_mrc_defaults_to_policies_without_look_ahead(tmp_path):
+    rows = run(tmp_path, "mrc", "--frames", "3", "--sampled")
+    assert [row["algorithm"] for row in rows] == ["LRU", "FIFO"]
+
+
+def test_sampled_mrc_rejects_optimal(tmp_path, capsys):
+    trace = tmp_path / "trace.txt"
+    trace.write_text("1 2 3")
+    assert cli.main(["mrc", str(trace), "--sampled", "--algorithms", "Optimal"]) == 1
+    assert "Optimal" in capsys.readouterr().err
+
+
+@pytest.mark.parametrize(
+    "argv",
+    [
+        ["simulate", "--frames", "0"],
+        ["simulate", "--frames=-2,4"],
+        ["simulate", "--tlb", "0"],
+        ["simulate", "--frames", "5:1"],
+        ["bench", "--frames", "0", "--repeat", "1"],
+        ["mrc", "--frames", "0"],
+    ],
+)
+def test_sizes_below_one_are_rejected(tmp_path, capsys, argv):
+    trace = tmp_path / "trace.txt"
+    trace.write_text("1 2 3")
+    assert cli.main([argv[0], str(trace), *argv[1:]]) == 1
+    assert capsys.readouterr().err.startswith("error: ")
+
+
+@pytest.mark.parametrize("workers", ["1", "2"])
+def test_sweep_flags_reach_the_jobs(tmp_path, workers):
+    rng = np.random.default_rng(3)
+    trace = tmp_path / "trace.bin"
+    write_trace(
+        trace,
+        rng.integers(0, 12, 2000) * 4096 + rng.integers(0, 4096, 2000),
+        flags=rng.integers(0, 2, 2000),
+    )
+    argv = [str(trace), "--trace-format", "u64", "--flags", "--frames", "4,8"]
+    argv += ["--algorithms", "FIFO,LRU,ESC", "--format", "json"]
+    rows = {}
+    for command, extra in (("simulate", []), ("sweep", ["--workers", workers])):
+        output = tmp_path / f"{command}.json"
+        assert cli.main([command, *argv, *extra, "--output", str(output)]) == 0
+        rows[command] = [json.loads(line) for line in output.read_text().splitlines()]
+    for command in rows:
+        rows[command].sort(key=lambda row: (row["algorithm"], row["frame_size"]))
+    assert rows["sweep"] == rows["simulate"]
+    assert all(row["dirty_evictions"] > 0 for row in rows["sweep"])
@@ -0,0 +1,44 @@
+import pytest
+
+from costs import CostModel
+from simulator import Simulator
+
+REFERENCES = [1, 2, 3, 1, 4, 1, 2, 5, 3, 1]
+WRITES = [True, False, True, False, False, True, False, False, False, False]
+
+
+def test_reference_time_adds_each_cost_once():
+    model = CostModel()
+    assert model.reference_time(False) == 101
+    assert model.reference_time(True) == 101 + 400
+    assert model.reference_time(True, walk_references=1) == 101 + 100
+    assert model.reference_time(True, fault=True, first_touch=True) == 501 + 1_000
+    assert model.reference_time(True, fault=True, writeback=True) == 501 + 200_000
+
+
+def test_costs_split_minor_and_major_faults():
+    costs = CostModel().costs(10, 4, 6, 5, writebacks=1)
+    assert costs["minor_faults"] == 5
+    assert costs["major_faults"] == 1
+    assert costs["fault_time"] == 5 * 1_000 + 100_000
+    assert costs["total_time"] == sum(
+        costs[key]
+        for key in ("tlb_time", "walk_time", "memory_time", "fault_time", "writeback_time")
+    )
+    assert costs["eat"] == costs["total_time"] / 10
+    assert CostModel().costs(0, 0, 0, 0)["eat"] == 0
+
+
+@pytest.mark.parametrize("levels", [None, 3])
+def test_per_step_times_add_up_to_the_summary(levels):
+    simulator = Simulator()
+    simulator.page_table_levels = levels
+    steps = simulator.simulate_all(REFERENCES, 3, writes=WRITES)
+    summaries = simulator.simulate_all(REFERENCES, 3, summary=True, writes=WRITES)
+    for name, result in steps.items():
+        costs = result["costs"]
+        assert sum(step["time"] for step in result["steps"]) == costs["total_time"]
+        assert summaries[name]["costs"] == costs
+        # Every page's first fault is minor, whatever the policy.
+        assert costs["minor_faults"] == len(set(REFERENCES))
+        assert costs["major_faults"] == result["faults"] - len(set(REFERENCES))
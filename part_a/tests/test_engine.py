@@ -0,0 +1,56 @@
+import numpy as np
+import pytest
+
+from costs import CostModel
+from engine import BackgroundFlusher, LockstepEngine
+from policies import POLICIES
+
+
+def run(names, pages, writes, summary):
+    engine = LockstepEngine(
+        {name: POLICIES[name]() for name in names},
+        6,
+        summary=summary,
+        window=100,
+        cost_model=CostModel(),
+        flusher=BackgroundFlusher(interval=50, batch=2),
+    )
+    engine.prepare(pages)
+    engine.feed(pages, writes=writes)
+    return engine.results()
+
+
+def without_tlb(steps):
+    return [
+        {key: value for key, value in step.items() if key != "tlb"} for step in steps
+    ]
+
+
+@pytest.mark.parametrize("summary", [True, False])
+def test_lockstep_runs_match_one_policy_at_a_time(summary):
+    rng = np.random.default_rng(8)
+    pages = (rng.zipf(1.3, 1_500) % 30).tolist()
+    writes = (rng.random(1_500) < 0.3).tolist()
+    names = list(POLICIES)
+    together = run(names, pages, writes, summary)
+    for name in names:
+        faults, alone = run([name], pages, writes, summary)[name]
+        shared = together[name][1]
+        assert together[name][0] == faults
+        if summary:
+            for key in ("hits", "evictions", "tlb_hits", "window_fault_rates"):
+                assert shared[key] == alone[key]
+            assert (shared["io"], shared["costs"]) == (alone["io"], alone["costs"])
+        else:
+            assert without_tlb(shared) == without_tlb(alone)
+            assert (shared.io, shared.costs) == (alone.io, alone.costs)
+
+
+def test_feed_addresses_pages_by_the_page_size():
+    addresses = np.array([0, 4095, 4096, 8192 * 3 + 5, 4100], dtype=np.uint64)
+    engine = LockstepEngine({"FIFO": POLICIES["FIFO"]()}, 4, page_size=4096)
+    engine.feed_addresses(addresses)
+    steps = engine.results()["FIFO"][1]
+    assert [step["page"] for step in steps] == [0, 0, 1, 6, 1]
+    assert [step["fault"] for step in steps] == [True, False, True, True, False]
+    assert [step["physical_addr"] for step in steps] == [0, 4095, 4096, 8197, 4100]
@@ -0,0 +1,94 @@
+import numpy as np
+import pytest
+
+from hugepages import GIB, KIB, MIB, MultiSizeTLB, RegionMap, simulate_translation
+
+
+def test_region_map_page_sizes():
+    regions = RegionMap()
+    regions.add(4 * MIB, 4 * MIB, 2 * MIB)
+    regions.promote(GIB - 4 * KIB, GIB + 8 * KIB)
+    addresses = [0, 4 * MIB, 8 * MIB - 1, 8 * MIB, GIB + 5]
+    assert [regions.page_size(address) for address in addresses] == [
+        4 * KIB,
+        2 * MIB,
+        2 * MIB,
+        4 * KIB,
+        2 * MIB,
+    ]
+    assert regions.page_sizes(addresses).tolist() == [
+        regions.page_size(address) for address in addresses
+    ]
+
+
+def test_region_map_rejects_overlap_and_misalignment():
+    regions = RegionMap()
+    regions.add(0, 4 * MIB, 2 * MIB)
+    with pytest.raises(ValueError):
+        regions.add(2 * MIB, 2 * MIB, 2 * MIB)
+    with pytest.raises(ValueError):
+        regions.add(4 * MIB + 4 * KIB, 2 * MIB, 2 * MIB)
+
+
+@pytest.mark.parametrize(
+    "unified, ways",
+    [(False, None), (False, 4), (True, None), (True, 4), (True, 1)],
+)
+def test_working_set_that_fits_hits_in_every_geometry(unified, ways):
+    # 64 pages in a 64-entry TLB: after the cold misses everything hits,
+    # whether the entries are split or unified, fully or set associative.
+    entries = 64 if unified else {4 * KIB: 64}
+    tlb = MultiSizeTLB(entries, unified=unified, ways=ways)
+    for _ in range(10):
+        for page in range(64):
+            tlb.lookup(page * 4 * KIB, 4 * KIB)
+
+    stats = tlb.stats()
+    assert stats["hit_ratio"] == pytest.approx(90.0)
+    assert tlb.entries_by_size() == {4 * KIB: 64}
+
+
+def test_unified_tlb_mixes_page_sizes():
+    tlb = MultiSizeTLB(64, unified=True)
+    for _ in range(5):
+        for page in range(40):
+            tlb.lookup(page * 4 * KIB, 4 * KIB)
+        for page in range(20):
+            tlb.lookup(page * 2 * MIB, 2 * MIB)
+
+    # Page 0 exists at both sizes and must not be confused between them.
+    assert tlb.entries_by_size() == {4 * KIB: 40, 2 * MIB: 20}
+    assert tlb.stats()["hit_ratio"] == pytest.approx(80.0)
+
+
+def test_huge_pages_extend_reach():
+    addresses = np.arange(0, 64 * MIB, 64 * KIB, dtype=np.int64)
+    regions = RegionMap()
+    regions.add(0, 64 * MIB, 2 * MIB)
+    small = simulate_translation(np.tile(addresses, 3))
+    huge = simulate_translation(np.tile(addresses, 3), regions)
+    assert huge["hit_ratio"] > small["hit_ratio"]
+    assert huge["by_page_size"][2 * MIB]["reach"] == 32 * 2 * MIB
+
+
+def test_simulator_translation_with_a_set_associative_unified_tlb():
+    from simulator import Simulator
+
+    simulator = Simulator()
+    simulator.tlb_ways = 4
+    addresses = np.tile(np.arange(64, dtype=np.int64) * 4 * KIB, 10)
+    unified = simulator.translation_by_page_size(addresses, unified=True, entries=64)
+    split = simulator.translation_by_page_size(addresses, entries={4 * KIB: 64})
+    assert unified["hit_ratio"] == split["hit_ratio"] == pytest.approx(90.0)
+
+
+@pytest.mark.parametrize("unified", [False, True])
+def test_default_pools_round_up_to_whole_sets(unified):
+    tlb = MultiSizeTLB(unified=unified, ways=8)
+    sizes = [tlb.pool.size] if unified else [pool.size for pool in tlb.pools.values()]
+    assert sizes == ([104] if unified else [64, 32, 8])
+
+
+def test_explicit_pools_must_fill_whole_sets():
+    with pytest.raises(ValueError, match="tlb_ways=8"):
+        MultiSizeTLB({4 * KIB: 64, 1 * GIB: 4}, ways=8)
@@ -0,0 +1,38 @@
+import random
+
+import numpy as np
+import pytest
+
+from mrc import lru_curve, optimal_curve
+from simulator import Simulator
+
+
+def trace(seed, length=600, pages=25):
+    rng = random.Random(seed)
+    return [int(rng.paretovariate(1.1)) % pages for _ in range(length)]
+
+
+@pytest.mark.parametrize("seed", [0, 1, 2])
+def test_exact_curves_match_a_run_per_frame_size(seed):
+    simulator = Simulator()
+    pages = trace(seed)
+    curves = simulator.miss_ratio_curves(np.array(pages))
+    distinct = len(set(pages))
+    assert len(curves["LRU"]) == len(curves["Optimal"]) == distinct
+    for frame_size in range(1, distinct + 3):
+        runs = simulator.simulate_all(
+            pages, frame_size, summary=True, algorithms=["LRU", "Optimal"]
+        )
+        for name, curve in curves.items():
+            assert curve.faults_at(frame_size) == runs[name]["faults"]
+
+
+def test_truncated_curves_refuse_larger_memories():
+    pages = trace(3)
+    full = lru_curve(pages)
+    for curve in (lru_curve(pages, 5), optimal_curve(pages, 5)):
+        assert len(curve) == 5 and not curve.complete
+        with pytest.raises(ValueError):
+            curve.faults_at(6)
+    assert list(lru_curve(pages, 5).faults) == list(full.faults[:5])
+    assert full.complete and full.faults_at(1_000) == len(set(pages))
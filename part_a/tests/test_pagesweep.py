@@ -0,0 +1,56 @@
+import numpy as np
+import pytest
+
+from pagesweep import PAGE_SIZES, collapse_repeats, page_size_sweep, page_streams
+from parallel import ParallelRunner
+from sweep import FIELDS
+
+ALGORITHM_NAMES = ["FIFO", "LRU", "Optimal", "Custom", "Clock", "2Q", "ARC"]
+
+
+def addresses(length=2_000):
+    # Mostly short strides inside a few hot regions, so pages repeat at
+    # the small sizes and whole regions share a page at the large ones.
+    rng = np.random.default_rng(9)
+    regions = rng.integers(0, 1 << 14, 12) << 20
+    steps = rng.integers(0, 1 << 18, length)
+    return (regions[rng.integers(0, 12, length)] + steps).astype(np.uint64)
+
+
+def key(row):
+    return row["algorithm"], row["page_size"]
+
+
+def full_runs(trace, frame_size=None, memory=None):
+    rows = []
+    with ParallelRunner(trace, addresses=True, workers=1) as runner:
+        for page_size in PAGE_SIZES:
+            frames = frame_size or max(1, memory // page_size)
+            rows += runner.sweep(ALGORITHM_NAMES, [frames], [8], [page_size])
+    return sorted(rows, key=key)
+
+
+@pytest.mark.parametrize("frame_size, memory", [(6, None), (None, 1 << 22)])
+def test_rows_match_a_full_run_per_page_size(frame_size, memory):
+    trace = addresses()
+    result = page_size_sweep(
+        trace, ALGORITHM_NAMES, frame_size, memory, PAGE_SIZES, 8, workers=2
+    )
+    rows = sorted(result["rows"], key=key)
+    expected = full_runs(trace, frame_size, memory)
+    assert [key(row) for row in rows] == [key(row) for row in expected]
+    for row, full in zip(rows, expected):
+        for field in FIELDS:
+            assert row[field] == pytest.approx(full[field]), (key(row), field)
+        assert result["faults"][row["algorithm"]][row["page_size"]] == full["faults"]
+
+
+def test_streams_collapse_every_page_size_like_a_direct_shift():
+    trace = addresses()
+    streams = page_streams(trace)
+    for page_size, stream in streams.items():
+        direct = collapse_repeats((trace // np.uint64(page_size)).astype(np.int64))
+        assert stream.tolist() == direct.tolist()
+    assert len(streams[1 << 21]) < len(streams[1 << 12])
+    with pytest.raises(ValueError):
+        page_streams(trace, [4096, 6144])
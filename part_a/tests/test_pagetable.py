@@ -0,0 +1,66 @@
+import pytest
+
+from pagetable import PageTable
+from simulator import Simulator
+
+
+def test_map_walk_and_unmap():
+    table = PageTable(levels=3, bits_per_level=4)
+    table.map(0x123, 7)
+    table.map(0xFFF, 8)
+    assert len(table) == 2
+    assert table.get(0x123) == 7
+    assert 0xFFF in table
+    assert table.get(0x124, "missing") == "missing"
+
+    table.unmap(0x123)
+    table.unmap(0x123)
+    assert len(table) == 1
+    assert 0x123 not in table
+    assert table.walk(0x123)[0] is None
+
+
+def test_rejects_page_numbers_and_shapes_it_cannot_hold():
+    table = PageTable(levels=2, bits_per_level=[2, 3])
+    with pytest.raises(ValueError):
+        table.map(1 << 5, 0)
+    with pytest.raises(ValueError):
+        PageTable(levels=6)
+    with pytest.raises(ValueError):
+        PageTable(levels=3, bits_per_level=[9, 9])
+
+
+def test_walk_cache_skips_known_levels():
+    table = PageTable(levels=4, bits_per_level=9)
+    table.map(0, 1)
+    table.map(1, 2)
+    assert table.walk(0) == (1, 4)
+    # Page 1 shares every upper level with page 0: only the leaf is read.
+    assert table.walk(1) == (2, 1)
+
+    uncached = PageTable(levels=4, bits_per_level=9, walk_cache_size=0)
+    uncached.map(0, 1)
+    uncached.map(1, 2)
+    assert [uncached.walk(page)[1] for page in (0, 1)] == [4, 4]
+
+
+def test_walk_stops_at_the_first_missing_node():
+    table = PageTable(levels=4, bits_per_level=9, walk_cache_size=0)
+    table.map(0, 1)
+    frame, references = table.walk(1 << 27)
+    assert frame is None
+    assert references == 1
+    assert table.stats()["walk_memory_references"] == 1
+
+
+def test_engine_walks_only_on_tlb_misses():
+    pages = [1, 2, 3, 1, 4, 1, 2, 5, 512, 1]
+    flat = Simulator().simulate_all(pages, 3, summary=True)
+    simulator = Simulator()
+    simulator.page_table_levels = 4
+    radix = simulator.simulate_all(pages, 3, summary=True)
+    for name, result in radix.items():
+        assert result["faults"] == flat[name]["faults"]
+        walks = result["page_table"]
+        assert walks["walks"] == result["tlb"].misses
+        assert walks["walks"] <= walks["walk_memory_references"] <= 4 * walks["walks"]
@@ -0,0 +1,42 @@
+import numpy as np
+
+from parallel import ParallelRunner
+from simulator import Simulator
+
+
+def trace(length=3_000):
+    rng = np.random.default_rng(5)
+    return (rng.zipf(1.3, length) % 60).astype(np.int64)
+
+
+def test_worker_pool_matches_in_process_runs():
+    pages = trace()
+    rows = {}
+    for workers in (1, 3):
+        with ParallelRunner(pages, workers=workers, window=500) as runner:
+            rows[workers] = runner.sweep(["FIFO", "LRU", "Clock"], [4, 16], [4, 8])
+    assert rows[1] == rows[3]
+    assert len(rows[1]) == 12
+
+
+def test_rows_match_the_simulator():
+    pages = trace()
+    with ParallelRunner(pages, workers=2) as runner:
+        rows = runner.simulate_all(8, tlb_size=4)
+    results = Simulator().simulate_all(pages, 8, summary=True)
+    assert list(rows) == list(results)
+    for name, row in rows.items():
+        assert row["faults"] == results[name]["faults"]
+        assert row["tlb_misses"] == results[name]["summary"]["tlb_misses"]
+
+
+def test_address_traces_page_by_the_job_page_size():
+    rng = np.random.default_rng(6)
+    offsets = rng.integers(0, 4096, 3_000).astype(np.uint64)
+    addresses = trace().astype(np.uint64) * 4096 + offsets
+    with ParallelRunner(addresses, addresses=True, workers=2) as runner:
+        rows = runner.sweep(["LRU"], [4], [4], [4096, 8192])
+    for row, page_size in zip(rows, [4096, 8192]):
+        pages = (addresses // page_size).astype(np.int64)
+        expected = Simulator().simulate_all(pages, 4, summary=True, algorithms=["LRU"])
+        assert row["faults"] == expected["LRU"]["faults"]
@@ -0,0 +1,66 @@
+import os
+
+import pytest
+
+pytest.importorskip("matplotlib")
+
+from simulator import Simulator
+
+
+@pytest.fixture
+def headless(monkeypatch, tmp_path):
+    for name in ("DISPLAY", "WAYLAND_DISPLAY", "MPLBACKEND"):
+        monkeypatch.delenv(name, raising=False)
+    monkeypatch.chdir(tmp_path)
+    return tmp_path
+
+
+def test_headless_plot_goes_to_the_given_path(headless):
+    simulator = Simulator()
+    results = simulator.simulate_all([1, 2, 3, 1, 4, 1, 2], 3)
+    path = headless / "graph.png"
+    assert simulator.plot_comparison(results, path=str(path)) == str(path)
+    assert path.stat().st_size > 0
+
+
+def test_headless_plot_never_writes_into_the_working_directory(headless):
+    simulator = Simulator()
+    results = simulator.simulate_all([1, 2, 3, 1, 4, 1, 2], 3)
+    path = simulator.plot_comparison(results)
+    try:
+        assert os.path.dirname(os.path.abspath(path)) != str(headless)
+        assert os.path.getsize(path) > 0
+        assert os.listdir(headless) == []
+    finally:
+        os.remove(path)
+
+
+def test_figure_needs_something_to_plot():
+    from plotting import comparison_figure
+
+    with pytest.raises(ValueError, match="Nothing to plot"):
+        comparison_figure({})
+
+
+def test_figure_from_resident_sizes_alone():
+    from plotting import comparison_figure
+
+    fig = comparison_figure(
+        None, resident={"WorkingSet": ([1, 2, 3, 2], 1), "PFF": ([2.5, 3.0], 100)}
+    )
+    (axis,) = fig.axes
+    assert axis.get_xlabel() == "Reference"
+    assert [len(line.get_xdata()) for line in axis.get_lines()] == [4, 2]
+
+
+def test_resident_sizes_from_steps_and_summaries():
+    simulator = Simulator()
+    pages = [1, 2, 3, 1, 2, 3, 4, 5, 6, 4, 5, 6] * 5
+    steps = simulator.simulate_all(pages, 4, algorithms=["WorkingSet"])
+    summary = simulator.simulate_all(
+        pages, 4, summary=True, window=10, algorithms=["WorkingSet"]
+    )
+    sizes, every = simulator.resident_set_sizes(steps)["WorkingSet"]
+    assert (len(sizes), every) == (len(pages), 1)
+    sizes, every = simulator.resident_set_sizes(summary)["WorkingSet"]
+    assert (len(sizes), every) == (len(pages) // 10, 10)
@@ -0,0 +1,226 @@
+import random
+
+import pytest
+
+from engine import BackgroundFlusher, LockstepEngine
+from policies import (
+    ARCPolicy,
+    ClockPolicy,
+    ClockProPolicy,
+    CustomPolicy,
+    EnhancedSecondChancePolicy,
+    LIRSPolicy,
+    LRUPolicy,
+    PFFPolicy,
+    TwoHandedClockPolicy,
+    TwoQueuePolicy,
+    WTinyLFUPolicy,
+    WorkingSetPolicy,
+)
+
+
+def resident(policy, frame_size, pages, writes=None, flusher=None):
+    engine = LockstepEngine({policy.name: policy}, frame_size, flusher=flusher)
+    engine.feed(pages, writes=writes)
+    return engine.runs[0].slots
+
+
+def resident_sizes(policy, frame_size, pages):
+    engine = LockstepEngine({policy.name: policy}, frame_size)
+    engine.feed(pages)
+    run = engine.runs[0]
+    return list(run.steps.extras["resident"]), run.slots
+
+
+def faults(policies, frame_size, pages):
+    engine = LockstepEngine(
+        {policy.name: policy for policy in policies}, frame_size, summary=True
+    )
+    engine.feed(pages)
+    return {run.name: run.faults for run in engine.runs}
+
+
+def clock_victims(frame_size, pages, spread=None):
+    # Textbook second chance, one frame at a time. With a spread, a front
+    # hand that far ahead clears each bit before the back hand tests its
+    # own frame.
+    slots = [None] * frame_size
+    bits = [0] * frame_size
+    hand = 0
+    victims = []
+    for page in pages:
+        if page in slots:
+            bits[slots.index(page)] = 1
+            continue
+        if None in slots:
+            frame = slots.index(None)
+        else:
+            while True:
+                if spread is not None:
+                    bits[(hand + spread) % frame_size] = 0
+                if not bits[hand]:
+                    break
+                if spread is None:
+                    bits[hand] = 0
+                hand = (hand + 1) % frame_size
+            frame = hand
+            victims.append(slots[frame])
+            hand = (hand + 1) % frame_size
+        slots[frame] = page
+        bits[frame] = 1
+    return victims
+
+
+def policy_victims(policy, frame_size, pages):
+    engine = LockstepEngine({policy.name: policy}, frame_size)
+    victims = []
+    for page in pages:
+        before = set(policy.slots)
+        engine.reference(page)
+        victims.extend(before - set(policy.slots) - {None})
+    return victims
+
+
+def test_enhanced_second_chance_evicts_clean_pages_first():
+    # 0 and 1 are written, 2 is only read; once the fault has cleared every
+    # reference bit, the clean page goes first.
+    slots = resident(
+        EnhancedSecondChancePolicy(), 3, [0, 1, 2, 3], [True, True, False, False]
+    )
+    assert slots == [0, 1, 3]
+
+
+def test_enhanced_second_chance_sees_background_writebacks():
+    # The flusher cleans 0 and 1 before 3 faults, so the hand no longer
+    # skips them.
+    slots = resident(
+        EnhancedSecondChancePolicy(),
+        3,
+        [0, 1, 2, 3],
+        [True, True, False, False],
+        BackgroundFlusher(interval=3, batch=2),
+    )
+    assert slots == [3, 1, 2]
+
+
+def test_custom_policy_matches_a_full_scan():
+    pages = [0, 1, 2, 0, 0, 3, 1, 4, 0, 2, 5, 1, 1, 6, 0, 3, 3, 7, 2, 0, 8, 1]
+    policy = CustomPolicy()
+    engine = LockstepEngine({"Custom": policy}, 3)
+    frequency = {}
+    last = {}
+    for t, page in enumerate(pages):
+        slots = list(policy.slots)
+        engine.reference(page)
+        if page not in slots and None not in slots:
+            # Highest (t - last access) / frequency, lowest frame on ties.
+            victim = max(
+                range(3),
+                key=lambda frame: (
+                    (t - last[slots[frame]]) / frequency[slots[frame]],
+                    -frame,
+                ),
+            )
+            assert policy.slots[victim] == page
+        frequency[page] = frequency.get(page, 0) + 1
+        last[page] = t
+
+
+def test_clock_textbook_trace():
+    pages = [7, 0, 1, 2, 0, 3, 0, 4, 2, 3, 0, 3, 2]
+    assert faults([ClockPolicy()], 3, pages) == {"Clock": 9}
+
+
+@pytest.mark.parametrize("frame_size", [1, 3, 8, 13])
+def test_packed_clock_matches_a_frame_at_a_time_sweep(frame_size):
+    rng = random.Random(frame_size)
+    pages = [rng.randrange(2 * frame_size + 2) for _ in range(500)]
+    assert policy_victims(ClockPolicy(), frame_size, pages) == clock_victims(
+        frame_size, pages
+    )
+
+
+@pytest.mark.parametrize("frame_size, spread", [(2, 1), (8, 2), (8, 7), (13, 4)])
+def test_two_handed_clock_matches_a_frame_at_a_time_sweep(frame_size, spread):
+    rng = random.Random(frame_size * spread)
+    pages = [rng.randrange(2 * frame_size + 2) for _ in range(500)]
+    victims = policy_victims(TwoHandedClockPolicy(spread), frame_size, pages)
+    assert victims == clock_victims(frame_size, pages, spread)
+
+
+def test_clock_pro_survives_a_loop_larger_than_memory():
+    # Ten pages cycled through eight frames: LRU and Clock miss every
+    # time, Clock-Pro keeps most of the loop resident.
+    policies = [LRUPolicy(), ClockPolicy(), ClockProPolicy()]
+    counts = faults(policies, 8, list(range(10)) * 20)
+    assert counts["LRU"] == counts["Clock"] == 200
+    assert counts["ClockPro"] < 100
+
+
+def test_scan_resistant_policies_on_a_short_trace():
+    # Worked by hand with four frames. 1 and 2 come back after a one-time
+    # scan of 7, 8, 9: LRU has let them go, the others have not. 2Q
+    # promotes them to Am after they return from A1out; ARC moves them to
+    # T2; LIRS makes them LIR and only ever evicts its one HIR frame.
+    pages = [1, 2, 3, 4, 5, 1, 2, 6, 1, 2, 7, 8, 9, 1, 2]
+    policies = [LRUPolicy(), TwoQueuePolicy(), ARCPolicy(), LIRSPolicy()]
+    counts = faults(policies, 4, pages)
+    assert counts == {"LRU": 13, "2Q": 11, "ARC": 11, "LIRS": 9}
+
+
+def test_hot_pages_survive_a_scan():
+    # Four hot pages, each used again after a few one-off pages, then a
+    # scan five times the size of memory.
+    warm = [page for i in range(10) for page in (0, 1, 2, 3, 200 + i)]
+    scan = list(range(100, 140))
+    policies = [
+        LRUPolicy(),
+        ClockProPolicy(),
+        ARCPolicy(),
+        TwoQueuePolicy(),
+        LIRSPolicy(),
+        WTinyLFUPolicy(),
+    ]
+    engine = LockstepEngine(
+        {policy.name: policy for policy in policies}, 8, summary=True
+    )
+    engine.feed(warm + scan)
+    before = {run.name: run.faults for run in engine.runs}
+    engine.feed([0, 1, 2, 3] * 3)
+    after = {run.name: run.faults - before[run.name] for run in engine.runs}
+    assert after == {
+        "LRU": 4,
+        "ClockPro": 0,
+        "ARC": 0,
+        "2Q": 0,
+        "LIRS": 0,
+        "W-TinyLFU": 0,
+    }
+
+
+def test_lirs_and_w_tinylfu_keep_most_of_a_loop():
+    policies = [LRUPolicy(), LIRSPolicy(), WTinyLFUPolicy()]
+    counts = faults(policies, 8, list(range(10)) * 20)
+    assert counts["LRU"] == 200
+    assert counts["LIRS"] < 100
+    assert counts["W-TinyLFU"] < 100
+
+
+def test_working_set_shrinks_after_a_phase_change():
+    # Six pages in a loop, then two: with tau = 4 the resident set holds
+    # the last four distinct pages, then only the two still in use.
+    pages = list(range(6)) * 4 + [0, 1] * 10
+    sizes, slots = resident_sizes(WorkingSetPolicy(window=4), 8, pages)
+    assert sizes[:24] == [1, 2, 3] + [4] * 21
+    assert sizes[24:] == [4, 4, 3] + [2] * (len(pages) - 27)
+    assert sorted(page for page in slots if page is not None) == [0, 1]
+
+
+def test_pff_drops_the_old_phase_on_a_late_fault():
+    # After the switch to 10 and 11 nothing faults for a long time, so the
+    # fault on 12 releases everything not used since the fault on 11.
+    pages = list(range(6)) * 3 + [10, 11] * 10 + [12]
+    sizes, slots = resident_sizes(PFFPolicy(threshold=3), 8, pages)
+    assert max(sizes) == 8
+    assert sizes[-1] == 3
+    assert sorted(page for page in slots if page is not None) == [10, 11, 12]
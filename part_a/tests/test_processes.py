@@ -0,0 +1,18 @@
+import pytest
+
+from policies import LRUPolicy, OptimalPolicy
+from processes import PID_SHIFT, MultiProcessSimulation
+
+
+@pytest.mark.parametrize("policy_class", [LRUPolicy, OptimalPolicy])
+def test_pages_outside_the_key_space_are_rejected(policy_class):
+    simulation = MultiProcessSimulation(policy_class, 4, 2)
+    with pytest.raises(ValueError):
+        simulation.run([[1 << PID_SHIFT, 0], [0, 1 << PID_SHIFT]])
+
+
+@pytest.mark.parametrize("replacement", ["global", "local"])
+def test_processes_do_not_share_pages(replacement):
+    simulation = MultiProcessSimulation(LRUPolicy, 8, 2, replacement, quantum=2)
+    results = simulation.run([[0, 1, 0, 1], [0, 1, 0, 1]])
+    assert [process["faults"] for process in results["processes"]] == [2, 2]
@@ -0,0 +1,82 @@
+import numpy as np
+import pytest
+
+from resultcache import ResultCache, trace_digest
+from simulator import Simulator
+
+PAGES = [1, 2, 3, 1, 4, 1, 2, 5, 3, 1, 6, 2, 1, 7, 3] * 40
+WRITES = [page % 3 == 0 for page in PAGES]
+ALGORITHMS = ["FIFO", "LRU", "Optimal", "Custom", "ESC", "WorkingSet"]
+
+
+def steps(run):
+    return [{key: value for key, value in step.items() if key != "tlb"} for step in run]
+
+
+def assert_same(cached, direct, summary):
+    assert list(cached) == list(direct)
+    for name, result in direct.items():
+        other = cached[name]
+        assert other["faults"] == result["faults"]
+        assert other["costs"] == result["costs"]
+        assert other["io"] == result["io"]
+        assert other["tlb"].hits == result["tlb"].hits
+        assert other["tlb"].misses == result["tlb"].misses
+        if summary:
+            assert other["summary"]["window_fault_rates"] == result["summary"]["window_fault_rates"]
+        else:
+            assert steps(other["steps"]) == steps(result["steps"])
+
+
+@pytest.mark.parametrize("summary", [False, True])
+def test_cached_results_match_a_direct_run(tmp_path, summary):
+    # Seeded, so both runs draw the same virtual addresses.
+    simulator = Simulator()
+    simulator.seed = 1
+    direct = simulator.simulate_all(
+        PAGES, 3, summary=summary, window=50, writes=WRITES, algorithms=ALGORITHMS
+    )
+
+    simulator.result_cache = ResultCache(tmp_path)
+    first = simulator.simulate_all(
+        PAGES, 3, summary=summary, window=50, writes=WRITES, algorithms=ALGORITHMS
+    )
+    again = simulator.simulate_all(
+        PAGES, 3, summary=summary, window=50, writes=WRITES, algorithms=ALGORITHMS
+    )
+    assert simulator.result_cache.stats()["memory_hits"] == 1
+
+    # A fresh cache over the same directory reads the compressed file.
+    simulator.result_cache = ResultCache(tmp_path)
+    from_disk = simulator.simulate_all(
+        PAGES, 3, summary=summary, window=50, writes=WRITES, algorithms=ALGORITHMS
+    )
+    assert simulator.result_cache.stats()["disk_hits"] == 1
+
+    for cached in (first, again, from_disk):
+        assert_same(cached, direct, summary)
+
+
+def test_settings_and_contents_change_the_key():
+    simulator = Simulator()
+    simulator.result_cache = ResultCache()
+    simulator.simulate_all(PAGES, 3)
+    simulator.simulate_all(PAGES, 4)
+    simulator.simulate_all(PAGES, 3, writes=WRITES)
+    simulator.tlb_size = 8
+    simulator.simulate_all(PAGES, 3)
+    simulator.simulate_all(np.array(PAGES), 3)
+    assert simulator.result_cache.stats()["misses"] == 4
+    assert simulator.result_cache.stats()["memory_hits"] == 1
+    assert trace_digest(PAGES) == trace_digest(np.array(PAGES, dtype=np.int32))
+    assert trace_digest(PAGES) != trace_digest(PAGES[::-1])
+
+
+def test_disk_tier_is_trimmed_oldest_first(tmp_path):
+    simulator = Simulator()
+    simulator.result_cache = ResultCache(tmp_path, max_bytes=1)
+    simulator.simulate_all(PAGES, 3)
+    simulator.simulate_all(PAGES, 4)
+    # Nothing fits under one byte, so every store trims the directory.
+    assert list(tmp_path.iterdir()) == []
+    assert simulator.result_cache.stats()["evictions"] == 2
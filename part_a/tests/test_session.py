@@ -0,0 +1,78 @@
+import os
+import pickle
+import zlib
+
+import numpy as np
+import pytest
+
+from session import SNAPSHOT_MAGIC, SNAPSHOT_VERSION, SimulationSession
+from simulator import Simulator
+
+
+def trace(seed=0, length=3_000):
+    rng = np.random.default_rng(seed)
+    pages = (rng.zipf(1.4, length) % 200).astype(np.int64)
+    writes = rng.random(length) < 0.3
+    return pages, writes
+
+
+@pytest.mark.parametrize("summary", [True, False])
+def test_resumed_session_matches_a_direct_run(tmp_path, summary):
+    pages, writes = trace()
+    simulator = Simulator()
+    simulator.page_table_levels = 3
+
+    direct = simulator.new_session(16, summary=summary)
+    direct.feed(pages, writes=writes)
+
+    session = simulator.new_session(16, summary=summary)
+    path = tmp_path / "run.snap"
+    for start in range(0, len(pages), 1_000):
+        session.feed(pages[start : start + 1_000], writes=writes[start : start + 1_000])
+        session.save(path)
+        session = SimulationSession.load(path)
+
+    assert session.references == direct.references == len(pages)
+    assert session.counters() == direct.counters()
+    resumed = session.results()
+    for name, (faults, run) in direct.results().items():
+        assert resumed[name][0] == faults
+        if summary:
+            assert resumed[name][1]["window_fault_rates"] == run["window_fault_rates"]
+            assert resumed[name][1]["io"] == run["io"]
+        else:
+            assert list(resumed[name][1].page) == list(run.page)
+            assert list(resumed[name][1].change_new) == list(run.change_new)
+
+
+def test_sessions_leave_out_policies_that_look_ahead():
+    session = Simulator().new_session(4)
+    assert "Optimal" not in session.counters()
+    with pytest.raises(ValueError):
+        Simulator().new_session(4, algorithms=["Optimal"])
+
+
+def test_load_rejects_other_files(tmp_path):
+    path = tmp_path / "not-a-snapshot"
+    path.write_bytes(b"hello")
+    with pytest.raises(ValueError):
+        SimulationSession.load(path)
+
+
+def test_load_rejects_other_versions(tmp_path):
+    session = Simulator().new_session(4)
+    session.feed(np.arange(10))
+    path = tmp_path / "run.snap"
+    session.save(path)
+    data = path.read_bytes()
+    path.write_bytes(SNAPSHOT_MAGIC + b"1\n" + data.split(b"\n", 1)[1])
+    with pytest.raises(ValueError, match="version 1"):
+        SimulationSession.load(path)
+
+
+def test_load_refuses_foreign_classes(tmp_path):
+    path = tmp_path / "evil.snap"
+    data = zlib.compress(pickle.dumps(os.system))
+    path.write_bytes(SNAPSHOT_MAGIC + b"%d\n" % SNAPSHOT_VERSION + data)
+    with pytest.raises(ValueError, match="posix.system|nt.system"):
+        SimulationSession.load(path)
@@ -0,0 +1,81 @@
+import numpy as np
+import pytest
+
+from engine import LockstepEngine
+from mrc import lru_curve
+from policies import FIFOPolicy, LRUPolicy, OptimalPolicy
+from shards import ShardsSampler, StackDistances, frame_grid, sampled_curve, shards_curves
+
+
+def zipf_trace(length=50_000, pages=2_000, seed=0):
+    rng = np.random.default_rng(seed)
+    return (rng.zipf(1.3, length) % pages).astype(np.int64)
+
+
+def test_sampling_keeps_every_reference_to_a_page_or_none():
+    trace = zipf_trace(10_000)
+    sampler = ShardsSampler(max_pages=None, rate=0.25).fit(trace)
+    kept = set(sampler.sample(trace).tolist())
+    assert 0 < len(kept) < len(set(trace.tolist()))
+    for page in kept:
+        assert (sampler.sample(trace[trace == page]) == page).all()
+
+
+def test_page_budget_bounds_the_sample():
+    trace = zipf_trace()
+    sampler = ShardsSampler(max_pages=100).fit(trace)
+    assert sampler.pages <= 100
+    assert len(set(sampler.sample(trace).tolist())) == sampler.pages
+    assert sampler.rate < 1
+    with pytest.raises(ValueError):
+        ShardsSampler(max_pages=0)
+    with pytest.raises(ValueError):
+        ShardsSampler(rate=0)
+
+
+@pytest.mark.parametrize("max_pages", [50, 2_000])
+def test_stack_distances_match_the_exact_lru_curve(max_pages):
+    # A budget far below the trace's pages forces the marks to be
+    # renumbered many times.
+    trace = zipf_trace(5_000, pages=max_pages)
+    distances = StackDistances(max_pages)
+    distances.feed(trace.tolist())
+    exact = lru_curve(trace.tolist(), 40)
+    assert distances.faults()[1:41].tolist() == list(exact.faults)
+
+
+@pytest.mark.parametrize("policy_class", [LRUPolicy, FIFOPolicy])
+def test_unsampled_curves_are_exact(policy_class):
+    trace = zipf_trace(5_000, pages=300)
+    sampler = ShardsSampler(max_pages=None).fit(trace)
+    curve = sampled_curve(sampler, policy_class, trace, 64, points=8)
+    for frame_size in frame_grid(64, 8):
+        engine = LockstepEngine({policy_class.name: policy_class()}, frame_size, summary=True)
+        engine.feed(trace.tolist())
+        assert curve.faults_at(frame_size) == engine.runs[0].faults
+
+
+def test_sampled_curves_estimate_the_full_trace():
+    trace = zipf_trace()
+    result = shards_curves(
+        trace, {"LRU": LRUPolicy, "FIFO": FIFOPolicy}, 256, max_pages=400, prefix=20_000
+    )
+    assert result["sampled_pages"] <= 400
+    # At around a fifth of the pages sampled, memories smaller than a few
+    # dozen frames shrink to a handful and are not estimated well.
+    exact = lru_curve(trace.tolist(), 256)
+    errors = [
+        abs(result["curves"]["LRU"].miss_ratio(size) - exact.miss_ratio(size))
+        for size in (64, 128, 256)
+    ]
+    assert max(errors) < 0.05
+    for error in result["error"].values():
+        assert error["references"] == 20_000
+        assert error["mean_absolute_error"] < 0.1
+
+
+def test_policies_that_look_ahead_cannot_be_sampled():
+    trace = zipf_trace(1_000)
+    sampler = ShardsSampler(max_pages=10).fit(trace)
+    with pytest.raises(ValueError):
+        sampled_curve(sampler, OptimalPolicy, trace, 16)
@@ -0,0 +1,143 @@
+import random
+
+import pytest
+
+from simulator import Simulator
+from tlb import TLB
+
+TEXTBOOK = [7, 0, 1, 2, 0, 3, 0, 4, 2, 3, 0, 3, 2, 1, 2, 0, 1, 7, 0, 1]
+
+
+def test_simulate_all_compares_the_original_algorithms_by_default():
+    results = Simulator().simulate_all([1, 2, 3, 1, 4, 1, 2], 3)
+    assert list(results) == ["FIFO", "LRU", "Optimal", "Custom", "Clock"]
+
+
+def test_simulate_all_runs_the_algorithms_asked_for():
+    results = Simulator().simulate_all([1, 2, 3, 1, 4, 1, 2], 3, algorithms=["arc", "ESC"])
+    assert list(results) == ["ARC", "ESC"]
+    with pytest.raises(ValueError):
+        Simulator().simulate_all([1, 2], 1, algorithms=["nope"])
+
+
+def test_unknown_algorithms_are_reported_the_same_everywhere():
+    simulator = Simulator()
+    calls = [
+        lambda: simulator.new_session(3, algorithms=["nope"]),
+        lambda: simulator.sampled_miss_ratio_curves([1, 2, 3], ["nope"]),
+        lambda: simulator.visual_demonstration([1, 2, 3], 2, "nope"),
+        lambda: simulator.simulate_processes([[1, 2], [3]], 2, "nope"),
+    ]
+    for call in calls:
+        with pytest.raises(ValueError, match="Unknown algorithm: nope"):
+            call()
+
+
+def baseline_run(algorithm, pages, frame_size, virtual_addresses, page_size=4096):
+    # The list-based FIFO, LRU and Optimal the simulator started from, with
+    # its 4-entry LRU TLB, reduced to what each step reports.
+    frames = []
+    page_table = {}
+    tlb = TLB(4)
+    faults = 0
+    steps = []
+    for i, (page, virtual_addr) in enumerate(zip(pages, virtual_addresses)):
+        fault = page not in page_table
+        if not fault:
+            if algorithm == "LRU":
+                frames.remove(page)
+                frames.append(page)
+        else:
+            faults += 1
+            if len(frames) < frame_size:
+                page_table[page] = len(frames)
+                frames.append(page)
+            else:
+                if algorithm == "Optimal":
+                    farthest = -1
+                    victim = frames[0]
+                    for frame_page in frames:
+                        try:
+                            next_use = pages[i + 1 :].index(frame_page)
+                        except ValueError:
+                            next_use = float("inf")
+                        if next_use > farthest:
+                            farthest = next_use
+                            victim = frame_page
+                    frames[frames.index(victim)] = page
+                else:
+                    victim = frames.pop(0)
+                    frames.append(page)
+                page_table[page] = page_table.pop(victim)
+                tlb.invalidate(victim)
+        frame = tlb.lookup(page)
+        tlb_miss = frame is None
+        if tlb_miss:
+            frame = page_table[page]
+            tlb.update(page, frame)
+        physical_addr = frame * page_size + virtual_addr % page_size
+        steps.append((list(frames), fault, tlb_miss, physical_addr))
+    return faults, steps
+
+
+def step_view(steps):
+    return [
+        (step["frames"], step["fault"], step["tlb_miss"], step["physical_addr"])
+        for step in steps
+    ]
+
+
+def random_traces():
+    rng = random.Random(2)
+    for frame_size in (1, 3, 4, 7):
+        pages = [rng.randrange(3 * frame_size) for _ in range(300)]
+        yield pages, frame_size
+
+
+def test_optimal_matches_the_rescanning_baseline():
+    simulator = Simulator()
+    assert simulator.optimal_algorithm(TEXTBOOK, 3)[0] == 9
+    for pages, frame_size in random_traces():
+        addresses = simulator.generate_virtual_addresses(pages)
+        faults, steps = simulator.optimal_algorithm(pages, frame_size, addresses)
+        expected = baseline_run("Optimal", pages, frame_size, addresses)
+        assert (faults, step_view(steps)) == expected
+
+
+@pytest.mark.parametrize("algorithm, textbook_faults", [("FIFO", 15), ("LRU", 12)])
+def test_fifo_and_lru_match_the_list_baseline(algorithm, textbook_faults):
+    simulator = Simulator()
+    run = getattr(simulator, f"{algorithm.lower()}_algorithm")
+    assert run(TEXTBOOK, 3)[0] == textbook_faults
+    for pages, frame_size in random_traces():
+        addresses = simulator.generate_virtual_addresses(pages)
+        faults, steps = run(pages, frame_size, addresses)
+        expected = baseline_run(algorithm, pages, frame_size, addresses)
+        assert (faults, step_view(steps)) == expected
+
+
+def test_summary_mode_matches_step_mode():
+    simulator = Simulator()
+    rng = random.Random(4)
+    pages = [int(rng.paretovariate(1.2)) % 40 for _ in range(2_000)]
+    names = list(simulator.policies)
+    steps = simulator.simulate_all(pages, 8, algorithms=names)
+    summaries = simulator.simulate_all(
+        pages, 8, summary=True, window=250, algorithms=names
+    )
+    for name in names:
+        run = list(steps[name]["steps"])
+        summary = summaries[name]["summary"]
+        faults = [step["fault"] for step in run]
+        tlb_misses = sum(step["tlb_miss"] for step in run)
+        assert summaries[name]["faults"] == steps[name]["faults"] == sum(faults)
+        for key in ("costs", "io", "page_table"):
+            assert summaries[name][key] == steps[name][key]
+        assert summary["hits"] == len(pages) - sum(faults)
+        assert (summary["tlb_hits"], summary["tlb_misses"]) == (
+            len(pages) - tlb_misses,
+            tlb_misses,
+        )
+        assert list(summary["window_fault_rates"]) == pytest.approx(
+            [sum(faults[start : start + 250]) / 250 for start in range(0, 2_000, 250)]
+        )
@@ -0,0 +1,68 @@
+import random
+
+import pytest
+
+from steplog import EMPTY, StepLog
+
+
+def build(layout, interval, steps=300, frame_size=4):
+    # Random hits, faults and releases logged as changes, next to the
+    # frames they should rebuild to after every step.
+    rng = random.Random(interval)
+    log = StepLog(None, frame_size, layout, interval)
+    frames = []
+    expected = []
+    for _ in range(steps):
+        page = rng.randrange(3 * frame_size)
+        if page in frames:
+            if layout == "queue":
+                frames.remove(page)
+                frames.append(page)
+                log.change(0, page, page)
+        elif None in frames:
+            slot = frames.index(None)
+            frames[slot] = page
+            log.change(slot, EMPTY, page)
+        elif len(frames) < frame_size:
+            frames.append(page)
+            log.change(len(frames) - 1, EMPTY, page)
+        else:
+            slot = rng.randrange(frame_size)
+            old = frames[slot]
+            if layout == "queue":
+                frames.remove(old)
+                frames.append(page)
+            else:
+                frames[slot] = page
+            log.change(slot, old, page)
+        if layout == "slots" and rng.random() < 0.05:
+            slot = rng.randrange(len(frames))
+            if frames[slot] is not None:
+                log.change(slot, frames[slot], EMPTY)
+                frames[slot] = None
+        log.append(page, True, False, None, None, {"n": len(expected)})
+        expected.append(list(frames))
+    return log, expected
+
+
+@pytest.mark.parametrize("layout", ["slots", "queue"])
+@pytest.mark.parametrize("interval", [1, 7, 64, 1_000])
+def test_any_step_rebuilds_from_its_keyframe(layout, interval):
+    log, expected = build(layout, interval)
+    assert len(log.keyframes) == -(-len(expected) // interval)
+    assert [step["frames"] for step in log] == expected
+
+    order = list(range(len(expected)))
+    random.Random(0).shuffle(order)
+    for step in order + order[::-1] + list(range(len(expected))):
+        record = log[step]
+        assert record["frames"] == expected[step]
+        assert record["n"] == step
+    assert log[-1]["frames"] == expected[-1]
+    with pytest.raises(IndexError):
+        log[len(expected)]
+
+
+def test_unknown_layouts_are_rejected():
+    with pytest.raises(ValueError):
+        StepLog(None, 4, "stack")
@@ -0,0 +1,63 @@
+import pytest
+
+from tlb import TLB
+
+
+def fill(tlb, pages):
+    for page in pages:
+        if tlb.lookup(page) is None:
+            tlb.update(page, page + 100)
+
+
+def test_lru_evicts_the_least_recently_looked_up_entry():
+    tlb = TLB(3)
+    fill(tlb, [1, 2, 3, 1, 4])
+    assert [page in tlb for page in (1, 2, 3, 4)] == [True, False, True, True]
+    assert tlb.lookup(3) == 103
+    assert (tlb.hits, tlb.misses) == (2, 4)
+
+
+def test_pages_index_sets_by_page_number_modulo_sets():
+    # Eight entries in four 2-way sets: 0, 4 and 8 compete for set 0 while
+    # 1 sits alone in set 1.
+    tlb = TLB(8, ways=2)
+    assert tlb.num_sets == 4
+    fill(tlb, [0, 4, 1, 8, 1])
+    assert [page in tlb for page in (0, 4, 8, 1)] == [False, True, True, True]
+    assert len(tlb) == 3
+    assert tlb.set_hits == [0, 1, 0, 0]
+    assert tlb.set_misses == [3, 1, 0, 0]
+    assert tlb.get_set_hit_ratios() == [0, 50, 0, 0]
+
+
+def test_pseudo_lru_follows_the_tree_not_true_recency():
+    # After ways 0-3 are filled in order and way 0 is used again, the tree
+    # points at the right half and then way 2, although way 1 is the least
+    # recently used.
+    tlb = TLB(4, policy="plru")
+    fill(tlb, [0, 1, 2, 3, 0, 4])
+    assert [page in tlb for page in range(5)] == [True, True, False, True, True]
+
+
+def test_pseudo_lru_needs_power_of_two_ways():
+    with pytest.raises(ValueError):
+        TLB(6, ways=3, policy="plru")
+
+
+def test_sizes_must_divide_into_sets():
+    with pytest.raises(ValueError):
+        TLB(6, ways=4)
+    with pytest.raises(ValueError):
+        TLB(4, policy="fifo")
+
+
+def test_random_replacement_is_seeded_and_stays_in_its_set():
+    pages = [page * 2 for page in range(40)]
+    runs = []
+    for _ in range(2):
+        tlb = TLB(8, ways=4, policy="random", seed=7)
+        fill(tlb, pages)
+        runs.append(sorted(page for tlb_set in tlb.sets for page in tlb_set))
+        # Even pages only ever land in set 0 of the two sets.
+        assert len(tlb.sets[0]) == 4 and len(tlb.sets[1]) == 0
+    assert runs[0] == runs[1]
@@ -0,0 +1,56 @@
+import numpy as np
+import pytest
+
+from trace_reader import TraceReader, write_trace
+
+ADDRESSES = [0, 4095, 4096, 0x12345678, 8191, 3 * 4096 + 5]
+FLAGS = [0, 1, 0, 1, 1, 0]
+
+
+@pytest.mark.parametrize("width", [4, 8])
+@pytest.mark.parametrize("flags", [None, FLAGS])
+def test_reads_back_what_was_written(tmp_path, width, flags):
+    path = tmp_path / "trace.bin"
+    write_trace(path, ADDRESSES, width, flags)
+    reader = TraceReader(path, address_width=width, has_flags=flags is not None, chunk_size=4)
+    with reader:
+        assert len(reader) == len(ADDRESSES)
+        assert reader.addresses().tolist() == ADDRESSES
+        assert list(reader) == [address // 4096 for address in ADDRESSES]
+        pages = []
+        writes = []
+        for chunk_pages, chunk_writes in reader.access_chunks():
+            pages += chunk_pages.tolist()
+            writes += [] if chunk_writes is None else chunk_writes.tolist()
+        assert pages == [address // 4096 for address in ADDRESSES]
+        assert writes == ([] if flags is None else [bool(flag) for flag in flags])
+
+
+def test_page_size_need_not_be_a_power_of_two(tmp_path):
+    path = tmp_path / "trace.bin"
+    write_trace(path, ADDRESSES)
+    with TraceReader(path, page_size=3000) as reader:
+        assert list(reader) == [address // 3000 for address in ADDRESSES]
+
+
+def test_rejects_truncated_traces(tmp_path):
+    path = tmp_path / "trace.bin"
+    path.write_bytes(bytes(13))
+    with pytest.raises(ValueError):
+        TraceReader(path)
+    with pytest.raises(ValueError):
+        TraceReader(path, address_width=2)
+
+
+def test_close_leaves_the_mapping_to_live_views(tmp_path):
+    path = tmp_path / "trace.bin"
+    write_trace(path, ADDRESSES)
+    reader = TraceReader(path)
+    addresses = reader.addresses()
+    reader.close()
+    assert addresses.tolist() == ADDRESSES
+    del addresses
+    # Reopening after a close maps the file again.
+    assert reader.addresses().tolist() == ADDRESSES
+    reader.close()
+    assert TraceReader(path).addresses().dtype == np.dtype("<u8")
@@ -0,0 +1,37 @@
+import numpy as np
+import pytest
+
+from simulator import Simulator
+from tlb import TLB
+
+
+@pytest.mark.parametrize("ways, policy", [(None, "lru"), (2, "lru"), (4, "plru"), (2, "random")])
+def test_batch_translation_matches_one_reference_at_a_time(ways, policy):
+    simulator = Simulator()
+    simulator.seed = 7
+    rng = np.random.default_rng(7)
+    pages = rng.integers(0, 40, 2_000)
+    addresses = simulator.generate_virtual_addresses(pages.tolist(), seed=7)
+    # Frames for most pages; the rest are unmapped.
+    page_table = {page: frame for frame, page in enumerate(range(0, 40)) if page % 7}
+
+    batch_tlb = TLB(8, ways, policy, seed=3)
+    physical, hits = simulator.translate_batch(addresses, page_table, batch_tlb)
+
+    tlb = TLB(8, ways, policy, seed=3)
+    expected_physical = []
+    expected_hits = []
+    for address in addresses.tolist():
+        page, offset = divmod(address, simulator.page_size)
+        frame = page_table.get(page)
+        hit = tlb.lookup(page) is not None
+        if not hit and frame is not None:
+            tlb.update(page, frame)
+        expected_hits.append(hit)
+        expected_physical.append(-1 if frame is None else frame * simulator.page_size + offset)
+
+    assert physical.tolist() == expected_physical
+    assert hits.tolist() == expected_hits
+    assert (batch_tlb.hits, batch_tlb.misses) == (tlb.hits, tlb.misses)
+    assert batch_tlb.set_hits == tlb.set_hits
+    assert batch_tlb.set_misses == tlb.set_misses
@@ -1,41 +1,246 @@
+import random
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+
+
+class LRUSet:
+    def __init__(self, ways):
+        self.ways = ways
+        self.entries = OrderedDict()
+
+    def __len__(self):
+        return len(self.entries)
+
+    def __contains__(self, page_number):
+        return page_number in self.entries
+
+    def __iter__(self):
+        return iter(self.entries)
+
+    def lookup(self, page_number):
+        frame_number = self.entries.get(page_number)
+        if frame_number is not None:
+            self.entries.move_to_end(page_number)
+        return frame_number
+
+    def insert(self, page_number, frame_number):
+        entries = self.entries
+        if page_number in entries:
+            entries.move_to_end(page_number)
+        elif len(entries) >= self.ways:
+            entries.popitem(last=False)
+        entries[page_number] = frame_number
+
+    def invalidate(self, page_number):
+        self.entries.pop(page_number, None)
+
+    def flush(self):
+        self.entries.clear()
+
+
+class _WaySet(ABC):
+    # Fixed ways with an explicit victim choice; subclasses pick the victim
+    # and may track use through touch().
+
+    def __init__(self, ways):
+        self.ways = ways
+        self.pages = [None] * ways
+        self.frames = [None] * ways
+        self.slots = {}
+        self.free = list(range(ways - 1, -1, -1))
+
+    def __len__(self):
+        return len(self.slots)
+
+    def __contains__(self, page_number):
+        return page_number in self.slots
+
+    def __iter__(self):
+        return iter(self.slots)
+
+    def lookup(self, page_number):
+        way = self.slots.get(page_number)
+        if way is None:
+            return None
+        self.touch(way)
+        return self.frames[way]
+
+    def insert(self, page_number, frame_number):
+        way = self.slots.get(page_number)
+        if way is None:
+            if self.free:
+                way = self.free.pop()
+            else:
+                way = self.victim()
+                del self.slots[self.pages[way]]
+            self.pages[way] = page_number
+            self.slots[page_number] = way
+        self.frames[way] = frame_number
+        self.touch(way)
+
+    def invalidate(self, page_number):
+        way = self.slots.pop(page_number, None)
+        if way is not None:
+            self.pages[way] = None
+            self.frames[way] = None
+            self.free.append(way)
+
+    def flush(self):
+        self.pages = [None] * self.ways
+        self.frames = [None] * self.ways
+        self.slots.clear()
+        self.free = list(range(self.ways - 1, -1, -1))
+
+    def touch(self, way):
+        pass
+
+    @abstractmethod
+    def victim(self):
+        pass
+
+
+class PLRUSet(_WaySet):
+    def __init__(self, ways):
+        if ways & (ways - 1):
+            raise ValueError("Pseudo-LRU needs a power-of-two number of ways")
+        super().__init__(ways)
+        # One bit per internal node of the binary tree; 0 means the
+        # victim is in the left half, 1 means the right half.
+        self.tree = bytearray(max(ways - 1, 1))
+
+    def touch(self, way):
+        tree = self.tree
+        node = 0
+        low = 0
+        span = self.ways
+        while span > 1:
+            span //= 2
+            if way < low + span:
+                tree[node] = 1
+                node = 2 * node + 1
+            else:
+                tree[node] = 0
+                low += span
+                node = 2 * node + 2
+
+    def victim(self):
+        tree = self.tree
+        node = 0
+        low = 0
+        span = self.ways
+        while span > 1:
+            span //= 2
+            if tree[node]:
+                low += span
+                node = 2 * node + 2
+            else:
+                node = 2 * node + 1
+        return low
+
+    def flush(self):
+        super().flush()
+        self.tree = bytearray(len(self.tree))
+
+
+class RandomSet(_WaySet):
+    def __init__(self, ways, rng=None):
+        super().__init__(ways)
+        self.rng = rng if rng is not None else random.Random()
+
+    def victim(self):
+        return self.rng.randrange(self.ways)
+
+
 class TLB:
-    def __init__(self, size=4):
+    POLICIES = {"lru": LRUSet, "plru": PLRUSet, "random": RandomSet}
+
+    def __init__(self, size=4, ways=None, policy="lru", seed=None):
+        if ways is None:
+            ways = size
+        if ways <= 0 or size % ways:
+            raise ValueError("TLB size must be a multiple of the number of ways")
+        if policy not in self.POLICIES:
+            raise ValueError(f"Unknown TLB replacement policy: {policy}")
+
         self.size = size
-        self.entries = {}
-        self.access_order = []
+        self.ways = ways
+        self.num_sets = size // ways
+        self.policy = policy
+
+        # Only random replacement draws from the seeded generator, shared by
+        # all sets.
+        rng = random.Random(seed)
+        set_class = self.POLICIES[policy]
+        if set_class is RandomSet:
+            self.sets = [RandomSet(ways, rng) for _ in range(self.num_sets)]
+        else:
+            self.sets = [set_class(ways) for _ in range(self.num_sets)]
+        self.set_hits = [0] * self.num_sets
+        self.set_misses = [0] * self.num_sets
         self.hits = 0
         self.misses = 0
 
+    def __len__(self):
+        return sum(len(tlb_set) for tlb_set in self.sets)
+
+    def __contains__(self, page_number):
+        return page_number in self.sets[page_number % self.num_sets]
+
     def invalidate(self, page_number):
-        if page_number in self.entries:
-            del self.entries[page_number]
-            if page_number in self.access_order:
-                self.access_order.remove(page_number)
-    
+        self.sets[page_number % self.num_sets].invalidate(page_number)
+
     def lookup(self, page_number):
-        if page_number in self.entries:
+        index = page_number % self.num_sets
+        frame_number = self.sets[index].lookup(page_number)
+        if frame_number is not None:
             self.hits += 1
-            if page_number in self.access_order:
-                self.access_order.remove(page_number)
-            self.access_order.append(page_number)
-            return self.entries[page_number]
+            self.set_hits[index] += 1
         else:
             self.misses += 1
-            return None
-    
+            self.set_misses[index] += 1
+        return frame_number
+
+    def lookup_batch(self, page_numbers, frame_numbers):
+        # lookup() for a run of references against a fixed page table, with
+        # a miss filling the entry as the engine does. Pages with a negative
+        # frame number are unmapped and never enter the TLB. Returns one
+        # byte per reference, 1 for a hit.
+        sets = self.sets
+        num_sets = self.num_sets
+        set_hits = self.set_hits
+        set_misses = self.set_misses
+        hits = bytearray(len(page_numbers))
+        for i, (page_number, frame_number) in enumerate(
+            zip(page_numbers, frame_numbers)
+        ):
+            index = page_number % num_sets
+            tlb_set = sets[index]
+            if tlb_set.lookup(page_number) is not None:
+                hits[i] = 1
+                set_hits[index] += 1
+            else:
+                set_misses[index] += 1
+                if frame_number >= 0:
+                    tlb_set.insert(page_number, frame_number)
+        hit_count = hits.count(1)
+        self.hits += hit_count
+        self.misses += len(hits) - hit_count
+        return hits
+
     def update(self, page_number, frame_number):
-        if page_number in self.entries:
-            if page_number in self.access_order:
-                self.access_order.remove(page_number)
-        elif len(self.entries) >= self.size:
-            if self.access_order:
-                lru_page = self.access_order.pop(0)
-                if lru_page in self.entries:
-                    del self.entries[lru_page]
-        
-        self.entries[page_number] = frame_number
-        self.access_order.append(page_number)
-    
+        self.sets[page_number % self.num_sets].insert(page_number, frame_number)
+
+    def flush(self):
+        for tlb_set in self.sets:
+            tlb_set.flush()
+
     def get_hit_ratio(self):
         total = self.hits + self.misses
         return (self.hits / total * 100) if total > 0 else 0
+
+    def get_set_hit_ratios(self):
+        ratios = []
+        for hits, misses in zip(self.set_hits, self.set_misses):
+            total = hits + misses
+            ratios.append((hits / total * 100) if total > 0 else 0)
+        return ratios
@@ -0,0 +1,134 @@
+import mmap
+import os
+
+import numpy as np
+
+# Bit in a record's flag byte marking the access as a write.
+WRITE_FLAG = 1
+
+
+class TraceReader:
+    def __init__(
+        self, path, page_size=4096, address_width=8, has_flags=False, chunk_size=1 << 16
+    ):
+        if address_width not in (4, 8):
+            raise ValueError("Address width must be 4 or 8 bytes")
+        if page_size <= 0:
+            raise ValueError("Page size must be positive")
+
+        self.path = path
+        self.page_size = page_size
+        self.address_width = address_width
+        self.has_flags = has_flags
+        self.chunk_size = chunk_size
+
+        fields = [("address", f"<u{address_width}")]
+        if has_flags:
+            fields.append(("flags", "u1"))
+        self.dtype = np.dtype(fields)
+
+        size = os.path.getsize(path)
+        if size % self.dtype.itemsize:
+            raise ValueError(
+                f"Trace size {size} is not a multiple of the "
+                f"{self.dtype.itemsize}-byte record size"
+            )
+        self.length = size // self.dtype.itemsize
+
+        # Power-of-two page sizes turn the division into a shift.
+        if page_size & (page_size - 1) == 0:
+            self.page_shift = page_size.bit_length() - 1
+        else:
+            self.page_shift = None
+
+        self._file = None
+        self._map = None
+        self._records = None
+
+    def __len__(self):
+        return self.length
+
+    def __enter__(self):
+        self.open()
+        return self
+
+    def __exit__(self, exc_type, exc, traceback):
+        self.close()
+
+    def open(self):
+        if self._records is not None or self.length == 0:
+            return
+        self._file = open(self.path, "rb")
+        self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        if hasattr(self._map, "madvise") and hasattr(mmap, "MADV_SEQUENTIAL"):
+            self._map.madvise(mmap.MADV_SEQUENTIAL)
+        self._records = np.frombuffer(self._map, dtype=self.dtype)
+
+    def close(self):
+        # numpy views keep the buffer exported; drop ours before unmapping.
+        # If a caller still holds one (say while an exception unwinds), the
+        # mapping is left to them and goes away with the last view.
+        self._records = None
+        if self._map is not None:
+            try:
+                self._map.close()
+            except BufferError:
+                pass
+            self._map = None
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def to_pages(self, addresses):
+        if self.page_shift is not None:
+            return addresses >> self.page_shift
+        return addresses // self.page_size
+
+    def addresses(self):
+        self.open()
+        if self._records is None:
+            return np.empty(0, dtype=f"<u{self.address_width}")
+        return self._records["address"]
+
+    def writes(self):
+        # Whole-trace write flags, or None without a flag byte.
+        if not self.has_flags:
+            return None
+        self.open()
+        if self._records is None:
+            return np.empty(0, dtype=bool)
+        return (self._records["flags"] & WRITE_FLAG).astype(bool)
+
+    def address_chunks(self):
+        self.open()
+        for start in range(0, self.length, self.chunk_size):
+            records = self._records[start : start + self.chunk_size]
+            flags = records["flags"] if self.has_flags else None
+            yield records["address"], flags
+
+    def access_chunks(self):
+        # (pages, writes) per chunk; writes is None without a flag byte.
+        for addresses, flags in self.address_chunks():
+            writes = None if flags is None else (flags & WRITE_FLAG).astype(bool)
+            yield self.to_pages(addresses), writes
+
+    def page_chunks(self):
+        for addresses, _ in self.address_chunks():
+            yield self.to_pages(addresses)
+
+    def __iter__(self):
+        for pages in self.page_chunks():
+            yield from pages.tolist()
+
+
+def write_trace(path, addresses, address_width=8, flags=None):
+    fields = [("address", f"<u{address_width}")]
+    if flags is not None:
+        fields.append(("flags", "u1"))
+
+    addresses = np.asarray(addresses)
+    records = np.empty(len(addresses), dtype=np.dtype(fields))
+    records["address"] = addresses
+    if flags is not None:
+        records["flags"] = flags
+    records.tofile(path)